@@ -0,0 +1,202 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from multiprocessing import Pool
+from pentago import Pentago
+from search import PVSearch
+from transposition import BoundedTT
+from threats import ThreatSolver
+from record import GameRecord, record_lines
+
+# Search of the worker process, created once by init_worker - keeps its transposition table between records.
+__worker_search = None
+
+
+def init_worker(max_depth, time_limit, megabytes, threats):
+    """
+    Creates the search used by the worker process.
+
+    Parameters
+    ----------
+    max_depth : int
+    time_limit : float
+        seconds per position, None searches up to max_depth
+    megabytes : float
+        transposition table size of the worker
+    threats : bool
+        whether leaves are checked for a forced win of the player to move
+
+    Returns
+    -------
+    None
+    """
+    global __worker_search
+    __worker_search = PVSearch(max_depth=max_depth, time_limit=time_limit,
+                               tt=BoundedTT(megabytes=megabytes, replacement='two-tier'),
+                               threats=ThreatSolver() if threats else None)
+
+
+def annotate(search, game, move):
+    """
+    Searches the position before the played move.
+
+    Parameters
+    ----------
+    search : PVSearch
+    game : Pentago
+        position before the move, it is not changed
+    move : Move
+        played move
+
+    Returns
+    -------
+    annotation : dict
+        player to move, played move, best move, its score for the player to move, search depth and whether the
+        played move leads to the same position as the best one
+    """
+    best = search(game)
+    return {
+        'player': game.nplayer,
+        'played': str(move),
+        'best': str(best),
+        'score': search.value,
+        'depth': search.depth,
+        'best_played': game.representative_move(move) == best,
+    }
+
+
+def analyze_record(task):
+    """
+    Annotates every move of the record in the worker process. Positions are searched in the game order, so every
+    search starts with the transposition table filled by the previous one.
+
+    Parameters
+    ----------
+    task : tuple
+        line number and the record line
+
+    Returns
+    -------
+    result : tuple
+        line number, annotations of the moves and the error message - None when the record is valid, otherwise
+        the moves before the invalid one are still annotated
+    """
+    number, line = task
+    annotations = []
+    try:
+        for game, move in GameRecord.from_line(line).replay(Pentago):
+            annotation = annotate(__worker_search, game, move)
+            annotations.append(dict({'line': number, 'ply': len(annotations) + 1}, **annotation))
+    except ValueError as error:
+        return number, annotations, str(error)
+    return number, annotations, None
+
+
+def write_annotations(target, result, counts):
+    """
+    Writes annotations of one record and updates the counts.
+
+    Parameters
+    ----------
+    target : file object
+        opened JSON lines file
+    result : tuple
+        analyze_record result
+    counts : dict
+        numbers of records, annotated moves and invalid records
+
+    Returns
+    -------
+    None
+    """
+    number, annotations, error = result
+    for annotation in annotations:
+        target.write(json.dumps(annotation) + "\n")
+    if error is not None:
+        target.write(json.dumps({'line': number, 'error': error}) + "\n")
+        counts['errors'] += 1
+    counts['records'] += 1
+    counts['moves'] += len(annotations)
+
+
+def analyze_file(records, output, workers=None, max_depth=2, time_limit=None, megabytes=16, threats=True,
+                 read_ahead=None):
+    """
+    Annotates all records of the file on a pool of worker processes. Records are read line by line, at most
+    read_ahead of them are sent to the workers before the oldest result is written, and results are written in the
+    file order - so files of any size are analyzed in constant memory (Pool.imap would read the whole file ahead).
+    Every move gets one JSON line, see annotate; invalid records get a line with the error.
+
+    Parameters
+    ----------
+    records : str
+        path of the game records file, see GameRecord
+    output : str
+        path of the JSON lines file with annotations
+    workers : int
+        number of processes, number of CPUs by default
+    max_depth : int
+    time_limit : float
+        seconds per position, None searches up to max_depth
+    megabytes : float
+        transposition table size of every worker
+    threats : bool
+    read_ahead : int
+        number of records searched or waiting for a worker at once, 4 per worker by default
+
+    Returns
+    -------
+    counts : dict
+        numbers of records, annotated moves and invalid records
+    """
+    counts = {'records': 0, 'moves': 0, 'errors': 0}
+    workers = workers or os.cpu_count() or 1
+    read_ahead = read_ahead or 4 * workers
+    with open(records) as source, open(output, "w") as target, \
+            Pool(workers, initializer=init_worker, initargs=(max_depth, time_limit, megabytes, threats)) as pool:
+        pending = deque()
+        for task in record_lines(source):
+            pending.append(pool.apply_async(analyze_record, (task,)))
+            if len(pending) >= read_ahead:
+                write_annotations(target, pending.popleft().get(), counts)
+        while pending:
+            write_annotations(target, pending.popleft().get(), counts)
+    return counts
+
+
+def main():
+    """
+    Analyzes the game records file and prints the throughput.
+
+    Returns
+    -------
+    None
+    """
+    parser = argparse.ArgumentParser(description="Batch analysis of Pentago game records.")
+    parser.add_argument("records", help="game records file, one game per line, e.g. '141r 233l 52r 1-0'")
+    parser.add_argument("--output", default="annotations.jsonl", help="JSON lines file with move annotations")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes searching positions, number of CPUs by default")
+    parser.add_argument("--depth", type=int, default=2, help="search depth of every position")
+    parser.add_argument("--time", type=float, default=0, help="seconds per position, 0 searches up to --depth")
+    parser.add_argument("--megabytes", type=float, default=16, help="transposition table size of every worker")
+    parser.add_argument("--no-threats", action="store_true",
+                        help="do not check the search leaves for a forced win of the player to move")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = analyze_file(args.records, args.output, args.workers, args.depth, args.time or None, args.megabytes,
+                          not args.no_threats)
+    seconds = time.perf_counter() - start
+    print("%d records, %d moves, %d invalid records in %.2f s: %.1f moves/s"
+          % (counts['records'], counts['moves'], counts['errors'], seconds, counts['moves'] / seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import numpy as np
+from bitboard import QUADRANT_POSITIONS_COUNT, POSITIONS_COUNT, WIN_MASKS
+from evaluation import LINES_COUNT, LINE_LENGTH, LINE_STATE_BASE, LINE_SCORES, MAX_POTENTIAL
+from mcts import ONE, QUADRANT_MASK_ARRAY, ROTATION_TABLES_ARRAY, has_lines
+from threats import WINNING_MASKS
+from search import WIN_SCORE
+
+# Cell arrays hold one uint8 per position (1 - stone, 0 - empty), so a batch of positions is a (N, 36) array.
+# Bitboards are unpacked into them through their little endian bytes.
+BITBOARD_BYTES = 8
+# MASK_CELLS[i][k] - 1 when position index i lies on mask k: first the win lines, then the winning masks of the threat
+# search (see threats module). Multiplying cell arrays by it counts stones of every mask for all positions at once.
+MASK_CELLS = np.array([[mask >> i & 1 for mask in WIN_MASKS + WINNING_MASKS] for i in range(POSITIONS_COUNT)],
+                      dtype=np.float32)
+LINE_SCORES_ARRAY = np.array(LINE_SCORES, dtype=np.int64)
+QUADRANT_SHIFT = np.int64(QUADRANT_POSITIONS_COUNT)
+
+
+def as_cells(positions):
+    """
+    Returns cell arrays of the positions - bitboards are unpacked, cell arrays are returned as they are.
+
+    Parameters
+    ----------
+    positions : np.array
+        1D array[uint64] of bitboards or 2D array[uint8] of cell arrays, one row per position
+
+    Returns
+    -------
+    cells : 2D np.array[uint8]
+        (N, 36) array, cells[n][i] is 1 when position n holds a stone on position index i
+    """
+    positions = np.asarray(positions)
+    if positions.ndim == 2:
+        return positions
+    bytes_ = positions.astype('<u8').view(np.uint8).reshape(-1, BITBOARD_BYTES)
+    return np.unpackbits(bytes_, axis=1, bitorder='little')[:, :POSITIONS_COUNT]
+
+
+def mask_counts(positions):
+    """
+    Counts stones of the positions on every win line and every winning mask with a single matrix product.
+
+    Parameters
+    ----------
+    positions : np.array
+        bitboards or cell arrays, see as_cells
+
+    Returns
+    -------
+    counts : 2D np.array[int64]
+        (N, 32 + number of winning masks) array, win lines first
+    """
+    return (as_cells(positions).astype(np.float32) @ MASK_CELLS).astype(np.int64)
+
+
+def batch_line_states(positions1, positions2):
+    """
+    Calculates states of all lines of all positions at once - the same values as evaluation.line_states.
+
+    Parameters
+    ----------
+    positions1 : np.array
+        player 1 bitboards or cell arrays, see as_cells
+    positions2 : np.array
+        player 2 bitboards or cell arrays
+
+    Returns
+    -------
+    states : 2D np.array[int64]
+        (N, 32) array
+    """
+    return mask_counts(positions1)[:, :LINES_COUNT] * LINE_STATE_BASE + mask_counts(positions2)[:, :LINES_COUNT]
+
+
+def batch_potentials(positions1, positions2):
+    """
+    Calculates potential of all positions for player 1 at once - the same values as evaluation.line_potential.
+
+    Parameters
+    ----------
+    positions1 : np.array
+        player 1 bitboards or cell arrays, see as_cells
+    positions2 : np.array
+        player 2 bitboards or cell arrays
+
+    Returns
+    -------
+    potentials : 1D np.array[int64]
+    """
+    return LINE_SCORES_ARRAY[batch_line_states(positions1, positions2)].sum(axis=1)
+
+
+def batch_scores(positions1, positions2, nplayers):
+    """
+    Scores all positions at once for the player to move - the same values as Pentago.scoring: -100 when the
+    opponent has a winning combination, otherwise the clipped line potential.
+
+    Parameters
+    ----------
+    positions1 : np.array
+        player 1 bitboards or cell arrays, see as_cells
+    positions2 : np.array
+        player 2 bitboards or cell arrays
+    nplayers : np.array
+        1D array[int] of players to move, or a single player
+
+    Returns
+    -------
+    scores : 1D np.array[int64]
+    """
+    counts1, counts2 = mask_counts(positions1)[:, :LINES_COUNT], mask_counts(positions2)[:, :LINES_COUNT]
+    potentials = np.clip(LINE_SCORES_ARRAY[counts1 * LINE_STATE_BASE + counts2].sum(axis=1), -MAX_POTENTIAL,
+                         MAX_POTENTIAL)
+    first = np.broadcast_to(np.asarray(nplayers) == 1, potentials.shape)
+    lost = np.where(first, (counts2 == LINE_LENGTH).any(axis=1), (counts1 == LINE_LENGTH).any(axis=1))
+    return np.where(lost, -WIN_SCORE, np.where(first, potentials, -potentials))
+
+
+def batch_successors(mover, opponent, moves, placement_wins=False):
+    """
+    Returns bitboards of the positions after all the moves at once - the same as Board.successor for every move.
+
+    Parameters
+    ----------
+    mover : int
+        bitboard of the player making the moves
+    opponent : int
+    moves : 1D array[Move]
+    placement_wins : bool
+        whether the player already has winning combination - every placement ends the game before rotating
+
+    Returns
+    -------
+    bitboards : tuple(1D np.array[uint64])
+        player making the move bitboards and opponent bitboards
+    """
+    codes = np.array(moves, dtype=np.int64)
+    movers = np.uint64(mover) | ONE << (codes >> 3).astype(np.uint64)
+    opponents = np.full(codes.size, opponent, dtype=np.uint64)
+    rotating = np.zeros(codes.size, dtype=bool) if placement_wins else ~has_lines(movers)
+    shifts = ((codes >> 1 & 3) * QUADRANT_SHIFT).astype(np.uint64)
+    directions = codes & 1
+    keep = ~(QUADRANT_MASK_ARRAY << shifts)
+    for bitboards in (movers, opponents):
+        patterns = (bitboards >> shifts & QUADRANT_MASK_ARRAY).astype(np.intp)
+        rotated = bitboards & keep | ROTATION_TABLES_ARRAY[directions, patterns] << shifts
+        bitboards[rotating] = rotated[rotating]
+    return movers, opponents
+
+
+class LeafEvaluator:
+    """
+    Class to represent batch evaluation of the search frontier - all children of a node at depth 1 are made and
+    scored together on NumPy arrays, instead of making, scoring and unmaking them one by one.
+
+    Children are generated with batch_successors and their stones counted on every win line and winning mask with one
+    matrix product, which gives the same values the search gives the leaves one at a time (see
+    IterativeDeepening._evaluate): lost game, forced win of the player to move found by the one-move check of the
+    threat solver, or the clipped line potential. Used by the search through its leaves attribute, e.g.
+    PVSearch(time_limit=3, leaves=LeafEvaluator()).
+
+    Attributes
+    ----------
+    batches : int
+        number of evaluated frontier nodes
+    leaves : int
+        number of evaluated leaves
+
+    Methods
+    -------
+    evaluate(game, moves, ply, threats):
+        Returns values of all the moves of the frontier node.
+    """
+
+    def __init__(self):
+        """
+        Creates all attributes needed for the leaf evaluator.
+        """
+        self.batches = 0
+        self.leaves = 0
+
+    def evaluate(self, game, moves, ply, threats=None):
+        """
+        Returns values of all the moves of the frontier node for the player making them - the positions after the
+        moves are scored as leaves at ply + 1.
+
+        Parameters
+        ----------
+        game : Pentago
+            frontier node position, it is not changed
+        moves : 1D array[Move]
+        ply : int
+            distance of the frontier node from the root
+        threats : ThreatSolver
+            when provided, leaves are checked for a winning move of the player to move - except on the full board,
+            where it is only a draw
+
+        Returns
+        -------
+        values : 1D array[int]
+        """
+        self.batches += 1
+        self.leaves += len(moves)
+        player = game.nplayer
+        bitboards = game.board.get_bitboards()
+        mover, opponent = bitboards[player - 1], bitboards[2 - player]
+        movers, opponents = batch_successors(mover, opponent, moves, game.winners[player - 1])
+        counts = mask_counts(np.concatenate((movers, opponents)))
+        mover_counts, opponent_counts = counts[:len(moves)], counts[len(moves):]
+        mover_lines, opponent_lines = mover_counts[:, :LINES_COUNT], opponent_counts[:, :LINES_COUNT]
+        potentials = LINE_SCORES_ARRAY[mover_lines * LINE_STATE_BASE + opponent_lines].sum(axis=1)
+        values = np.clip(potentials, -MAX_POTENTIAL, MAX_POTENTIAL)
+        leaf_ply = ply + 1
+        if threats is not None and game.board.get_empty_count() > 1:
+            winning = ((opponent_counts[:, LINES_COUNT:] >= LINE_LENGTH - 1)
+                       & (mover_counts[:, LINES_COUNT:] == 0)).any(axis=1)
+            values[winning] = leaf_ply + 1 - WIN_SCORE
+        values[(mover_lines == LINE_LENGTH).any(axis=1)] = WIN_SCORE - leaf_ply
+        return values.tolist()
@@ -0,0 +1,173 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import argparse
+import random
+import time
+from easyAI import Negamax, TT
+from pentago import Pentago
+from search import PVSearch
+from parallel import RootParallelSearch
+from transposition import BoundedTT
+
+BENCHMARK_SEED = 17410
+
+
+def benchmark_positions(count, plies, seed=BENCHMARK_SEED):
+    """
+    Creates benchmark positions by playing random moves from the empty board. Positions which are already over are
+    skipped, so every one of them can be searched.
+
+    Parameters
+    ----------
+    count : int
+        number of positions
+    plies : int
+        number of random moves played in every position
+    seed : int
+
+    Returns
+    -------
+    positions : 1D array[Pentago]
+    """
+    generator = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = Pentago([None, None])
+        for _ in range(plies):
+            game.play_move(generator.choice(game.legal_moves()))
+            if game.is_over():
+                break
+        if not game.is_over():
+            positions.append(game)
+    return positions
+
+
+def count_nodes(game):
+    """
+    Wraps make_move of the game instance, so every searched position is counted the same way for every algorithm.
+
+    Parameters
+    ----------
+    game : Pentago
+
+    Returns
+    -------
+    counter : 1D array[int]
+        one element list holding the number of make_move calls
+    """
+    counter = [0]
+    make_move = game.make_move
+
+    def counted_make_move(move):
+        counter[0] += 1
+        make_move(move)
+
+    game.make_move = counted_make_move
+    return counter
+
+
+def run(name, algo_factory, positions, depth):
+    """
+    Searches all positions with a fresh algorithm and prints the total nodes, time and nodes per second.
+
+    Parameters
+    ----------
+    name : str
+    algo_factory : function
+        creates the algorithm for the depth
+    positions : 1D array[Pentago]
+    depth : int
+
+    Returns
+    -------
+    result : tuple
+        number of nodes and seconds
+    """
+    nodes = 0
+    seconds = 0.0
+    for position in positions:
+        game = position.copy()
+        counter = count_nodes(game)
+        algo = algo_factory(depth)
+        start = time.perf_counter()
+        algo(game)
+        seconds += time.perf_counter() - start
+        nodes += counter[0]
+    print("%-10s depth %d: %10d nodes %8.2f s %10.0f nodes/s %8.3f s/position"
+          % (name, depth, nodes, seconds, nodes / seconds, seconds / len(positions)))
+    return nodes, seconds
+
+
+def run_parallel(workers_counts, positions, depth, megabytes):
+    """
+    Searches all positions with RootParallelSearch for every number of workers and prints the speedup against the
+    first one.
+
+    Parameters
+    ----------
+    workers_counts : 1D array[int]
+    positions : 1D array[Pentago]
+    depth : int
+    megabytes : float
+        transposition table size of every worker
+
+    Returns
+    -------
+    None
+    """
+    base_seconds = None
+    for workers in workers_counts:
+        algo = RootParallelSearch(workers=workers, max_depth=depth, time_limit=None, megabytes=megabytes)
+        nodes = 0
+        seconds = 0.0
+        try:
+            for position in positions:
+                start = time.perf_counter()
+                algo(position.copy())
+                seconds += time.perf_counter() - start
+                nodes += algo.nodes
+        finally:
+            algo.close()
+        base_seconds = base_seconds or seconds
+        print("%2d workers depth %d: %10d nodes %8.2f s %10.0f nodes/s  speedup %.2f"
+              % (workers, depth, nodes, seconds, nodes / seconds, base_seconds / seconds))
+
+
+def main():
+    """
+    Compares easyAI Negamax with PVSearch - nodes, nodes per second and time to reach every depth - or
+    RootParallelSearch speedup for the numbers of workers.
+
+    Returns
+    -------
+    None
+    """
+    parser = argparse.ArgumentParser(description="Compares easyAI Negamax with PVSearch.")
+    parser.add_argument("--depth", type=int, default=3, help="maximum search depth")
+    parser.add_argument("--positions", type=int, default=5, help="number of benchmark positions")
+    parser.add_argument("--plies", type=int, default=10, help="random moves played in every position")
+    parser.add_argument("--seed", type=int, default=BENCHMARK_SEED)
+    parser.add_argument("--megabytes", type=float, default=16, help="PVSearch transposition table size")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        help="compares RootParallelSearch with these numbers of workers at the maximum depth instead")
+    args = parser.parse_args()
+
+    positions = benchmark_positions(args.positions, args.plies, args.seed)
+    if args.workers:
+        run_parallel(args.workers, positions, args.depth, args.megabytes)
+        return
+    algorithms = [
+        ("Negamax", lambda depth: Negamax(depth, tt=TT())),
+        ("PVSearch", lambda depth: PVSearch(max_depth=depth, time_limit=None,
+                                            tt=BoundedTT(megabytes=args.megabytes, replacement='two-tier'))),
+    ]
+    for depth in range(1, args.depth + 1):
+        for name, algo_factory in algorithms:
+            run(name, algo_factory, positions, depth)
+        print()
+
+
+if __name__ == "__main__":
+    main()
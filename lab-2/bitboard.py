@@ -0,0 +1,180 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+from direction import Direction
+
+# Board positions are numbered quadrant after quadrant (see README), so position index i (position number - 1) is
+# stored in bit i of the player bitboard and every quadrant occupies 9 consecutive bits.
+QUADRANTS_COUNT = 4
+QUADRANT_POSITIONS_COUNT = 9
+POSITIONS_COUNT = QUADRANTS_COUNT * QUADRANT_POSITIONS_COUNT
+QUADRANT_PATTERNS_COUNT = 1 << QUADRANT_POSITIONS_COUNT
+QUADRANT_MASK = QUADRANT_PATTERNS_COUNT - 1
+FULL_BOARD = (1 << POSITIONS_COUNT) - 1
+QUADRANT_MASKS = [QUADRANT_MASK << (q * QUADRANT_POSITIONS_COUNT) for q in range(QUADRANTS_COUNT)]
+
+# ROTATION_SOURCES[direction][i] tells which quadrant index lands on index i after the rotation.
+ROTATION_SOURCES = {
+    Direction.CLOCKWISE: (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    Direction.ANTICLOCKWISE: (2, 5, 8, 1, 4, 7, 0, 3, 6),
+}
+
+
+def rotate_pattern(pattern, sources):
+    """
+    Rotates 9 bit quadrant pattern using the provided rotation sources.
+
+    Parameters
+    ----------
+    pattern : int
+        9 bit quadrant pattern, bit i holds quadrant index i
+    sources : tuple(int)
+        one of the ROTATION_SOURCES values
+
+    Returns
+    -------
+    rotated : int
+    """
+    rotated = 0
+    for i, source in enumerate(sources):
+        if pattern >> source & 1:
+            rotated |= 1 << i
+    return rotated
+
+
+# ROTATION_TABLES[direction][pattern] is the rotated 9 bit pattern - rotating a quadrant is a single table lookup.
+ROTATION_TABLES = {
+    direction: [rotate_pattern(pattern, sources) for pattern in range(QUADRANT_PATTERNS_COUNT)]
+    for direction, sources in ROTATION_SOURCES.items()
+}
+
+
+def rotate_bitboard(bitboard, quadrant, table):
+    """
+    Rotates one quadrant of the player bitboard.
+
+    Parameters
+    ----------
+    bitboard : int
+        36 bit player bitboard
+    quadrant : int
+        values from 0
+    table : 1D array[int]
+        one of the ROTATION_TABLES values
+
+    Returns
+    -------
+    bitboard : int
+    """
+    shift = quadrant * QUADRANT_POSITIONS_COUNT
+    pattern = bitboard >> shift & QUADRANT_MASK
+    return bitboard & ~QUADRANT_MASKS[quadrant] | table[pattern] << shift
+
+
+def bit_positions(bitboard):
+    """
+    Returns indexes of all set bits in ascending order.
+
+    Parameters
+    ----------
+    bitboard : int
+
+    Returns
+    -------
+    positions : 1D array[int]
+        values from 0
+    """
+    positions = []
+    while bitboard:
+        lowest = bitboard & -bitboard
+        positions.append(lowest.bit_length() - 1)
+        bitboard ^= lowest
+    return positions
+
+
+# All win combinations, values are position numbers (from 1) as shown in the positions hint table.
+WIN_COMBINATIONS = [[1, 2, 3, 10, 11],
+                    [2, 3, 10, 11, 12],
+                    [4, 5, 6, 13, 14],
+                    [5, 6, 13, 14, 15],
+                    [7, 8, 9, 16, 17],
+                    [8, 9, 16, 17, 18],
+                    [19, 20, 21, 28, 29],
+                    [20, 21, 28, 29, 30],
+                    [22, 23, 24, 31, 32],
+                    [23, 24, 31, 32, 33],
+                    [25, 26, 27, 34, 35],
+                    [26, 27, 34, 35, 36],
+                    [1, 4, 7, 19, 22],
+                    [4, 7, 19, 22, 25],
+                    [2, 5, 8, 20, 23],
+                    [5, 8, 20, 23, 26],
+                    [3, 6, 9, 21, 24],
+                    [6, 9, 21, 24, 27],
+                    [10, 13, 16, 28, 31],
+                    [13, 16, 28, 31, 34],
+                    [11, 14, 17, 29, 32],
+                    [14, 17, 29, 32, 35],
+                    [12, 15, 18, 30, 33],
+                    [15, 18, 30, 33, 36],
+                    [4, 8, 21, 31, 35],
+                    [1, 5, 9, 28, 32],
+                    [5, 9, 28, 32, 36],
+                    [2, 6, 16, 29, 33],
+                    [22, 20, 9, 13, 11],
+                    [25, 23, 21, 16, 14],
+                    [23, 21, 16, 14, 12],
+                    [26, 24, 28, 17, 15]]
+
+# Win combinations as bitboard masks, computed once.
+WIN_MASKS = [sum(1 << (position - 1) for position in combination) for combination in WIN_COMBINATIONS]
+# POSITION_WIN_MASKS[i] - masks of the lines going through position index i, only these can be completed by placing.
+POSITION_WIN_MASKS = [[mask for mask in WIN_MASKS if mask >> i & 1] for i in range(POSITIONS_COUNT)]
+# QUADRANT_WIN_MASKS[q] - masks of the lines touching quadrant q, only these can be changed by rotating it.
+QUADRANT_WIN_MASKS = [[mask for mask in WIN_MASKS if mask & quadrant_mask] for quadrant_mask in QUADRANT_MASKS]
+
+
+def has_line(bitboard, masks):
+    """
+    Checks whether any of the provided line masks is fully covered by the bitboard.
+
+    Parameters
+    ----------
+    bitboard : int
+    masks : 1D array[int]
+
+    Returns
+    -------
+    has_line : bool
+    """
+    for mask in masks:
+        if bitboard & mask == mask:
+            return True
+    return False
+
+
+def winning_players(bitboard1, bitboard2, masks):
+    """
+    Checks both players against the provided line masks in one pass.
+
+    Parameters
+    ----------
+    bitboard1 : int
+        player 1 bitboard
+    bitboard2 : int
+        player 2 bitboard
+    masks : 1D array[int]
+
+    Returns
+    -------
+    winners : tuple(bool)
+        whether player 1 and player 2 have a full line
+    """
+    win1 = win2 = False
+    for mask in masks:
+        if bitboard1 & mask == mask:
+            win1 = True
+        elif bitboard2 & mask == mask:
+            win2 = True
+    return win1, win2
@@ -4,47 +4,95 @@
 
 from quadrant import Quadrant
 from direction import Direction
+from bitboard import QUADRANTS_COUNT, QUADRANT_POSITIONS_COUNT, POSITIONS_COUNT, FULL_BOARD, ROTATION_TABLES, \
+    QUADRANT_MASK, QUADRANT_MASKS, WIN_MASKS, POSITION_WIN_MASKS, rotate_bitboard, bit_positions, has_line, \
+    winning_players
+from zobrist import ZOBRIST_KEYS, QUADRANT_KEYS
+from move import MOVES, MOVES_PER_POSITION, MOVE_DIRECTIONS
+from evaluation import LINES_COUNT, LINE_STEPS, LINE_SCORES, FOUR_STATES, POSITION_LINES, ROTATION_LINE_CHANGES
+
+# POSITION_MOVES[i] holds all 8 moves for position index i.
+POSITION_MOVES = [MOVES[p * MOVES_PER_POSITION:(p + 1) * MOVES_PER_POSITION] for p in range(POSITIONS_COUNT)]
+# MOVE_ROTATION_TABLES[d] - rotation table for the move direction bit d.
+MOVE_ROTATION_TABLES = [ROTATION_TABLES[direction] for direction in MOVE_DIRECTIONS]
 
 
 class Board:
     """
     Class to represent board.
 
+    Board is kept as two 36 bit integers (bitboards), one per player - bit i is set when the player holds position
+    index i (position number - 1). Quadrant rotations are table-driven, see bitboard module.
+
     Attributes
     ----------
     quadrants_count : int
-        number of the quadrants in the play_area attribute
+        number of the quadrants on the board
     quadrant_positions_count : int
         number of the positions per quadrant
-    play_area : 1D array[Quadrant]
-        array containing quadrant objects
+    bitboards : 1D array[int]
+        player 1 and player 2 bitboards
+    empty : int
+        bitboard of the empty positions, updated by place_player and rotate_quadrant
+    empty_count : int
+        number of the empty positions, updated by place_player
+    hash : int
+        64 bit Zobrist hash of the position, updated incrementally by place_player and rotate_quadrant
+    line_states : 1D array[int]
+        stones of both players on every win line, see evaluation module
+    potential : int
+        sum of the line potentials for player 1, updated incrementally together with line_states
 
     Methods
     -------
     print_board():
         Prints all quadrants.
     place_player(player, position):
-        Places player in the specific quadrant. Quadrant and array index are calculated based on the integers division
-        (quadrant value) and integers remainder (array index value).
+        Places player on the specific position. Player 0 clears the position.
     rotate_quadrant(quadrant, direction):
-        Rotates selected quadrant in specific direction - either left or right. Calls Quadrant method.
+        Rotates selected quadrant in specific direction - either left or right. Uses precomputed rotation tables.
+    __update_lines(changes):
+        Applies line state changes and updates the potential.
     player_choices(player):
         Generates specific player positions on the whole play area. Values are based on which quadrant position is held.
         First quadrant might contain values from 1 to 9, next quadrant might contain values from 10 to 18 etc.
     available_moves():
         Generates all available moves, from all quadrants, which player can make. First quadrant might contain values
         from 1 to 9, next quadrant might contain values from 10 to 18 etc.
+    distinct_moves(player, placement_wins):
+        Generates available moves without the ones leading to the same position as an earlier generated move.
+    successor(player, move, placement_wins):
+        Returns bitboards of the position after the move, without changing the board.
     get_play_area():
         Returns play area array containing Quadrant objects.
+    get_bitboards():
+        Returns both player bitboards.
+    get_hash():
+        Returns Zobrist hash of the position.
+    get_potential():
+        Returns line potential of the position for player 1.
+    get_empty_count():
+        Returns number of empty positions.
+    has_line(player, masks):
+        Checks whether player fully covers any of the provided win line masks.
+    has_four(player):
+        Checks whether player can win by placing a stone.
+    winning_players(masks):
+        Checks which players fully cover any of the provided win line masks - both players in one pass.
     """
 
     def __init__(self):
         """
         Creates all attributes needed for the board object.
         """
-        self.quadrants_count = 4
-        self.quadrant_positions_count = 9
-        self.play_area = [Quadrant(self.quadrant_positions_count) for _ in range(self.quadrants_count)]
+        self.quadrants_count = QUADRANTS_COUNT
+        self.quadrant_positions_count = QUADRANT_POSITIONS_COUNT
+        self.bitboards = [0, 0]
+        self.empty = FULL_BOARD
+        self.empty_count = POSITIONS_COUNT
+        self.hash = 0
+        self.line_states = [0] * LINES_COUNT
+        self.potential = 0
 
     def print_board(self):
         """
@@ -54,45 +102,100 @@ class Board:
         -------
         None
         """
+        play_area = self.get_play_area()
         for i in range(0, self.quadrants_count, 2):
             for row in range(3):
-                line = self.play_area[i].get_line(row) + " | " + self.play_area[i+1].get_line(row)
+                line = play_area[i].get_line(row) + " | " + play_area[i+1].get_line(row)
                 print(line)
             if i < self.quadrants_count - 2:
                 print("----------------")
 
     def place_player(self, player, position):
         """
-        Places player in the specific quadrant. Quadrant and array index are calculated based on the integers division
-        (quadrant value) and integers remainder (array index value).
+        Places player on the specific position. Player 0 clears the position - clearing an empty position changes
+        nothing. Xors the position key into the hash, updates the empty positions and only the lines going through the
+        position.
 
         Parameters
         ----------
         player : int
         position : int
-            values from 1
+            values from 0
         """
-        quadrant = position // self.quadrant_positions_count
-        quadrant_position = position % self.quadrant_positions_count
-        self.play_area[quadrant].place_player(player, quadrant_position)
-    
+        bit = 1 << position
+        if player == 0:
+            if self.empty & bit:
+                return
+            player = 1 if self.bitboards[0] & bit else 2
+            self.bitboards[player - 1] &= ~bit
+            self.empty_count += 1
+            step = -LINE_STEPS[player]
+        else:
+            self.bitboards[player - 1] |= bit
+            self.empty_count -= 1
+            step = LINE_STEPS[player]
+        self.empty ^= bit
+        self.hash ^= ZOBRIST_KEYS[player - 1][position]
+        states = self.line_states
+        potential = self.potential
+        for line in POSITION_LINES[position]:
+            state = states[line]
+            states[line] = state + step
+            potential += LINE_SCORES[state + step] - LINE_SCORES[state]
+        self.potential = potential
+
     def rotate_quadrant(self, quadrant, direction):
         """
-        Rotates selected quadrant in specific direction - either left or right. Calls Quadrant method.
+        Rotates selected quadrant in specific direction - either left or right. Uses precomputed rotation tables.
+        Hash is updated by removing the old quadrant pattern key and adding the rotated one, line states with the
+        precomputed changes of the rotated pattern. Empty positions are rotated together with the stones.
 
         Parameters
         ----------
         quadrant : int
             values from 0
-        direction : str
-            either 'l' or 'r'
+        direction : Direction
+            Direction value ('l' or 'r') is accepted as well
 
         Returns
         -------
         None
         """
         direction = Direction(direction)
-        self.play_area[quadrant].rotate(direction)
+        table = ROTATION_TABLES[direction]
+        shift = quadrant * self.quadrant_positions_count
+        keep = ~QUADRANT_MASKS[quadrant]
+        for i in range(2):
+            bitboard = self.bitboards[i]
+            pattern = bitboard >> shift & QUADRANT_MASK
+            rotated = table[pattern]
+            if pattern != rotated:
+                self.bitboards[i] = bitboard & keep | rotated << shift
+                keys = QUADRANT_KEYS[i][quadrant]
+                self.hash ^= keys[pattern] ^ keys[rotated]
+                self.__update_lines(ROTATION_LINE_CHANGES[i][direction][quadrant][pattern])
+        self.empty = ~(self.bitboards[0] | self.bitboards[1]) & FULL_BOARD
+
+    def __update_lines(self, changes):
+        """
+        Applies line state changes and updates the potential.
+
+        Parameters
+        ----------
+        changes : tuple(tuple(int))
+            line index and line state difference pairs, one of the evaluation.ROTATION_LINE_CHANGES values
+
+        Returns
+        -------
+        None
+        """
+        states = self.line_states
+        potential = self.potential
+        for line, difference in changes:
+            state = states[line]
+            states[line] = state + difference
+            potential += LINE_SCORES[state + difference] - LINE_SCORES[state]
+        self.potential = potential
 
     def player_choices(self, player):
         """
@@ -107,14 +210,7 @@ class Board:
         -------
         player_choices : 1D array[int]
         """
-        player_choices = []
-        for i in range(self.quadrants_count):
-            quadrant_board = self.play_area[i].get_board()
-            for j in range(self.quadrant_positions_count):
-                if quadrant_board[j] == player:
-                    position = j + 1 + i * 9
-                    player_choices.append(position)
-        return player_choices
+        return [position + 1 for position in bit_positions(self.bitboards[player - 1])]
 
     def available_moves(self):
         """
@@ -123,29 +219,193 @@ class Board:
 
         Returns
         -------
-        available_moves : 1D array[str]
+        available_moves : 1D array[Move]
             contains information about available moves - what position is empty, which quadrant can u rotate and
-            direction of the rotate - e.g. '10 2 l'
+            direction of the rotate - e.g. '10 2 l', encoded as integers
 
         """
         available_moves = []
-        for i in range(self.quadrants_count):
-            quadrant_positions = self.play_area[i].available_positions()
-            for p in quadrant_positions:
-                position = p + i * 9
-                for j in range(self.quadrants_count):
-                    move1 = [str(position), str(j + 1), "l"]
-                    move2 = [str(position), str(j + 1), "r"]
-                    available_moves.append(" ".join(move1))
-                    available_moves.append(" ".join(move2))
+        for p in bit_positions(self.empty):
+            available_moves.extend(POSITION_MOVES[p])
         return available_moves
 
+    def distinct_moves(self, player, placement_wins=False):
+        """
+        Generates available moves without the ones leading to the same position as an earlier generated move - e.g.
+        rotating an empty quadrant gives the same position whichever quadrant and direction is chosen, left and right
+        rotation of a symmetric quadrant give the same position, placing and rotating a quadrant might give the same
+        position as placing on the rotated position. Moves are kept in the available_moves() order, so the first move
+        leading to every position is kept.
+
+        Parameters
+        ----------
+        player : int
+            player making the move
+        placement_wins : bool
+            whether the player already has winning combination - every placement ends the game before rotating
+
+        Returns
+        -------
+        distinct_moves : 1D array[Move]
+        """
+        mover = self.bitboards[player - 1]
+        opponent = self.bitboards[2 - player]
+        rotated = [(rotate_bitboard(mover, quadrant, table), rotate_bitboard(opponent, quadrant, table))
+                   for quadrant in range(self.quadrants_count) for table in MOVE_ROTATION_TABLES]
+        distinct_moves = []
+        seen = set()
+        for p in bit_positions(self.empty):
+            bit = 1 << p
+            placed = mover | bit
+            moves = POSITION_MOVES[p]
+            if placement_wins or has_line(placed, POSITION_WIN_MASKS[p]):
+                key = placed << POSITIONS_COUNT | opponent
+                if key not in seen:
+                    seen.add(key)
+                    distinct_moves.append(moves[0])
+                continue
+            placed_quadrant = p // self.quadrant_positions_count
+            for i in range(MOVES_PER_POSITION):
+                rotated_mover, rotated_opponent = rotated[i]
+                if i >> 1 == placed_quadrant:
+                    rotated_mover = rotate_bitboard(placed, placed_quadrant, MOVE_ROTATION_TABLES[i & 1])
+                else:
+                    rotated_mover |= bit
+                key = rotated_mover << POSITIONS_COUNT | rotated_opponent
+                if key not in seen:
+                    seen.add(key)
+                    distinct_moves.append(moves[i])
+        return distinct_moves
+
+    def successor(self, player, move, placement_wins=False):
+        """
+        Returns bitboards of the position after the move, without changing the board.
+
+        Parameters
+        ----------
+        player : int
+            player making the move
+        move : Move
+        placement_wins : bool
+            whether the player already has winning combination - every placement ends the game before rotating
+
+        Returns
+        -------
+        bitboards : tuple(int)
+            player making the move bitboard and opponent bitboard
+        """
+        position = move >> 3
+        mover = self.bitboards[player - 1] | 1 << position
+        opponent = self.bitboards[2 - player]
+        if placement_wins or has_line(mover, POSITION_WIN_MASKS[position]):
+            return mover, opponent
+        quadrant = move >> 1 & 3
+        table = MOVE_ROTATION_TABLES[move & 1]
+        return rotate_bitboard(mover, quadrant, table), rotate_bitboard(opponent, quadrant, table)
+
     def get_play_area(self):
         """
-        Returns play area array containing Quadrant objects.
+        Returns play area array containing Quadrant objects. Quadrants are built from the bitboards, so they are
+        snapshots of the current state - changing them does not change the board.
 
         Returns
         -------
         play_area : 1D array[Quadrant]
         """
-        return self.play_area
+        play_area = [Quadrant(self.quadrant_positions_count) for _ in range(self.quadrants_count)]
+        for player in (1, 2):
+            for position in bit_positions(self.bitboards[player - 1]):
+                quadrant, quadrant_position = divmod(position, self.quadrant_positions_count)
+                play_area[quadrant].place_player(player, quadrant_position)
+        return play_area
+
+    def get_bitboards(self):
+        """
+        Returns both player bitboards.
+
+        Returns
+        -------
+        bitboards : tuple(int)
+            player 1 bitboard and player 2 bitboard
+        """
+        return self.bitboards[0], self.bitboards[1]
+
+    def get_hash(self):
+        """
+        Returns Zobrist hash of the position.
+
+        Returns
+        -------
+        hash : int
+            64 bit key
+        """
+        return self.hash
+
+    def get_potential(self):
+        """
+        Returns line potential of the position for player 1 - weighted number of lines which only player 1 can
+        complete, minus the same for player 2.
+
+        Returns
+        -------
+        potential : int
+        """
+        return self.potential
+
+    def get_empty_count(self):
+        """
+        Returns number of empty positions - kept up to date by place_player, so checking whether the board is full
+        does not look at the board.
+
+        Returns
+        -------
+        empty_count : int
+        """
+        return self.empty_count
+
+    def has_line(self, player, masks):
+        """
+        Checks whether player fully covers any of the provided win line masks.
+
+        Parameters
+        ----------
+        player : int
+        masks : 1D array[int]
+            e.g. bitboard.POSITION_WIN_MASKS value for the placed position
+
+        Returns
+        -------
+        has_line : bool
+        """
+        return has_line(self.bitboards[player - 1], masks)
+
+    def has_four(self, player):
+        """
+        Checks whether player can win by placing a stone - any win line holds 4 player stones and an empty position.
+        Uses the line states, so the board is not scanned.
+
+        Parameters
+        ----------
+        player : int
+
+        Returns
+        -------
+        has_four : bool
+        """
+        return FOUR_STATES[player] in self.line_states
+
+    def winning_players(self, masks=WIN_MASKS):
+        """
+        Checks which players fully cover any of the provided win line masks - both players in one pass.
+
+        Parameters
+        ----------
+        masks : 1D array[int]
+            all win lines by default, e.g. bitboard.QUADRANT_WIN_MASKS value for the rotated quadrant
+
+        Returns
+        -------
+        winners : tuple(bool)
+            whether player 1 and player 2 have a winning combination
+        """
+        return winning_players(self.bitboards[0], self.bitboards[1], masks)
@@ -0,0 +1,256 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import argparse
+import os
+import time
+import numpy as np
+from symmetry import INVERSE_SYMMETRIES
+from move import MOVES
+
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.npy")
+# Book entry - symmetry independent position key, best move on the representative position, its value and depth.
+BOOK_DTYPE = np.dtype([('key', '<u8'), ('move', '<i2'), ('value', '<i2'), ('depth', '<i1')])
+
+
+class OpeningBook:
+    """
+    Class to represent opening book - best moves of the early positions, searched deeply once and saved to a file.
+
+    File is a NumPy array of entries sorted by the symmetry independent position key (see Pentago.canonical_ttentry),
+    so all 8 symmetric copies of a position share one entry. It is memory-mapped, not read - opening the book costs
+    nothing and every lookup is a binary search touching only a few pages of the file.
+
+    Attributes
+    ----------
+    path : str
+    entries : 1D np.memmap[BOOK_DTYPE]
+        empty array when the file does not exist
+
+    Methods
+    -------
+    lookup(game):
+        Returns book entry of the game position.
+    __call__(game):
+        Returns book move for the game position.
+    __len__():
+        Returns number of positions in the book.
+    """
+
+    def __init__(self, path=BOOK_FILE):
+        """
+        Opens the book file.
+
+        Parameters
+        ----------
+        path : str
+            book file created by the book generator, missing file gives an empty book
+        """
+        self.path = path
+        if os.path.exists(path):
+            self.entries = np.load(path, mmap_mode='r')
+        else:
+            self.entries = np.zeros(0, dtype=BOOK_DTYPE)
+
+    def lookup(self, game):
+        """
+        Returns book entry of the game position.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        entry : dict
+            contains move, value and depth keys, None when the position is not in the book
+        """
+        keys = self.entries['key']
+        if keys.size == 0:
+            return None
+        key, symmetry = game.canonical_ttentry()
+        index = int(np.searchsorted(keys, np.uint64(key)))
+        if index == keys.size or int(keys[index]) != key:
+            return None
+        entry = self.entries[index]
+        move = game.transform_move(MOVES[int(entry['move'])], INVERSE_SYMMETRIES[symmetry])
+        return {'move': move, 'value': int(entry['value']), 'depth': int(entry['depth'])}
+
+    def __call__(self, game):
+        """
+        Returns book move for the game position, None when the position is not in the book.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        entry = self.lookup(game)
+        return None if entry is None else entry['move']
+
+    def __len__(self):
+        """
+        Returns number of positions in the book.
+
+        Returns
+        -------
+        length : int
+        """
+        return len(self.entries)
+
+
+class BookSearch:
+    """
+    Class to represent AI algorithm playing from the opening book and searching when the position is out of book.
+
+    Can be used like easyAI algorithms: AI_Player(BookSearch(OpeningBook(), PVSearch(time_limit=3))).
+
+    Attributes
+    ----------
+    book : OpeningBook
+    algo : PVSearch/RootParallelSearch/MCTS
+        algorithm used out of book
+    book_moves : int
+        number of moves played from the book
+
+    Methods
+    -------
+    __call__(game):
+        Returns book move or the move found by the algorithm.
+    """
+
+    def __init__(self, book, algo):
+        """
+        Creates all attributes needed for the book AI.
+
+        Parameters
+        ----------
+        book : OpeningBook
+        algo : PVSearch/RootParallelSearch/MCTS
+        """
+        self.book = book
+        self.algo = algo
+        self.book_moves = 0
+
+    def __call__(self, game):
+        """
+        Returns book move or the move found by the algorithm.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        move = self.book(game)
+        if move is None:
+            return self.algo(game)
+        self.book_moves += 1
+        return move
+
+
+def book_positions(game_class, plies):
+    """
+    Generates all positions reachable within the number of plies from the empty board, one per symmetry class.
+    Positions which are already over are skipped.
+
+    Parameters
+    ----------
+    game_class : type
+        game class, e.g. Pentago
+    plies : int
+        positions after 0 to plies - 1 moves are generated
+
+    Returns
+    -------
+    positions : dict
+        compact game state (see Pentago.get_state) for every symmetry independent key
+    """
+    root = game_class([None, None])
+    level = {root.canonical_ttentry()[0]: root.get_state()}
+    positions = dict(level)
+    for _ in range(plies - 1):
+        next_level = {}
+        for state in level.values():
+            game = game_class.from_state(state)
+            for move in game.possible_moves():
+                game.make_move(move)
+                game.switch_player()
+                if not game.is_over():
+                    key = game.canonical_ttentry()[0]
+                    if key not in positions and key not in next_level:
+                        next_level[key] = game.get_state()
+                game.switch_player()
+                game.unmake_move(move)
+        positions.update(next_level)
+        level = next_level
+    return positions
+
+
+def generate_book(game_class, algo_factory, plies, path=BOOK_FILE):
+    """
+    Searches every position of the first plies and saves best moves as the opening book.
+
+    Parameters
+    ----------
+    game_class : type
+        game class, e.g. Pentago
+    algo_factory : function
+        creates the search algorithm, it has to set depth and value attributes like PVSearch
+    plies : int
+        positions after 0 to plies - 1 moves are searched
+    path : str
+        written as it is - np.save would add .npy to other names, which OpeningBook would then not find
+
+    Returns
+    -------
+    entries : 1D np.array[BOOK_DTYPE]
+    """
+    positions = book_positions(game_class, plies)
+    entries = np.zeros(len(positions), dtype=BOOK_DTYPE)
+    start = time.perf_counter()
+    for i, (key, state) in enumerate(sorted(positions.items())):
+        game = game_class.from_state(state)
+        algo = algo_factory()
+        move = algo(game)
+        _, symmetry = game.canonical_ttentry()
+        entries[i] = (key, game.transform_move(move, symmetry), algo.value, algo.depth)
+        print("%d/%d %s value %d depth %d (%.0f s)"
+              % (i + 1, len(positions), move, algo.value, algo.depth, time.perf_counter() - start))
+    with open(path, "wb") as file:
+        np.save(file, entries)
+    return entries
+
+
+def main():
+    """
+    Generates the opening book.
+
+    Returns
+    -------
+    None
+    """
+    from pentago import Pentago
+    from search import PVSearch
+    from transposition import BoundedTT
+
+    parser = argparse.ArgumentParser(description="Generates Pentago opening book.")
+    parser.add_argument("--plies", type=int, default=3, help="positions after 0 to plies - 1 moves are searched")
+    parser.add_argument("--depth", type=int, default=4, help="maximum search depth per position")
+    parser.add_argument("--time", type=float, default=30, help="seconds per position")
+    parser.add_argument("--output", default=BOOK_FILE)
+    args = parser.parse_args()
+
+    generate_book(Pentago, lambda: PVSearch(max_depth=args.depth, time_limit=args.time,
+                                            tt=BoundedTT(megabytes=64, replacement='two-tier')),
+                  args.plies, args.output)
+
+
+if __name__ == "__main__":
+    main()
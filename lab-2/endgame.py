@@ -0,0 +1,287 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import time
+from bitboard import POSITION_WIN_MASKS, bit_positions, has_line
+from search import SearchTimeout, search_remaining
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+
+class EndgameSolver:
+    """
+    Class to represent exact endgame solver - win/loss/draw alpha-beta searching to the end of the game.
+
+    Values are only -1 (loss), 0 (draw) and 1 (win) for the player to move, so the search is much narrower than the
+    heuristic one, and every solved position stays solved - the solver has its own transposition table, kept between
+    moves, holding the lower and upper bound of every position. Player who can win by placing wins without searching.
+    Solving stops with SearchTimeout when the node or time cap is reached.
+
+    Attributes
+    ----------
+    max_nodes : int
+        node cap per solve, None for no cap
+    time_limit : float
+        seconds per solve, None for no limit
+    max_entries : int
+        transposition table is cleared when it holds that many positions
+    tt : dict
+        lower bound, upper bound and best move for the Zobrist hash of every solved position
+    nodes : int
+        number of positions visited during the last solve
+
+    Methods
+    -------
+    solve(game):
+        Finds the game theoretic value of the position and the move achieving it.
+    _solve(game, alpha, beta):
+        Win/loss/draw negamax with alpha-beta pruning and transposition table.
+    __order_moves(game, moves):
+        Puts the best move stored in the transposition table first.
+    _check_limits():
+        Stops the solver when the node or time cap is reached.
+    """
+
+    def __init__(self, max_nodes=1000000, time_limit=None, max_entries=2 ** 22):
+        """
+        Creates all attributes needed for the endgame solver.
+
+        Parameters
+        ----------
+        max_nodes : int
+            node cap per solve, None for no cap
+        time_limit : float
+            seconds per solve, None for no limit
+        max_entries : int
+        """
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.max_entries = max_entries
+        self.tt = {}
+        self.nodes = 0
+        self.__deadline = None
+
+    def solve(self, game):
+        """
+        Finds the game theoretic value of the position and the move achieving it. Root moves are searched twice with
+        null windows - first looking for a win, then for a draw - so every node only has to prove a bound.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        result : tuple
+            best move and its value - WIN, DRAW or LOSS for the player to move
+
+        Raises
+        ------
+        SearchTimeout
+            when the node or time cap is reached
+        """
+        self.nodes = 0
+        self.__deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        if len(self.tt) >= self.max_entries:
+            self.tt.clear()
+        moves = self.__order_moves(game, game.possible_moves())
+        for alpha, beta in ((DRAW, WIN), (LOSS, DRAW)):
+            for move in moves:
+                game.make_move(move)
+                game.switch_player()
+                try:
+                    value = -self._solve(game, -beta, -alpha)
+                finally:
+                    game.switch_player()
+                    game.unmake_move(move)
+                if value >= beta:
+                    return move, beta
+        return moves[0], LOSS
+
+    def _solve(self, game, alpha, beta):
+        """
+        Win/loss/draw negamax with alpha-beta pruning and transposition table.
+
+        Parameters
+        ----------
+        game : Pentago
+        alpha : int
+        beta : int
+
+        Returns
+        -------
+        value : int
+            WIN, DRAW or LOSS for the player to move, or a bound of it outside the window
+        """
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            self._check_limits()
+        if game.winners[game.nopponent - 1]:
+            return LOSS
+        mover, opponent = game.board.get_bitboards()
+        if game.nplayer == 2:
+            mover, opponent = opponent, mover
+        empty = game.board.empty
+        if not empty:
+            return DRAW
+        if game.winners[game.nplayer - 1]:
+            return WIN
+        for position in bit_positions(empty):
+            if has_line(mover | 1 << position, POSITION_WIN_MASKS[position]):
+                return WIN
+        key = game.ttentry()
+        entry = self.tt.get(key)
+        tt_move = None
+        if entry is not None:
+            lower, upper, tt_move = entry
+            if lower >= beta or lower == upper:
+                return lower
+            if upper <= alpha:
+                return upper
+            alpha = max(alpha, lower)
+            beta = min(beta, upper)
+        alpha_orig = alpha
+        moves = game.possible_moves()
+        if tt_move is not None and tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        best_move, best_value = None, LOSS - 1
+        for move in moves:
+            game.make_move(move)
+            game.nplayer = 3 - game.nplayer
+            try:
+                value = -self._solve(game, -beta, -alpha)
+            finally:
+                game.nplayer = 3 - game.nplayer
+                game.unmake_move(move)
+            if value > best_value:
+                best_move, best_value = move, value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        lower, upper = (entry[0], entry[1]) if entry is not None else (LOSS, WIN)
+        if best_value <= alpha_orig:
+            upper = min(upper, best_value)
+        elif best_value >= beta:
+            lower = max(lower, best_value)
+        else:
+            lower = upper = best_value
+        self.tt[key] = (lower, upper, best_move)
+        return best_value
+
+    def __order_moves(self, game, moves):
+        """
+        Puts the best move stored in the transposition table first.
+
+        Parameters
+        ----------
+        game : Pentago
+        moves : 1D array[Move]
+
+        Returns
+        -------
+        moves : 1D array[Move]
+        """
+        entry = self.tt.get(game.ttentry())
+        if entry is not None and entry[2] in moves:
+            moves.remove(entry[2])
+            moves.insert(0, entry[2])
+        return moves
+
+    def _check_limits(self):
+        """
+        Stops the solver when the node or time cap is reached.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        SearchTimeout
+        """
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            raise SearchTimeout()
+        if self.__deadline is not None and time.perf_counter() >= self.__deadline:
+            raise SearchTimeout()
+
+
+class EndgameSearch:
+    """
+    Class to represent AI algorithm switching to the exact endgame solver when few empty positions are left.
+
+    Can be used like easyAI algorithms: AI_Player(EndgameSearch(PVSearch(time_limit=3), empty_cells=8)). When the
+    solver proves a win or a draw, its move is played. When the position is lost anyway, or the solver reaches its
+    node or time cap, the move is searched by the heuristic algorithm - it still has a chance to trick the opponent.
+    Time spent by the solver is taken from the time limit of that search, so the move stays within the budget.
+
+    Attributes
+    ----------
+    algo : PVSearch/RootParallelSearch/MCTS
+        algorithm used before the endgame and when the solver gives up
+    solver : EndgameSolver
+    empty_cells : int
+        solver is used when at most that many positions are empty
+    result : int
+        value proven by the last solve, None when the position was not solved
+
+    Methods
+    -------
+    __call__(game):
+        Returns solved move or the move found by the algorithm.
+    """
+
+    # Part of the algorithm time limit given to the default solver, the rest is left for the algorithm when the
+    # solver gives up.
+    SOLVER_TIME_SHARE = 0.5
+    # Seconds per solve of the default solver when the algorithm has no time limit.
+    SOLVER_TIME_LIMIT = 1.0
+
+    def __init__(self, algo, empty_cells=8, solver=None):
+        """
+        Creates all attributes needed for the endgame AI.
+
+        Parameters
+        ----------
+        algo : PVSearch/RootParallelSearch/MCTS
+        empty_cells : int
+        solver : EndgameSolver
+            when not provided, solver with the default node cap and SOLVER_TIME_SHARE of the algorithm time limit
+            (SOLVER_TIME_LIMIT when it has none)
+        """
+        self.algo = algo
+        self.empty_cells = empty_cells
+        if solver is None:
+            time_limit = getattr(algo, 'time_limit', None)
+            solver = EndgameSolver(time_limit=self.SOLVER_TIME_LIMIT if time_limit is None
+                                   else time_limit * self.SOLVER_TIME_SHARE)
+        self.solver = solver
+        self.result = None
+
+    def __call__(self, game):
+        """
+        Returns solved move or the move found by the algorithm.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        self.result = None
+        if game.board.get_empty_count() <= self.empty_cells:
+            start = time.perf_counter()
+            try:
+                move, self.result = self.solver.solve(game)
+            except SearchTimeout:
+                move = None
+            if move is not None and self.result != LOSS:
+                return move
+            return search_remaining(self.algo, game, time.perf_counter() - start)
+        return self.algo(game)
@@ -0,0 +1,129 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+from bitboard import QUADRANTS_COUNT, QUADRANT_POSITIONS_COUNT, QUADRANT_PATTERNS_COUNT, POSITIONS_COUNT, \
+    QUADRANT_MASKS, ROTATION_TABLES, WIN_MASKS
+
+LINES_COUNT = len(WIN_MASKS)
+LINE_LENGTH = 5
+# Line state is a single integer - player 1 stones count * LINE_STATE_BASE + player 2 stones count, so placing
+# a stone changes it by adding LINE_STEPS[player].
+LINE_STATE_BASE = LINE_LENGTH + 1
+LINE_STEPS = (None, LINE_STATE_BASE, 1)
+# LINE_WEIGHTS[count] - potential of a line holding count stones of one player and none of the other. Full lines
+# end the game, so they are scored by the game instead.
+LINE_WEIGHTS = (0, 0, 1, 3, 9, 0)
+# FOUR_STATES[player] - state of the line holding 4 stones of the player and none of the other, placing a stone on its
+# empty position wins.
+FOUR_STATES = (None, (LINE_LENGTH - 1) * LINE_STEPS[1], (LINE_LENGTH - 1) * LINE_STEPS[2])
+# Potential is clipped to this value, so it is never mistaken for a won or lost game by the search.
+MAX_POTENTIAL = 40
+
+
+def line_score(state):
+    """
+    Returns potential of the line for player 1 - positive when only player 1 holds stones on it, negative when only
+    player 2 does, zero when the line is blocked for both players.
+
+    Parameters
+    ----------
+    state : int
+        player 1 stones count * LINE_STATE_BASE + player 2 stones count
+
+    Returns
+    -------
+    score : int
+    """
+    count1, count2 = divmod(state, LINE_STATE_BASE)
+    if count2 == 0:
+        return LINE_WEIGHTS[count1]
+    if count1 == 0:
+        return -LINE_WEIGHTS[count2]
+    return 0
+
+
+# LINE_SCORES[state] - line potential for player 1.
+LINE_SCORES = [line_score(state) for state in range(LINE_STATE_BASE * LINE_STATE_BASE)]
+# POSITION_LINES[i] - indexes of the lines going through position index i.
+POSITION_LINES = [[line for line, mask in enumerate(WIN_MASKS) if mask >> i & 1] for i in range(POSITIONS_COUNT)]
+# QUADRANT_LINES[q] - indexes of the lines touching quadrant q.
+QUADRANT_LINES = [[line for line, mask in enumerate(WIN_MASKS) if mask & quadrant_mask]
+                  for quadrant_mask in QUADRANT_MASKS]
+# QUADRANT_LINE_COUNTS[q][pattern][k] - stones of the 9 bit pattern of quadrant q lying on line QUADRANT_LINES[q][k].
+QUADRANT_LINE_COUNTS = [[tuple(bin(pattern << (quadrant * QUADRANT_POSITIONS_COUNT) & WIN_MASKS[line]).count("1")
+                               for line in QUADRANT_LINES[quadrant])
+                         for pattern in range(QUADRANT_PATTERNS_COUNT)]
+                        for quadrant in range(QUADRANTS_COUNT)]
+
+
+def rotation_line_changes(quadrant, pattern, rotated, step):
+    """
+    Returns line state changes caused by rotating the player pattern of the quadrant - only the lines on which the
+    number of player stones changes.
+
+    Parameters
+    ----------
+    quadrant : int
+        values from 0
+    pattern : int
+        9 bit player pattern of the quadrant before the rotation
+    rotated : int
+        9 bit player pattern of the quadrant after the rotation
+    step : int
+        one of the LINE_STEPS values
+
+    Returns
+    -------
+    changes : tuple(tuple(int))
+        line index and line state difference pairs
+    """
+    counts = QUADRANT_LINE_COUNTS[quadrant]
+    return tuple((line, (new - old) * step)
+                 for line, old, new in zip(QUADRANT_LINES[quadrant], counts[pattern], counts[rotated]) if old != new)
+
+
+# ROTATION_LINE_CHANGES[player - 1][direction][q][pattern] - line state changes after rotating quadrant q holding
+# the player pattern, so a rotation visits only the lines it really changes.
+ROTATION_LINE_CHANGES = [{direction: [[rotation_line_changes(quadrant, pattern, table[pattern], step)
+                                       for pattern in range(QUADRANT_PATTERNS_COUNT)]
+                                      for quadrant in range(QUADRANTS_COUNT)]
+                          for direction, table in ROTATION_TABLES.items()}
+                         for step in LINE_STEPS[1:]]
+
+
+def line_states(bitboard1, bitboard2):
+    """
+    Calculates states of all lines from scratch.
+
+    Parameters
+    ----------
+    bitboard1 : int
+        player 1 bitboard
+    bitboard2 : int
+        player 2 bitboard
+
+    Returns
+    -------
+    states : 1D array[int]
+    """
+    return [bin(bitboard1 & mask).count("1") * LINE_STATE_BASE + bin(bitboard2 & mask).count("1")
+            for mask in WIN_MASKS]
+
+
+def line_potential(bitboard1, bitboard2):
+    """
+    Calculates potential of the position for player 1 from scratch - sum of the line potentials.
+
+    Parameters
+    ----------
+    bitboard1 : int
+        player 1 bitboard
+    bitboard2 : int
+        player 2 bitboard
+
+    Returns
+    -------
+    potential : int
+    """
+    return sum(LINE_SCORES[state] for state in line_states(bitboard1, bitboard2))
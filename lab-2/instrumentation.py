@@ -0,0 +1,373 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import json
+import time
+import weakref
+
+
+class SearchStats:
+    """
+    Class to represent counters collected by the instrumentation during one or more searches.
+
+    Attributes
+    ----------
+    make_moves : int
+        number of make_move calls and leaves scored together by the leaf evaluator - searched nodes
+    unmake_moves : int
+    scorings : int
+        number of evaluated positions
+    move_generations : int
+        number of possible_moves calls - expanded nodes
+    generated_moves : int
+        number of moves returned by possible_moves
+    tt_probes : int
+    tt_hits : int
+    tt_stores : int
+    cutoffs : int
+        number of beta cutoffs, only for the search algorithms from the search module
+    iterations : 1D array[dict]
+        depth, nodes, seconds and whether it was finished, for every iterative deepening iteration
+    seconds : float
+        time spent in the instrumented searches
+
+    Methods
+    -------
+    reset():
+        Sets all counters to zero.
+    cutoff_rate():
+        Returns part of the expanded nodes which ended with a beta cutoff.
+    tt_hit_rate():
+        Returns part of the transposition table probes which found the position.
+    branching_factor():
+        Returns average number of generated moves per expanded node.
+    effective_branching_factor():
+        Returns nodes growth between the last two finished iterations.
+    nodes_per_second():
+        Returns searched nodes per second.
+    to_dict():
+        Returns counters and derived statistics as a dict, ready for JSON.
+    """
+
+    def __init__(self):
+        """
+        Creates all counters.
+        """
+        self.reset()
+
+    def reset(self):
+        """
+        Sets all counters to zero.
+
+        Returns
+        -------
+        None
+        """
+        self.make_moves = 0
+        self.unmake_moves = 0
+        self.scorings = 0
+        self.move_generations = 0
+        self.generated_moves = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_stores = 0
+        self.cutoffs = 0
+        self.iterations = []
+        self.seconds = 0.0
+
+    def cutoff_rate(self):
+        """
+        Returns part of the expanded nodes which ended with a beta cutoff.
+
+        Returns
+        -------
+        cutoff_rate : float
+        """
+        return self.cutoffs / self.move_generations if self.move_generations else 0.0
+
+    def tt_hit_rate(self):
+        """
+        Returns part of the transposition table probes which found the position.
+
+        Returns
+        -------
+        tt_hit_rate : float
+        """
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    def branching_factor(self):
+        """
+        Returns average number of generated moves per expanded node.
+
+        Returns
+        -------
+        branching_factor : float
+        """
+        return self.generated_moves / self.move_generations if self.move_generations else 0.0
+
+    def effective_branching_factor(self):
+        """
+        Returns nodes growth between the last two finished iterations - how many times more nodes one more ply
+        costs. Much lower than branching_factor() means that move ordering and pruning work well.
+
+        Returns
+        -------
+        effective_branching_factor : float
+            None when less than two iterations were finished
+        """
+        finished = [iteration for iteration in self.iterations if iteration['finished']]
+        if len(finished) < 2 or finished[-2]['nodes'] == 0:
+            return None
+        return finished[-1]['nodes'] / finished[-2]['nodes']
+
+    def nodes_per_second(self):
+        """
+        Returns searched nodes per second.
+
+        Returns
+        -------
+        nodes_per_second : float
+        """
+        return self.make_moves / self.seconds if self.seconds else 0.0
+
+    def to_dict(self):
+        """
+        Returns counters and derived statistics as a dict, ready for JSON.
+
+        Returns
+        -------
+        stats : dict
+        """
+        return {
+            'nodes': self.make_moves,
+            'unmake_moves': self.unmake_moves,
+            'scorings': self.scorings,
+            'move_generations': self.move_generations,
+            'generated_moves': self.generated_moves,
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'tt_stores': self.tt_stores,
+            'cutoffs': self.cutoffs,
+            'seconds': self.seconds,
+            'nodes_per_second': self.nodes_per_second(),
+            'cutoff_rate': self.cutoff_rate(),
+            'tt_hit_rate': self.tt_hit_rate(),
+            'branching_factor': self.branching_factor(),
+            'effective_branching_factor': self.effective_branching_factor(),
+            'iterations': list(self.iterations),
+        }
+
+
+def instrument_game(game, stats):
+    """
+    Replaces make_move, unmake_move, scoring and possible_moves of the game instance with counting wrappers - the
+    class is not changed, so games which are not instrumented do not pay anything.
+
+    Parameters
+    ----------
+    game : Pentago
+    stats : SearchStats
+
+    Returns
+    -------
+    None
+    """
+    make_move, unmake_move, scoring, possible_moves = \
+        game.make_move, game.unmake_move, game.scoring, game.possible_moves
+
+    def counted_make_move(move):
+        stats.make_moves += 1
+        make_move(move)
+
+    def counted_unmake_move(move):
+        stats.unmake_moves += 1
+        unmake_move(move)
+
+    def counted_scoring():
+        stats.scorings += 1
+        return scoring()
+
+    def counted_possible_moves():
+        moves = possible_moves()
+        stats.move_generations += 1
+        stats.generated_moves += len(moves)
+        return moves
+
+    game.make_move = counted_make_move
+    game.unmake_move = counted_unmake_move
+    game.scoring = counted_scoring
+    game.possible_moves = counted_possible_moves
+
+
+def instrument_tt(tt, stats):
+    """
+    Replaces lookup and store of the transposition table instance with counting wrappers.
+
+    Parameters
+    ----------
+    tt : BoundedTT/TT/SymmetricTT
+    stats : SearchStats
+
+    Returns
+    -------
+    None
+    """
+    lookup, store = tt.lookup, tt.store
+
+    def counted_lookup(game):
+        entry = lookup(game)
+        stats.tt_probes += 1
+        if entry is not None:
+            stats.tt_hits += 1
+        return entry
+
+    def counted_store(**data):
+        stats.tt_stores += 1
+        store(**data)
+
+    tt.lookup = counted_lookup
+    tt.store = counted_store
+
+
+def instrument_leaves(leaves, stats):
+    """
+    Replaces evaluate of the LeafEvaluator instance with a wrapper counting its leaves as searched nodes and
+    evaluations - they are scored without make_move, so the game wrappers do not see them.
+
+    Parameters
+    ----------
+    leaves : LeafEvaluator
+    stats : SearchStats
+
+    Returns
+    -------
+    None
+    """
+    evaluate = leaves.evaluate
+
+    def counted_evaluate(game, moves, ply, threats=None):
+        stats.make_moves += len(moves)
+        stats.scorings += len(moves)
+        return evaluate(game, moves, ply, threats)
+
+    leaves.evaluate = counted_evaluate
+
+
+def instrument_search(algo, stats):
+    """
+    Replaces cutoff and iteration methods of the IterativeDeepening/PVSearch instance with wrappers counting cutoffs
+    and timing every iteration. Other algorithms are left unchanged.
+
+    Parameters
+    ----------
+    algo : IterativeDeepening/PVSearch
+    stats : SearchStats
+
+    Returns
+    -------
+    None
+    """
+    if hasattr(algo, '_update_cutoff'):
+        update_cutoff = algo._update_cutoff
+
+        def counted_update_cutoff(move, depth, ply):
+            stats.cutoffs += 1
+            update_cutoff(move, depth, ply)
+
+        algo._update_cutoff = counted_update_cutoff
+    if hasattr(algo, '_search_iteration'):
+        search_iteration = algo._search_iteration
+
+        def timed_search_iteration(game, depth, moves):
+            nodes = stats.make_moves
+            start = time.perf_counter()
+            iteration = {'depth': depth, 'nodes': 0, 'seconds': 0.0, 'finished': False}
+            stats.iterations.append(iteration)
+            try:
+                result = search_iteration(game, depth, moves)
+                iteration['finished'] = True
+                return result
+            finally:
+                iteration['nodes'] = stats.make_moves - nodes
+                iteration['seconds'] = time.perf_counter() - start
+
+        algo._search_iteration = timed_search_iteration
+
+
+class InstrumentedAI:
+    """
+    Class to represent opt-in instrumentation of the AI algorithm - counts nodes, evaluations, generated moves,
+    transposition table probes, cutoffs and times every iteration of every move.
+
+    Can be used like easyAI algorithms: AI_Player(InstrumentedAI(PVSearch(time_limit=3), log="stats.jsonl")).
+    Counting wrappers are put on the game, transposition table and algorithm instances only, so when the AI is not
+    wrapped nothing is slowed down. Algorithms wrapping another one (BookSearch, EndgameSearch) are instrumented
+    together with the wrapped algorithm. Instrumented games are only weakly referenced, so games which are over are
+    freed.
+
+    Attributes
+    ----------
+    algo : PVSearch/IterativeDeepening/Negamax/MCTS/BookSearch/EndgameSearch
+    stats : SearchStats
+        counters of the last move
+    moves : 1D array[dict]
+        statistics of every move, see SearchStats.to_dict
+    log : str
+        JSON lines file to which statistics of every move are appended, might be None
+
+    Methods
+    -------
+    __call__(game):
+        Searches the move and collects its statistics.
+    """
+
+    def __init__(self, algo, log=None):
+        """
+        Creates all attributes needed for the instrumented AI and puts wrappers on the algorithm.
+
+        Parameters
+        ----------
+        algo : PVSearch/IterativeDeepening/Negamax/MCTS/BookSearch/EndgameSearch
+        log : str
+        """
+        self.algo = algo
+        self.stats = SearchStats()
+        self.moves = []
+        self.log = log
+        self.__games = weakref.WeakSet()
+        inner = algo
+        while inner is not None:
+            instrument_search(inner, self.stats)
+            tt = getattr(inner, 'tt', None)
+            if tt is not None and not isinstance(tt, dict):
+                instrument_tt(tt, self.stats)
+            if getattr(inner, 'leaves', None) is not None:
+                instrument_leaves(inner.leaves, self.stats)
+            inner = getattr(inner, 'algo', None)
+
+    def __call__(self, game):
+        """
+        Searches the move and collects its statistics.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        if game not in self.__games:
+            instrument_game(game, self.stats)
+            self.__games.add(game)
+        self.stats.reset()
+        start = time.perf_counter()
+        move = self.algo(game)
+        self.stats.seconds = time.perf_counter() - start
+        record = dict(self.stats.to_dict(), move=str(move))
+        self.moves.append(record)
+        if self.log is not None:
+            with open(self.log, "a") as file:
+                file.write(json.dumps(record) + "\n")
+        return move
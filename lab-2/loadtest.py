@@ -0,0 +1,147 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import numpy as np
+from pentago import Pentago
+from server import DEFAULT_PORT
+
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+async def request(reader, writer, message):
+    """
+    Sends the request to the server and waits for the response.
+
+    Parameters
+    ----------
+    reader : asyncio.StreamReader
+    writer : asyncio.StreamWriter
+    message : dict
+
+    Returns
+    -------
+    response : dict
+
+    Raises
+    ------
+    RuntimeError
+        when the server answers with an error
+    """
+    writer.write((json.dumps(message) + "\n").encode())
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    if 'error' in response:
+        raise RuntimeError(response['error'])
+    return response
+
+
+async def play_games(host, port, games, seed, latencies, results):
+    """
+    Plays games one after another on one connection - random legal moves against the server AI, which moves first
+    in every second game. Every game is replayed locally, so the states sent by the server are checked.
+
+    Parameters
+    ----------
+    host : str
+    port : int
+    games : int
+        number of games to play
+    seed : int
+    latencies : 1D array[float]
+        seconds from sending every move to receiving the answer are appended
+    results : 1D array[str]
+        result of every game is appended - 'ai', 'client' or 'draw'
+
+    Returns
+    -------
+    None
+    """
+    generator = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for number in range(games):
+            game = Pentago([None, None])
+            ai_player = 1 if number % 2 == 1 else 2
+            response = await request(reader, writer, {'command': 'new', 'ai_first': ai_player == 1})
+            game_id = response['game']
+            if response['ai_move'] is not None:
+                game.play_move(game.parse_move(response['ai_move']))
+            while not response['over']:
+                move = generator.choice(game.legal_moves())
+                start = time.perf_counter()
+                response = await request(reader, writer, {'command': 'move', 'game': game_id, 'move': str(move)})
+                latencies.append(time.perf_counter() - start)
+                game.play_move(move)
+                if response['ai_move'] is not None:
+                    game.play_move(game.parse_move(response['ai_move']))
+                if list(game.get_state()) != response['state']:
+                    raise RuntimeError("Game %d state differs from the server state" % game_id)
+            winner = response['winner']
+            results.append('draw' if winner == 0 else 'ai' if winner == ai_player else 'client')
+            await request(reader, writer, {'command': 'close', 'game': game_id})
+    finally:
+        writer.close()
+
+
+async def run(host, port, clients, games, seed):
+    """
+    Plays the games on many connections at once.
+
+    Parameters
+    ----------
+    host : str
+    port : int
+    clients : int
+        number of connections
+    games : int
+        number of games per connection
+    seed : int
+
+    Returns
+    -------
+    result : tuple
+        move latencies, game results and seconds
+    """
+    latencies = []
+    results = []
+    start = time.perf_counter()
+    await asyncio.gather(*(play_games(host, port, games, seed + client, latencies, results)
+                           for client in range(clients)))
+    return latencies, results, time.perf_counter() - start
+
+
+def main():
+    """
+    Runs the load test and prints games per second and move latency.
+
+    Returns
+    -------
+    None
+    """
+    parser = argparse.ArgumentParser(description="Load test of the Pentago game server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--clients", type=int, default=16, help="connections playing at once")
+    parser.add_argument("--games", type=int, default=2, help="games per connection")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    latencies, results, seconds = asyncio.run(run(args.host, args.port, args.clients, args.games, args.seed))
+    latencies = np.array(latencies)
+    print("%d games, %d moves in %.2f s: %.2f games/s, %.1f moves/s"
+          % (len(results), latencies.size, seconds, len(results) / seconds, latencies.size / seconds))
+    print("AI wins %d, client wins %d, draws %d"
+          % (results.count('ai'), results.count('client'), results.count('draw')))
+    print("Move latency: mean %.3f s, %s, max %.3f s"
+          % (latencies.mean(), ", ".join("p%d %.3f s" % (p, np.percentile(latencies, p)) for p in LATENCY_PERCENTILES),
+             latencies.max()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import math
+import os
+import random
+import time
+from multiprocessing import Pool
+import numpy as np
+from bitboard import QUADRANTS_COUNT, QUADRANT_POSITIONS_COUNT, QUADRANT_MASK, POSITIONS_COUNT, FULL_BOARD, \
+    ROTATION_TABLES, WIN_MASKS
+from move import MOVE_DIRECTIONS
+
+# NumPy versions of the bitboard tables - every operand is uint64, so shifts do not mix signed and unsigned types.
+ONE = np.uint64(1)
+POSITION_SHIFTS = np.arange(POSITIONS_COUNT, dtype=np.uint64)
+WIN_MASKS_ARRAY = np.array(WIN_MASKS, dtype=np.uint64)
+FULL_BOARD_ARRAY = np.uint64(FULL_BOARD)
+QUADRANT_MASK_ARRAY = np.uint64(QUADRANT_MASK)
+# ROTATION_TABLES_ARRAY[d][pattern] - rotated 9 bit pattern for the move direction bit d.
+ROTATION_TABLES_ARRAY = np.array([ROTATION_TABLES[direction] for direction in MOVE_DIRECTIONS], dtype=np.uint64)
+
+DRAW = 0
+
+
+def has_lines(bitboards):
+    """
+    Checks which bitboards fully cover any of the win lines.
+
+    Parameters
+    ----------
+    bitboards : 1D np.array[uint64]
+
+    Returns
+    -------
+    has_lines : 1D np.array[bool]
+    """
+    return ((bitboards[:, None] & WIN_MASKS_ARRAY) == WIN_MASKS_ARRAY).any(axis=1)
+
+
+def batch_playouts(bitboard1, bitboard2, nplayer, count, generator):
+    """
+    Plays count random games from the position at once - every step makes one random legal move in all games which
+    are not over yet, using NumPy arrays of bitboards. Game rules are the same as in Pentago: game ends when the
+    player making the move has a winning combination (after placing or after rotating) or the board is full.
+
+    Parameters
+    ----------
+    bitboard1 : int
+        player 1 bitboard
+    bitboard2 : int
+        player 2 bitboard
+    nplayer : int
+        player to move
+    count : int
+        number of games
+    generator : np.random.Generator
+
+    Returns
+    -------
+    winners : 1D np.array[int8]
+        winning player of every game, DRAW (0) for a draw
+    """
+    boards = np.empty((2, count), dtype=np.uint64)
+    boards[0] = bitboard1
+    boards[1] = bitboard2
+    players = np.full(count, nplayer - 1, dtype=np.intp)
+    winners = np.full(count, DRAW, dtype=np.int8)
+    active = np.arange(count)
+    while active.size:
+        movers = players[active]
+        mover = boards[movers, active]
+        opponent = boards[1 - movers, active]
+        occupied = (mover | opponent)[:, None] >> POSITION_SHIFTS & ONE
+        keys = generator.random((active.size, POSITIONS_COUNT))
+        keys[occupied.astype(bool)] = -1.0
+        mover |= ONE << keys.argmax(axis=1).astype(np.uint64)
+        rotating = ~has_lines(mover)
+        shifts = generator.integers(0, QUADRANTS_COUNT, active.size).astype(np.uint64) \
+            * np.uint64(QUADRANT_POSITIONS_COUNT)
+        directions = generator.integers(0, len(MOVE_DIRECTIONS), active.size)
+        keep = ~(QUADRANT_MASK_ARRAY << shifts)
+        for bitboards in (mover, opponent):
+            patterns = (bitboards >> shifts & QUADRANT_MASK_ARRAY).astype(np.intp)
+            rotated = bitboards & keep | ROTATION_TABLES_ARRAY[directions, patterns] << shifts
+            bitboards[rotating] = rotated[rotating]
+        won = has_lines(mover)
+        boards[movers, active] = mover
+        boards[1 - movers, active] = opponent
+        winners[active[won]] = movers[won] + 1
+        players[active] = 1 - movers
+        active = active[~(won | ((mover | opponent) == FULL_BOARD_ARRAY))]
+    return winners
+
+
+class MCTSNode:
+    """
+    Class to represent node of the Monte Carlo search tree.
+
+    Attributes
+    ----------
+    move : Move
+        move leading to the node, None for the root
+    parent : MCTSNode
+    player : int
+        player who made the move leading to the node - scores are counted for this player
+    children : 1D array[MCTSNode]
+    untried : 1D array[Move]
+        moves which do not have a child yet, in random order
+    visits : int
+        number of playouts which went through the node
+    score : float
+        number of playouts won by the player, draws count as half
+
+    Methods
+    -------
+    select(exploration):
+        Returns the child with the best UCT value.
+    update(winners):
+        Adds playout results to the node statistics.
+    """
+
+    def __init__(self, move, parent, player, untried):
+        """
+        Creates all attributes needed for the tree node.
+
+        Parameters
+        ----------
+        move : Move
+        parent : MCTSNode
+        player : int
+        untried : 1D array[Move]
+        """
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.score = 0.0
+
+    def select(self, exploration):
+        """
+        Returns the child with the best UCT value - average score plus exploration bonus of rarely visited children.
+
+        Parameters
+        ----------
+        exploration : float
+            UCT exploration constant
+
+        Returns
+        -------
+        child : MCTSNode
+        """
+        log_visits = math.log(self.visits)
+        return max(self.children,
+                   key=lambda child: child.score / child.visits + exploration * math.sqrt(log_visits / child.visits))
+
+    def update(self, winners):
+        """
+        Adds playout results to the node statistics.
+
+        Parameters
+        ----------
+        winners : 1D np.array[int8]
+            winning player of every playout, DRAW for a draw
+
+        Returns
+        -------
+        None
+        """
+        self.visits += winners.size
+        self.score += np.count_nonzero(winners == self.player) + 0.5 * np.count_nonzero(winners == DRAW)
+
+
+def search_tree(game_class, state, playouts, time_limit, batch_size, exploration, seed):
+    """
+    Builds the search tree in the worker process and returns root children statistics.
+
+    Parameters
+    ----------
+    game_class : type
+        game class providing from_state, e.g. Pentago
+    state : tuple(int)
+        compact root position, see Pentago.get_state
+    playouts : int
+    time_limit : float
+    batch_size : int
+    exploration : float
+    seed : int
+
+    Returns
+    -------
+    statistics : dict
+        visits and score of every root move
+    """
+    algo = MCTS(playouts=playouts, time_limit=time_limit, batch_size=batch_size, exploration=exploration, seed=seed)
+    root = algo.build_tree(game_class.from_state(state))
+    return {child.move: (child.visits, child.score) for child in root.children}
+
+
+class MCTS:
+    """
+    Class to represent Monte Carlo Tree Search AI (UCT) - instead of searching every move to a fixed depth, the tree
+    grows towards the moves which win most random games (playouts), so the high Pentago branching factor matters much
+    less.
+
+    Can be used like easyAI algorithms: AI_Player(MCTS(time_limit=3)). Every leaf added to the tree is scored with
+    batch_size random games played at once on NumPy bitboard arrays (see batch_playouts). With more than one worker
+    every process grows its own tree from the same position and root move statistics are summed (root parallelism).
+
+    Attributes
+    ----------
+    playouts : int
+        number of playouts per move, None plays until the time runs out
+    time_limit : float
+        seconds per move, None plays all the playouts
+    batch_size : int
+        number of playouts played at once from every new leaf
+    exploration : float
+        UCT exploration constant
+    workers : int
+        number of processes growing the trees
+    seed : int
+        random seed, None for a random one
+    total_playouts : int
+        number of playouts played during the last search
+    value : float
+        average score of the chosen move, from 0 (lost) to 1 (won)
+
+    Methods
+    -------
+    __call__(game):
+        Returns the most visited root move.
+    search(game):
+        Searches the game position and returns the most visited root move.
+    build_tree(game):
+        Grows the search tree from the game position in the current process.
+    close():
+        Stops the worker processes.
+    __deepcopy__(memo):
+        Returns the AI itself.
+    __iterate(game, root):
+        Selects a leaf, expands it and scores it with the batch of playouts.
+    """
+
+    def __init__(self, playouts=None, time_limit=1.0, batch_size=32, exploration=math.sqrt(2), workers=1, seed=None):
+        """
+        Creates all attributes needed for the Monte Carlo Tree Search AI.
+
+        Parameters
+        ----------
+        playouts : int
+            number of playouts per move, None plays until the time runs out
+        time_limit : float
+            seconds per move, None plays all the playouts
+        batch_size : int
+        exploration : float
+        workers : int
+            number of processes growing the trees, None for the number of CPUs
+        seed : int
+        """
+        if playouts is None and time_limit is None:
+            raise ValueError("MCTS needs a playouts or time budget")
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.exploration = exploration
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.total_playouts = 0
+        self.value = 0.0
+        self.__random = random.Random(seed)
+        self.__generator = np.random.default_rng(seed)
+        self.__pool = None
+
+    def __call__(self, game):
+        """
+        Returns the most visited root move.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        return self.search(game)
+
+    def search(self, game):
+        """
+        Searches the game position and returns the most visited root move.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        if self.workers == 1:
+            statistics = {child.move: (child.visits, child.score) for child in self.build_tree(game).children}
+        else:
+            if self.__pool is None:
+                self.__pool = Pool(self.workers)
+            playouts = None if self.playouts is None else -(-self.playouts // self.workers)
+            tasks = [(type(game), game.get_state(), playouts, self.time_limit, self.batch_size, self.exploration,
+                      self.__random.getrandbits(32)) for _ in range(self.workers)]
+            statistics = {}
+            for worker_statistics in self.__pool.starmap(search_tree, tasks):
+                for move, (visits, score) in worker_statistics.items():
+                    total_visits, total_score = statistics.get(move, (0, 0.0))
+                    statistics[move] = (total_visits + visits, total_score + score)
+        self.total_playouts = sum(visits for visits, _ in statistics.values())
+        move = max(statistics, key=lambda m: statistics[m][0])
+        visits, score = statistics[move]
+        self.value = score / visits
+        return move
+
+    def build_tree(self, game):
+        """
+        Grows the search tree from the game position in the current process until the playouts or time budget is
+        used up. Game is left in the same position.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        root : MCTSNode
+        """
+        deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        moves = game.possible_moves()
+        self.__random.shuffle(moves)
+        root = MCTSNode(None, None, game.nopponent, moves)
+        while True:
+            self.__iterate(game, root)
+            if self.playouts is not None and root.visits >= self.playouts:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        return root
+
+    def __iterate(self, game, root):
+        """
+        Selects a leaf by UCT, expands it with one untried move and scores it with the batch of playouts - or with
+        the game result when the game is over. Results are added to every node on the path.
+
+        Parameters
+        ----------
+        game : Pentago
+        root : MCTSNode
+
+        Returns
+        -------
+        None
+        """
+        node = root
+        path = []
+        while not node.untried and node.children:
+            node = node.select(self.exploration)
+            game.make_move(node.move)
+            game.switch_player()
+            path.append(node.move)
+        over = game.is_over()
+        if node.untried and not over:
+            move = node.untried.pop()
+            player = game.nplayer
+            game.make_move(move)
+            game.switch_player()
+            path.append(move)
+            over = game.is_over()
+            moves = [] if over else game.possible_moves()
+            self.__random.shuffle(moves)
+            child = MCTSNode(move, node, player, moves)
+            node.children.append(child)
+            node = child
+        if over:
+            winner = game.nopponent if game.winners[game.nopponent - 1] else DRAW
+            winners = np.full(self.batch_size, winner, dtype=np.int8)
+        else:
+            winners = batch_playouts(*game.get_state(), self.batch_size, self.__generator)
+        while node is not None:
+            node.update(winners)
+            node = node.parent
+        for move in reversed(path):
+            game.switch_player()
+            game.unmake_move(move)
+
+    def close(self):
+        """
+        Stops the worker processes.
+
+        Returns
+        -------
+        None
+        """
+        if self.__pool is not None:
+            self.__pool.terminate()
+            self.__pool.join()
+            self.__pool = None
+
+    def __deepcopy__(self, memo):
+        """
+        Returns the AI itself - it holds the pool of worker processes, which can not be copied, so copies of the game
+        (easyAI keeps them as the game history) share it.
+
+        Parameters
+        ----------
+        memo : dict
+
+        Returns
+        -------
+        algo : MCTS
+        """
+        return self
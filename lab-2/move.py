@@ -0,0 +1,128 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+from direction import Direction
+from bitboard import QUADRANTS_COUNT, POSITIONS_COUNT
+from symmetry import SYMMETRIES_COUNT, SYMMETRY_POSITIONS, SYMMETRY_QUADRANTS, SYMMETRY_REFLECTS
+
+# Direction bit of the encoded move.
+MOVE_DIRECTIONS = (Direction.ANTICLOCKWISE, Direction.CLOCKWISE)
+MOVES_PER_POSITION = QUADRANTS_COUNT * len(MOVE_DIRECTIONS)
+MOVES_COUNT = POSITIONS_COUNT * MOVES_PER_POSITION
+
+
+class Move(int):
+    """
+    Class to represent a move encoded as a single integer: position index * 8 + quadrant index * 2 + direction bit
+    (0 - left, 1 - right). Search code decodes it with bit operations, while str() gives the human format
+    e.g. '14 1 r', so easyAI Human_Player and game output work without changes.
+
+    Methods
+    -------
+    encode(position, quadrant, direction):
+        Returns move for the position index, quadrant index and direction.
+    position():
+        Returns position index, values from 0.
+    quadrant():
+        Returns quadrant index, values from 0.
+    direction():
+        Returns rotation direction.
+    """
+
+    @staticmethod
+    def encode(position, quadrant, direction):
+        """
+        Returns move for the position index, quadrant index and direction.
+
+        Parameters
+        ----------
+        position : int
+            values from 0
+        quadrant : int
+            values from 0
+        direction : Direction
+
+        Returns
+        -------
+        move : Move
+        """
+        return MOVES[position * MOVES_PER_POSITION + quadrant * 2 + MOVE_DIRECTIONS.index(direction)]
+
+    def position(self):
+        """
+        Returns position index, values from 0.
+
+        Returns
+        -------
+        position : int
+        """
+        return self >> 3
+
+    def quadrant(self):
+        """
+        Returns quadrant index, values from 0.
+
+        Returns
+        -------
+        quadrant : int
+        """
+        return self >> 1 & 3
+
+    def direction(self):
+        """
+        Returns rotation direction.
+
+        Returns
+        -------
+        direction : Direction
+        """
+        return MOVE_DIRECTIONS[self & 1]
+
+    def __str__(self):
+        """
+        Returns move in the human format, e.g. '14 1 r' - position number, quadrant number and direction.
+
+        Returns
+        -------
+        move : str
+        """
+        return "%d %d %s" % (self.position() + 1, self.quadrant() + 1, self.direction().value)
+
+    __repr__ = __str__
+
+
+# All moves, MOVES[code] is the Move with that code - moves are never created during the search.
+MOVES = [Move(code) for code in range(MOVES_COUNT)]
+# SYMMETRY_MOVES[s][code] - move mapped onto the position transformed with symmetry s.
+SYMMETRY_MOVES = [[Move.encode(SYMMETRY_POSITIONS[s][move.position()], SYMMETRY_QUADRANTS[s][move.quadrant()],
+                               MOVE_DIRECTIONS[(move & 1) ^ SYMMETRY_REFLECTS[s]])
+                   for move in MOVES]
+                  for s in range(SYMMETRIES_COUNT)]
+
+
+def parse_move(text):
+    """
+    Converts move in the human format, e.g. '14 1 r', to the Move.
+
+    Parameters
+    ----------
+    text : str
+        position number (1-36), quadrant number (1-4) and direction ('l' or 'r') separated with spaces
+
+    Returns
+    -------
+    move : Move
+
+    Raises
+    ------
+    ValueError
+        when text is not a valid move
+    """
+    parts = text.split()
+    if len(parts) != 3:
+        raise ValueError("Move should look like '14 1 r', got: %r" % text)
+    position, quadrant, direction = int(parts[0]) - 1, int(parts[1]) - 1, Direction(parts[2])
+    if not 0 <= position < POSITIONS_COUNT or not 0 <= quadrant < QUADRANTS_COUNT:
+        raise ValueError("Move out of the board: %r" % text)
+    return Move.encode(position, quadrant, direction)
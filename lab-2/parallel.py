@@ -0,0 +1,258 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import os
+import time
+from multiprocessing import Pool
+from search import PVSearch, SearchTimeout, WIN_THRESHOLD, INFINITY
+from transposition import BoundedTT
+
+# Search of the worker process, created once by init_worker - keeps its transposition table between tasks.
+__worker_search = None
+
+
+def init_worker(max_depth, megabytes):
+    """
+    Creates the search used by the worker process.
+
+    Parameters
+    ----------
+    max_depth : int
+    megabytes : float
+        transposition table size of the worker
+
+    Returns
+    -------
+    None
+    """
+    global __worker_search
+    __worker_search = PVSearch(max_depth=max_depth, time_limit=None,
+                               tt=BoundedTT(megabytes=megabytes, replacement='two-tier'))
+
+
+def search_root_move(game_class, state, move, depth, alpha, beta, deadline):
+    """
+    Searches one root move in the worker process.
+
+    Parameters
+    ----------
+    game_class : type
+        game class providing from_state, e.g. Pentago
+    state : tuple(int)
+        compact root position, see Pentago.get_state
+    move : Move
+    depth : int
+        root search depth
+    alpha : float
+    beta : float
+    deadline : float
+        time.time() value at which the search stops, None searches without the time limit - wall clock is used, as
+        it is the same in every process
+
+    Returns
+    -------
+    result : tuple
+        move, its value (None when the time ran out) and number of searched nodes
+    """
+    time_limit = None if deadline is None else deadline - time.time()
+    if time_limit is not None and time_limit <= 0:
+        return move, None, 0
+    game = game_class.from_state(state)
+    game.make_move(move)
+    game.switch_player()
+    try:
+        value = -__worker_search.search_window(game, depth - 1, -beta, -alpha, time_limit)
+    except SearchTimeout:
+        value = None
+    return move, value, __worker_search.nodes
+
+
+class RootParallelSearch:
+    """
+    Class to represent AI algorithm searching root moves in parallel on a pool of worker processes.
+
+    Can be used like easyAI algorithms: AI_Player(RootParallelSearch(workers=4, time_limit=2)). Every iteration of
+    the iterative deepening searches the best move of the previous iteration first, with the full window. The other
+    root moves are then spread over the workers, each one with the null window above its value (see PVSearch) - a move
+    which fails high is searched again with the full window. Every worker keeps its own transposition table between
+    searches, positions are sent as compact states, so the game does not have to be picklable.
+
+    Attributes
+    ----------
+    workers : int
+        number of worker processes
+    max_depth : int
+        maximum search depth
+    time_limit : float
+        seconds per move, None searches up to max_depth
+    megabytes : float
+        transposition table size of every worker
+    nodes : int
+        number of positions visited by all workers during the last search
+    depth : int
+        depth of the last finished iteration
+    value : int
+        value of the best move found by the last search
+
+    Methods
+    -------
+    __call__(game):
+        Returns the best move found within the time budget.
+    search(game):
+        Searches the game position with iterative deepening, root moves in parallel.
+    close():
+        Stops the worker processes.
+    __deepcopy__(memo):
+        Returns the AI itself.
+    __search_iteration(game, depth, moves, deadline):
+        Searches all root moves to the given depth.
+    """
+
+    def __init__(self, workers=None, max_depth=64, time_limit=1.0, megabytes=16):
+        """
+        Creates all attributes needed for the parallel AI. Worker processes are started by the first search.
+
+        Parameters
+        ----------
+        workers : int
+            number of worker processes, number of CPUs by default
+        max_depth : int
+        time_limit : float
+            seconds per move, None searches up to max_depth
+        megabytes : float
+            transposition table size of every worker
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.megabytes = megabytes
+        self.nodes = 0
+        self.depth = 0
+        self.value = 0
+        self.__pool = None
+
+    def __call__(self, game):
+        """
+        Returns the best move found within the time budget.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        return self.search(game)
+
+    def search(self, game):
+        """
+        Searches the game position with iterative deepening, root moves in parallel. First iteration is always
+        finished, moves of the interrupted iteration are used only when the best move of the previous iteration was
+        searched.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        if self.__pool is None:
+            self.__pool = Pool(self.workers, initializer=init_worker, initargs=(self.max_depth, self.megabytes))
+        start = time.time()
+        self.nodes = 0
+        self.depth = 0
+        moves = game.possible_moves()
+        best_move = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            deadline = start + self.time_limit if self.time_limit is not None and depth > 1 else None
+            values, finished = self.__search_iteration(game, depth, moves, deadline)
+            if values:
+                best_move = max(values, key=values.get)
+                self.value = values[best_move]
+            if not finished:
+                break
+            self.depth = depth
+            moves.sort(key=lambda move: values.get(move, -INFINITY), reverse=True)
+            if abs(self.value) >= WIN_THRESHOLD:
+                break
+            if self.time_limit is not None and time.time() >= start + self.time_limit:
+                break
+        return best_move
+
+    def __search_iteration(self, game, depth, moves, deadline):
+        """
+        Searches all root moves to the given depth - the first one with the full window, then the rest in parallel
+        with the null window above the best value.
+
+        Parameters
+        ----------
+        game : Pentago
+        depth : int
+        moves : 1D array[Move]
+            root moves, best move of the previous iteration first
+        deadline : float
+            time.time() value at which the search stops, None searches without the time limit
+
+        Returns
+        -------
+        result : tuple
+            values of the searched moves (dict), whether all moves were searched (bool) - moves which are not better
+            than the best one might hold only an upper bound of their value
+        """
+        game_class, state = type(game), game.get_state()
+        move, value, nodes = self.__pool.apply(search_root_move, (game_class, state, moves[0], depth, -INFINITY,
+                                                                  INFINITY, deadline))
+        self.nodes += nodes
+        if value is None:
+            return {}, False
+        values = {move: value}
+        pending = [(self.__pool.apply_async(search_root_move, (game_class, state, move, depth, value, value + 1,
+                                                               deadline)), value + 1)
+                   for move in moves[1:]]
+        finished = True
+        while pending:
+            result, beta = pending.pop(0)
+            move, value, nodes = result.get()
+            self.nodes += nodes
+            if value is None:
+                finished = False
+            elif value < beta or beta == INFINITY:
+                values[move] = value
+            else:
+                alpha = max(values.values())
+                pending.append((self.__pool.apply_async(search_root_move, (game_class, state, move, depth, alpha,
+                                                                           INFINITY, deadline)),
+                                INFINITY))
+        return values, finished
+
+    def close(self):
+        """
+        Stops the worker processes.
+
+        Returns
+        -------
+        None
+        """
+        if self.__pool is not None:
+            self.__pool.terminate()
+            self.__pool.join()
+            self.__pool = None
+
+    def __deepcopy__(self, memo):
+        """
+        Returns the AI itself - it holds the pool of worker processes, which can not be copied, so copies of the game
+        (easyAI keeps them as the game history) share it.
+
+        Parameters
+        ----------
+        memo : dict
+
+        Returns
+        -------
+        algo : RootParallelSearch
+        """
+        return self
@@ -2,8 +2,24 @@
 # Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
 # Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
 
+import argparse
 from board import Board
-from easyAI import TwoPlayersGame, Negamax, Human_Player, AI_Player, TT
+from bitboard import POSITION_WIN_MASKS, QUADRANT_WIN_MASKS, bit_positions
+from symmetry import canonical_hash
+from move import MOVE_DIRECTIONS, SYMMETRY_MOVES, parse_move
+from evaluation import MAX_POTENTIAL
+from easyAI import TwoPlayersGame, AI_Player
+from players import PentagoHumanPlayer
+from search import PVSearch
+from parallel import RootParallelSearch
+from transposition import BoundedTT
+from book import OpeningBook, BookSearch, BOOK_FILE
+from endgame import EndgameSolver, EndgameSearch
+from instrumentation import InstrumentedAI
+from ponder import Ponderer
+from threats import ThreatSolver, ThreatSearch
+from batch import LeafEvaluator
+from record import GameRecord, append_record, DRAW
 
 
 class Pentago(TwoPlayersGame):
@@ -18,7 +34,7 @@ class Pentago(TwoPlayersGame):
     ----------
     board : Board
         board containing quadrants from which it is made
-    players : 1D array[Human_Player/AI_Player]
+    players : 1D array[PentagoHumanPlayer/AI_Player]
         players participating in the game - 2 values
     nplayer : int
         current player making move
@@ -26,6 +42,10 @@ class Pentago(TwoPlayersGame):
         contains information whether the current player has lost
     end_before_rotate : bool
         contains information whether the game ended before rotating the quadrant
+    winners : tuple(bool)
+        whether player 1 and player 2 have winning combination on the board - kept up to date by make_move
+    winners_history : 1D array[tuple(bool)]
+        winners values from before each made move, used by unmake_move
 
     Methods
     -------
@@ -34,23 +54,33 @@ class Pentago(TwoPlayersGame):
     unmake_move(move):
         Undoes move performed by AI - speeds up the AI.
     ttentry():
-        Generates transposition table - returns game state in the simple form.
-    __check_win():
-        Checks if the current player has winning combination.
+        Generates transposition table - returns game state in the simple form (Zobrist hash).
+    canonical_ttentry():
+        Generates symmetry independent transposition table entry - all 8 symmetric positions share it.
+    transform_move(move, symmetry):
+        Maps move onto the symmetric position.
+    parse_move(text):
+        Converts move typed by human, e.g. "14 1 r", to the move used by the game.
+    get_state():
+        Returns compact game state - both bitboards and the player to move.
+    from_state(state, players):
+        Creates the game from the compact game state.
     __check_lose():
         Checks if the opponent has winning combination.
-    __winning_combination_exists(choices):
-        Check whether winning combination exists in the current choices.
     possible_moves():
-        Returns all possible moves which player/AI can make in the next move.
+        Returns all possible moves which player/AI can make in the next move - one move per resulting position.
+    legal_moves():
+        Returns all legal moves, including the ones leading to the same position.
+    representative_move(move):
+        Returns the move from possible_moves() which leads to the same position as the provided move.
     show():
         Should print current game state before next move.
+    play(nmoves, verbose):
+        Plays the game to the end, keeping only the played moves as the history.
     is_over():
         Checks if the game is over.
     scoring():
         Calculates score for the current AI move outcome.
-    __win_combinations():
-        Returns all win combinations.
     __show_hint_table():
         Prints game positions hints table.
     """
@@ -60,34 +90,45 @@ class Pentago(TwoPlayersGame):
 
         Parameters
         ----------
-        players : 1D array[Human_Player/AI_Player]
+        players : 1D array[PentagoHumanPlayer/AI_Player]
         """
         self.board = Board()
         self.players = players
         self.nplayer = 1
         self.has_lost = None
         self.end_before_rotate = False
+        self.winners = (False, False)
+        self.winners_history = []
 
     def make_move(self, move):
         """
         Performs move on the game board.
+        Winning combinations are checked incrementally - after placing only the lines going through the placed
+        position are checked, after rotating only the lines touching the rotated quadrant (for both players at once).
         More information at: https://zulko.github.io/easyAI/ref.html
 
         Parameters
         ----------
-        move : str
-            e.g. "20 2 l"
+        move : Move
+            e.g. "20 2 l" encoded as integer, see move module
 
         Returns
         -------
         None
         """
-        position, quadrant, rotate = move.split(" ")
-        self.board.place_player(self.nplayer, int(position) - 1)
-        if self.__check_win():
+        position = move >> 3
+        quadrant = move >> 1 & 3
+        self.board.place_player(self.nplayer, position)
+        self.winners_history.append(self.winners)
+        if self.winners[self.nplayer - 1] or self.board.has_line(self.nplayer, POSITION_WIN_MASKS[position]):
             self.end_before_rotate = True
+            if self.nplayer == 1:
+                self.winners = (True, self.winners[1])
+            else:
+                self.winners = (self.winners[0], True)
         else:
-            self.board.rotate_quadrant(int(quadrant) - 1, rotate)
+            self.board.rotate_quadrant(quadrant, MOVE_DIRECTIONS[move & 1])
+            self.winners = self.board.winning_players(QUADRANT_WIN_MASKS[quadrant])
 
     def unmake_move(self, move):
         """
@@ -96,27 +137,25 @@ class Pentago(TwoPlayersGame):
 
         Parameters
         ----------
-        move : str
-            e.g. "20 2 l"
+        move : Move
+            e.g. "20 2 l" encoded as integer, see move module
 
         Returns
         -------
         None
         """
-        position, quadrant, rotate = move.split(" ")
+        position = move >> 3
         if not self.end_before_rotate:
-            if rotate == "l":
-                rotate = "r"
-            else:
-                rotate = "l"
-            self.board.rotate_quadrant(int(quadrant) - 1, rotate)
+            self.board.rotate_quadrant(move >> 1 & 3, MOVE_DIRECTIONS[(move & 1) ^ 1])
         else:
             self.end_before_rotate = False
-        self.board.place_player(0, int(position) - 1)
+        self.board.place_player(0, position)
+        self.winners = self.winners_history.pop()
 
     def ttentry(self):
         """
-        Generates transposition table - returns game state in the simple form.
+        Generates transposition table - returns game state in the simple form. Zobrist hash is kept up to date by the
+        board on every move, so no tuple has to be built and hashed for each lookup.
 
         "Transposition tables store the values of already-computed moves and positions so that if the AI meets
         them again it will win time."
@@ -124,59 +163,149 @@ class Pentago(TwoPlayersGame):
 
         Returns
         -------
-        tuple : tuple(int)
+        hash : int
+            64 bit Zobrist hash of the board
         """
-        return tuple(value for obj in self.board.get_play_area() for value in obj.get_board())
+        return self.board.get_hash()
 
-    def __check_win(self):
+    def canonical_ttentry(self):
         """
-        Checks if the current player has winning combination.
+        Generates symmetry independent transposition table entry - rotated and reflected copies of the board are the
+        same position for the game, so all 8 of them share the entry. Used by transposition.SymmetricTT.
 
-        :return:
+        Returns
+        -------
+        canonical : tuple(int)
+            Zobrist hash of the representative position and symmetry which maps the board onto it
         """
-        return self.__winning_combination_exists(self.board.player_choices(self.nplayer))
+        return canonical_hash(*self.board.get_bitboards())
 
-    def __check_lose(self):
+    @staticmethod
+    def transform_move(move, symmetry):
         """
-        Checks if the opponent has winning combination.
+        Maps move onto the symmetric position - position and quadrant are moved by the symmetry, reflections also
+        change the rotation direction.
+
+        Parameters
+        ----------
+        move : Move
+        symmetry : int
+            values from 0 to 7, see symmetry module
 
         Returns
         -------
-        has_lost : bool
+        move : Move
         """
-        self.has_lost = self.__winning_combination_exists(self.board.player_choices(self.nopponent))
-        return self.has_lost
+        return SYMMETRY_MOVES[symmetry][move]
 
-    def __winning_combination_exists(self, choices):
+    @staticmethod
+    def parse_move(text):
         """
-        Check whether winning combination exists in the current choices.
+        Converts move typed by human, e.g. "14 1 r", to the move used by the game.
 
         Parameters
         ----------
-        choices : 1D array[int]
+        text : str
 
         Returns
         -------
-        combination_exists : bool
+        move : Move
         """
-        combination_exists = False
-        for winning_combination in self.__win_combinations():
-            if set(winning_combination).issubset(set(choices)):
-                combination_exists = True
-                break
-        return combination_exists
+        return parse_move(text)
+
+    def get_state(self):
+        """
+        Returns compact game state - both bitboards and the player to move. It can be sent to another process
+        (unlike the game, which holds the players) and restored with from_state.
+
+        Returns
+        -------
+        state : tuple(int)
+            player 1 bitboard, player 2 bitboard and the player to move
+        """
+        bitboard1, bitboard2 = self.board.get_bitboards()
+        return bitboard1, bitboard2, self.nplayer
+
+    @classmethod
+    def from_state(cls, state, players=None):
+        """
+        Creates the game from the compact game state. Stones are placed one by one, so the hash and line potential
+        are built by the board as usual.
+
+        Parameters
+        ----------
+        state : tuple(int)
+            player 1 bitboard, player 2 bitboard and the player to move, see get_state
+        players : 1D array[PentagoHumanPlayer/AI_Player]
+            None creates the game without players, e.g. for the AI search
+
+        Returns
+        -------
+        game : Pentago
+        """
+        bitboard1, bitboard2, nplayer = state
+        game = cls(players if players is not None else [None, None])
+        for player, bitboard in ((1, bitboard1), (2, bitboard2)):
+            for position in bit_positions(bitboard):
+                game.board.place_player(player, position)
+        game.nplayer = nplayer
+        game.winners = game.board.winning_players()
+        return game
+
+    def __check_lose(self):
+        """
+        Checks if the opponent has winning combination.
+
+        Returns
+        -------
+        has_lost : bool
+        """
+        self.has_lost = self.winners[self.nopponent - 1]
+        return self.has_lost
 
     def possible_moves(self):
         """
-        Returns all possible moves which player/AI can make in the next move.
+        Returns all possible moves which player/AI can make in the next move. Moves leading to the same position as
+        an earlier move are dropped (see Board.distinct_moves), so the AI does not search the same position many
+        times - on the empty board only 36 out of 288 moves are left.
         More info at : https://zulko.github.io/easyAI/ref.html
 
         Returns
         -------
-        array : 1D array[int]
+        array : 1D array[Move]
+        """
+        return self.board.distinct_moves(self.nplayer, self.winners[self.nplayer - 1])
+
+    def legal_moves(self):
+        """
+        Returns all legal moves, including the ones leading to the same position. Used to validate human moves.
+
+        Returns
+        -------
+        array : 1D array[Move]
         """
         return self.board.available_moves()
 
+    def representative_move(self, move):
+        """
+        Returns the move from possible_moves() which leads to the same position as the provided move - the first
+        legal move giving that position. Used for moves mapped from symmetric positions.
+
+        Parameters
+        ----------
+        move : Move
+
+        Returns
+        -------
+        move : Move
+        """
+        placement_wins = self.winners[self.nplayer - 1]
+        successor = self.board.successor(self.nplayer, move, placement_wins)
+        for candidate in self.board.available_moves():
+            if self.board.successor(self.nplayer, candidate, placement_wins) == successor:
+                return candidate
+        return move
+
     def show(self):
         """
         Should print current game state before next move.
@@ -189,9 +318,44 @@ class Pentago(TwoPlayersGame):
         self.__show_hint_table()
         self.board.print_board()
 
+    def play(self, nmoves=1000, verbose=True):
+        """
+        Plays the game to the end, like easyAI play, but the history holds only the played moves. easyAI keeps a deep
+        copy of the game after every move, which copies the players - and with them the AI transposition tables
+        (tens of megabytes) - on every ply.
+        More info at: https://zulko.github.io/easyAI/ref.html
+
+        Parameters
+        ----------
+        nmoves : int
+            maximum number of moves (plies) to play
+        verbose : bool
+            whether the board and every move are printed
+
+        Returns
+        -------
+        history : 1D array[Move]
+            played moves, e.g. for record.GameRecord
+        """
+        history = []
+        if verbose:
+            self.show()
+        for self.nmove in range(1, nmoves + 1):
+            if self.is_over():
+                break
+            move = self.player.ask_move(self)
+            history.append(move)
+            self.make_move(move)
+            if verbose:
+                print("\nMove #%d: player %d plays %s :" % (self.nmove, self.nplayer, str(move)))
+                self.show()
+            self.switch_player()
+        return history
+
     def is_over(self):
         """
-        Checks if the game is over.
+        Checks if the game is over - the opponent has winning combination or the board is full. Both are kept up to
+        date on every move, so no moves are generated.
         More info at: https://zulko.github.io/easyAI/ref.html
 
         Returns
@@ -199,66 +363,25 @@ class Pentago(TwoPlayersGame):
         is_over : bool
             True if game over False when not over
         """
-        return self.__check_lose() or (self.possible_moves() == [])
+        return self.__check_lose() or self.board.get_empty_count() == 0
 
     def scoring(self):
         """
-        Calculates score for the current AI move outcome. Uses has_lost attribute to avoid redundant check_lose()
-        calculation. Speeds up AI a bit.
+        Calculates score for the current AI move outcome. Winning combinations are kept up to date by make_move,
+        so this is a simple lookup. Position which is not lost is scored by the line potential (see evaluation
+        module) - lines with 2, 3 or 4 own stones and no opponent stone, minus the same for the opponent. Board keeps
+        it up to date on every move, so scoring does not look at the whole board.
         More info at: https://zulko.github.io/easyAI/speedup.html
 
         Returns
         -------
         scoring : int
+            -100 for lost game, otherwise value from -MAX_POTENTIAL to MAX_POTENTIAL
         """
-        if self.has_lost is not None:
-            has_lost = self.has_lost
-            self.has_lost = None
-            return -100 if has_lost else 0
-        else:
-            return -100 if self.__check_lose() else 0
-
-    @staticmethod
-    def __win_combinations():
-        """
-        Returns all win combinations.
-
-        Returns
-        -------
-        array : 2D array[int]
-        """
-        return [[1, 2, 3, 10, 11],
-                [2, 3, 10, 11, 12],
-                [4, 5, 6, 13, 14],
-                [5, 6, 13, 14, 15],
-                [7, 8, 9, 16, 17],
-                [8, 9, 16, 17, 18],
-                [19, 20, 21, 28, 29],
-                [20, 21, 28, 29, 30],
-                [22, 23, 24, 31, 32],
-                [23, 24, 31, 32, 33],
-                [25, 26, 27, 34, 35],
-                [26, 27, 34, 35, 36],
-                [1, 4, 7, 19, 22],
-                [4, 7, 19, 22, 25],
-                [2, 5, 8, 20, 23],
-                [5, 8, 20, 23, 26],
-                [3, 6, 9, 21, 24],
-                [6, 9, 21, 24, 27],
-                [10, 13, 16, 28, 31],
-                [13, 16, 28, 31, 34],
-                [11, 14, 17, 29, 32],
-                [14, 17, 29, 32, 35],
-                [12, 15, 18, 30, 33],
-                [15, 18, 30, 33, 36],
-                [4, 8, 21, 31, 35],
-                [1, 5, 9, 28, 32],
-                [5, 9, 28, 32, 36],
-                [2, 6, 16, 29, 33],
-                [22, 20, 9, 13, 11],
-                [25, 23, 21, 16, 14],
-                [23, 21, 16, 14, 12],
-                [26, 24, 28, 17, 15]]
+        if self.__check_lose():
+            return -100
+        potential = max(-MAX_POTENTIAL, min(MAX_POTENTIAL, self.board.get_potential()))
+        return potential if self.nplayer == 1 else -potential
 
     @staticmethod
     def __show_hint_table():
@@ -284,7 +407,43 @@ class Pentago(TwoPlayersGame):
         print()
 
 
-algo = Negamax(3, tt=TT())
-game = Pentago([Human_Player(), AI_Player(algo)])
-game.play()
-print("Player %d loses" % game.nplayer)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pentago game against the AI.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes searching for the AI move, 1 searches in the game process")
+    parser.add_argument("--time", type=float, default=3, help="seconds per AI move")
+    parser.add_argument("--book", default=BOOK_FILE, help="opening book file, used when it exists")
+    parser.add_argument("--endgame", type=int, default=8,
+                        help="number of empty positions from which the AI solves the game exactly")
+    parser.add_argument("--threats", type=int, default=4,
+                        help="maximum number of threats in the forced wins looked for before the search, 0 disables")
+    parser.add_argument("--batch-leaves", action="store_true",
+                        help="score leaves of the search frontier together with NumPy (single process AI)")
+    parser.add_argument("--stats", help="JSON lines file to which search statistics of every AI move are appended")
+    parser.add_argument("--record", help="game records file to which the game is appended, see record.GameRecord")
+    parser.add_argument("--no-ponder", action="store_true",
+                        help="do not search while the human is typing the move (only single process AI ponders)")
+    args = parser.parse_args()
+    solver = ThreatSolver(max_threats=args.threats, time_limit=args.time / 4) if args.threats else None
+    if args.workers > 1:
+        search = RootParallelSearch(workers=args.workers, time_limit=args.time, megabytes=64)
+    else:
+        search = PVSearch(time_limit=args.time, tt=BoundedTT(megabytes=64, replacement='two-tier'), threats=solver,
+                          leaves=LeafEvaluator() if args.batch_leaves else None)
+    algo = EndgameSearch(search, args.endgame, EndgameSolver(time_limit=args.time * EndgameSearch.SOLVER_TIME_SHARE))
+    if solver is not None:
+        algo = ThreatSearch(algo, solver)
+    algo = BookSearch(OpeningBook(args.book), algo)
+    if args.stats:
+        algo = InstrumentedAI(algo, log=args.stats)
+    ponderer = None
+    if args.workers == 1 and not args.no_ponder:
+        ponderer = Ponderer(search.tt, threats=search.threats, leaves=search.leaves)
+    game = Pentago([PentagoHumanPlayer(ponderer=ponderer), AI_Player(algo)])
+    history = game.play()
+    print("Player %d loses" % game.nplayer)
+    if args.record:
+        winner = game.nopponent if game.winners[game.nopponent - 1] else DRAW
+        append_record(args.record, GameRecord(history, winner))
+    if args.workers > 1:
+        search.close()
@@ -0,0 +1,217 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import argparse
+import sys
+import time
+from pentago import Pentago
+
+# Reference positions - moves played from the empty board, in the notation typed by human player.
+REFERENCE_POSITIONS = {
+    'empty': [],
+    'opening': ['25 3 r', '28 4 r', '3 3 l', '18 3 l'],
+    'middlegame': ['25 3 r', '28 4 r', '3 3 l', '18 3 l', '36 1 l', '14 4 r', '35 2 r', '30 1 l', '32 3 l', '11 3 r',
+                   '20 2 l', '15 2 r', '25 3 r', '8 4 r'],
+    'endgame': ['16 1 r', '36 4 l', '9 2 l', '26 3 r', '35 2 l', '24 1 l', '21 3 l', '4 1 l', '25 2 r', '2 2 r',
+                '22 1 l', '12 2 l', '28 3 r', '12 2 r', '10 1 r', '29 1 l', '33 2 l', '34 3 l', '31 1 r', '23 3 r',
+                '7 4 l', '6 3 r', '22 1 r', '7 2 r', '19 2 l', '15 1 r', '5 1 r', '8 1 l'],
+    # player to move can win by placing - the rotation is skipped after the winning placement
+    'placement-win': ['1 4 l', '32 1 l', '9 1 r', '28 1 r', '12 1 l', '25 4 r', '3 2 r', '8 2 r', '6 3 l', '24 1 r',
+                      '13 2 r', '34 4 l'],
+    # opponent's rotation gave the player to move a winning combination - every move wins
+    'rotation-line': ['24 1 r', '32 1 l', '33 4 l', '19 1 r', '30 3 r', '8 2 l', '16 2 l', '1 1 r', '16 1 l',
+                      '28 1 l', '33 4 l', '11 2 l', '10 3 l', '33 2 l', '11 1 l', '1 2 l'],
+}
+
+# Leaf counts of the reference positions for depth 1, 2, ... - generated with the original string based
+# implementation of the game (all legal moves, game over when the player who moved has a winning combination).
+REFERENCE_COUNTS = {
+    'empty': [288, 80640],
+    'opening': [256, 63488],
+    'middlegame': [176, 29568],
+    'endgame': [64, 3080, 135216],
+    'placement-win': [192, 33672],
+    'rotation-line': [160, 0],
+}
+
+
+def reference_game(name):
+    """
+    Creates the game in the reference position.
+
+    Parameters
+    ----------
+    name : str
+        key of REFERENCE_POSITIONS
+
+    Returns
+    -------
+    game : Pentago
+    """
+    game = Pentago([None, None])
+    for text in REFERENCE_POSITIONS[name]:
+        game.play_move(game.parse_move(text))
+    return game
+
+
+def perft(game, depth):
+    """
+    Counts positions reached after exactly depth moves, making every legal move (also the ones leading to the same
+    position). Positions in which the game is over have no moves, so they are only counted at depth 0.
+    Game is left in the same position.
+
+    Parameters
+    ----------
+    game : Pentago
+    depth : int
+
+    Returns
+    -------
+    leaves : int
+    """
+    if depth == 0:
+        return 1
+    if game.is_over():
+        return 0
+    leaves = 0
+    for move in game.legal_moves():
+        game.make_move(move)
+        game.switch_player()
+        leaves += perft(game, depth - 1)
+        game.switch_player()
+        game.unmake_move(move)
+    return leaves
+
+
+def divide(game, depth):
+    """
+    Counts positions reached after exactly depth moves separately for every first move - when the total differs,
+    comparing the move counts finds the wrongly generated move.
+
+    Parameters
+    ----------
+    game : Pentago
+    depth : int
+        at least 1
+
+    Returns
+    -------
+    leaves : dict
+        number of leaves for every legal move
+    """
+    leaves = {}
+    for move in game.legal_moves():
+        game.make_move(move)
+        game.switch_player()
+        leaves[move] = perft(game, depth - 1)
+        game.switch_player()
+        game.unmake_move(move)
+    return leaves
+
+
+def successors(game, moves):
+    """
+    Returns positions after the moves, made one by one on the game.
+
+    Parameters
+    ----------
+    game : Pentago
+    moves : 1D array[Move]
+
+    Returns
+    -------
+    positions : 1D array[tuple]
+        compact state (see Pentago.get_state) and winning combinations after every move
+    """
+    positions = []
+    for move in moves:
+        game.make_move(move)
+        positions.append((game.get_state(), game.winners))
+        game.unmake_move(move)
+    return positions
+
+
+def check_distinct(game, depth):
+    """
+    Checks the move generator used by the search - at every position reached with possible_moves() up to depth - 1
+    moves, possible_moves() has to lead to every position which legal_moves() leads to, each one exactly once.
+    Game is left in the same position.
+
+    Parameters
+    ----------
+    game : Pentago
+    depth : int
+        number of move levels checked
+
+    Returns
+    -------
+    result : tuple
+        number of checked positions and number of positions at which the generators differ
+    """
+    if depth == 0 or game.is_over():
+        return 0, 0
+    moves = game.possible_moves()
+    distinct = successors(game, moves)
+    checked, failed = 1, 0
+    if len(set(distinct)) != len(distinct) or set(distinct) != set(successors(game, game.legal_moves())):
+        failed = 1
+    for move in moves:
+        game.make_move(move)
+        game.switch_player()
+        result = check_distinct(game, depth - 1)
+        game.switch_player()
+        game.unmake_move(move)
+        checked += result[0]
+        failed += result[1]
+    return checked, failed
+
+
+def main():
+    """
+    Counts leaves of the reference positions, compares them with the reference counts and prints positions per
+    second, then checks possible_moves() against legal_moves() to the same depth. Exits with status 1 when any count
+    differs or the generators do not match.
+
+    Returns
+    -------
+    None
+    """
+    parser = argparse.ArgumentParser(description="Pentago move generation test and benchmark (perft).")
+    parser.add_argument("--depth", type=int, default=2, help="maximum depth, deeper reference counts are skipped")
+    parser.add_argument("--positions", nargs="+", choices=sorted(REFERENCE_POSITIONS),
+                        default=list(REFERENCE_POSITIONS))
+    parser.add_argument("--divide", action="store_true", help="print leaves of every first move at the maximum depth")
+    args = parser.parse_args()
+
+    failed = False
+    total_leaves = 0
+    total_seconds = 0.0
+    for name in args.positions:
+        game = reference_game(name)
+        for depth, expected in enumerate(REFERENCE_COUNTS[name][:args.depth], 1):
+            start = time.perf_counter()
+            leaves = perft(game, depth)
+            seconds = time.perf_counter() - start
+            total_leaves += leaves
+            total_seconds += seconds
+            ok = leaves == expected
+            failed = failed or not ok
+            print("%-14s depth %d: %8d leaves, expected %8d %s  %6.2f s  %9.0f positions/s"
+                  % (name, depth, leaves, expected, "OK  " if ok else "FAIL", seconds,
+                     leaves / seconds if seconds else 0.0))
+        checked, mismatches = check_distinct(game, args.depth)
+        failed = failed or mismatches > 0
+        print("%-14s possible_moves: %8d positions checked, %d with different successors %s"
+              % (name, checked, mismatches, "OK" if mismatches == 0 else "FAIL"))
+        if args.divide:
+            for move, leaves in divide(game, min(args.depth, len(REFERENCE_COUNTS[name]))).items():
+                print("  %-8s %d" % (move, leaves))
+    print("Total: %d leaves, %.2f s, %.0f positions/s"
+          % (total_leaves, total_seconds, total_leaves / total_seconds if total_seconds else 0.0))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+from easyAI import Human_Player
+from move import parse_move
+
+
+class PentagoHumanPlayer(Human_Player):
+    """
+    Class to represent a human player of the Pentago game.
+
+    Extends Human_Player class from the easyAI library. Typed moves (e.g. '14 1 r') are converted to the game moves
+    and validated against all legal moves - game.possible_moves() skips moves leading to already generated positions,
+    but human can still play any of them. With the ponderer the AI searches while the human is typing.
+
+    Attributes
+    ----------
+    name : str
+    ponderer : Ponderer
+        started before asking for the move and stopped when it is typed, might be None
+
+    Methods
+    -------
+    ask_move(game):
+        Asks human for the move until a legal one is typed.
+    __read_move(game, legal_moves):
+        Reads typed moves until a legal one is typed.
+    """
+
+    def __init__(self, name='Human', ponderer=None):
+        """
+        Creates all attributes needed for the human player.
+
+        Parameters
+        ----------
+        name : str
+        ponderer : Ponderer
+        """
+        super().__init__(name)
+        self.ponderer = ponderer
+
+    def ask_move(self, game):
+        """
+        Asks human for the move until a legal one is typed. 'show moves' prints all legal moves, 'quit' ends the game.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        legal_moves = game.legal_moves()
+        if self.ponderer is not None:
+            self.ponderer.start(game)
+        try:
+            return self.__read_move(game, legal_moves)
+        finally:
+            if self.ponderer is not None:
+                self.ponderer.stop()
+
+    @staticmethod
+    def __read_move(game, legal_moves):
+        """
+        Reads typed moves until a legal one is typed.
+
+        Parameters
+        ----------
+        game : Pentago
+        legal_moves : 1D array[Move]
+
+        Returns
+        -------
+        move : Move
+        """
+        while True:
+            text = input("\nPlayer %s what do you play ? " % game.nplayer).strip()
+            if text == 'show moves':
+                print("Possible moves:\n" + "\n".join(str(move) for move in legal_moves))
+            elif text == 'quit':
+                raise KeyboardInterrupt
+            else:
+                try:
+                    move = parse_move(text)
+                except ValueError:
+                    continue
+                if move in legal_moves:
+                    return move
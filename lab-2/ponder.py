@@ -0,0 +1,199 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import threading
+from search import INFINITY, PVSearch, SearchTimeout
+
+
+class PonderSearch(PVSearch):
+    """
+    Class to represent principal variation search without the time limit, which can be stopped from another thread.
+
+    Extends PVSearch - the stop request is checked where the time budget is checked, so the search stops within a few
+    hundred nodes and leaves the game in the searched position.
+
+    Attributes
+    ----------
+    stop_event : threading.Event
+        set to stop the search
+
+    Methods
+    -------
+    _check_time():
+        Stops the search when it is requested.
+    """
+
+    def __init__(self, max_depth=64, tt=None, threats=None, leaves=None):
+        """
+        Creates all attributes needed for the stoppable search.
+
+        Parameters
+        ----------
+        max_depth : int
+        tt : BoundedTT/TT
+            usually the transposition table of the AI which will search the next move
+        threats : ThreatSolver
+        leaves : LeafEvaluator
+        """
+        super().__init__(max_depth, None, tt, threats=threats, leaves=leaves)
+        self.stop_event = threading.Event()
+
+    def _check_time(self):
+        """
+        Stops the search when it is requested.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        SearchTimeout
+        """
+        if self.stop_event.is_set():
+            raise SearchTimeout()
+
+
+class Ponderer:
+    """
+    Class to represent pondering - searching during the human's turn, while the game waits for the typed move.
+
+    Positions after every human reply are searched in a background thread with the AI's transposition table, so when
+    the human plays a pondered reply the AI finds its first iterations (and the move ordering of the next one) already
+    stored. Waiting for input releases the GIL, so the thread gets the whole CPU. The search works on its own copy of
+    the game and is stopped, and its thread joined, before the AI uses the table - they never run at the same time.
+
+    Attributes
+    ----------
+    search : PonderSearch
+    nodes : int
+        number of positions visited during the last pondering
+    depth : int
+        depth to which all human replies were searched during the last pondering
+
+    Methods
+    -------
+    start(game):
+        Starts searching the game position in the background thread.
+    stop():
+        Stops the search and waits for the thread to finish.
+    __deepcopy__(memo):
+        Returns the ponderer itself.
+    __ponder(game):
+        Searches positions after the human replies until it is finished or stopped.
+    """
+
+    def __init__(self, tt, max_depth=64, threats=None, leaves=None):
+        """
+        Creates all attributes needed for pondering. Leaves are scored the same way as by the AI search (threats and
+        leaves of the AI), so the values stored in the shared transposition table are the ones the AI would store.
+
+        Parameters
+        ----------
+        tt : BoundedTT/TT
+            transposition table of the AI
+        max_depth : int
+        threats : ThreatSolver
+            threat-space search of the AI
+        leaves : LeafEvaluator
+            leaf evaluator of the AI
+        """
+        self.search = PonderSearch(max_depth, tt, threats, leaves)
+        self.nodes = 0
+        self.depth = 0
+        self.__thread = None
+
+    def start(self, game):
+        """
+        Starts searching the game position in the background thread. Pondering which is still running is stopped
+        first.
+
+        Parameters
+        ----------
+        game : Pentago
+            position in which the human is to move, it is not changed
+
+        Returns
+        -------
+        None
+        """
+        self.stop()
+        if game.is_over():
+            return
+        self.search.stop_event.clear()
+        self.nodes = 0
+        self.depth = 0
+        self.__thread = threading.Thread(target=self.__ponder, args=(type(game).from_state(game.get_state()),),
+                                         daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stops the search and waits for the thread to finish.
+
+        Returns
+        -------
+        None
+        """
+        if self.__thread is None:
+            return
+        self.search.stop_event.set()
+        self.__thread.join()
+        self.__thread = None
+
+    def __deepcopy__(self, memo):
+        """
+        Returns the ponderer itself - it holds a thread, so copies of the game (easyAI keeps them as the game history)
+        share it.
+
+        Parameters
+        ----------
+        memo : dict
+
+        Returns
+        -------
+        ponderer : Ponderer
+        """
+        return self
+
+    def __ponder(self, game):
+        """
+        Searches the position after every human reply with the full window, deepening all of them together until the
+        maximum depth is reached or pondering is stopped. Every depth starts with the replies which were best for the
+        human in the previous one - the ones most likely to be played get the deepest search.
+
+        Parameters
+        ----------
+        game : Pentago
+            copy of the game position
+
+        Returns
+        -------
+        None
+        """
+        if hasattr(self.search.tt, 'new_search'):
+            self.search.tt.new_search(ponder=True)
+        replies = []
+        for move in game.possible_moves():
+            game.make_move(move)
+            game.switch_player()
+            if not game.is_over():
+                replies.append(move)
+            game.switch_player()
+            game.unmake_move(move)
+        for depth in range(1, self.search.max_depth + 1):
+            values = {}
+            for move in replies:
+                game.make_move(move)
+                game.switch_player()
+                try:
+                    values[move] = self.search.search_window(game, depth, -INFINITY, INFINITY)
+                except SearchTimeout:
+                    return
+                finally:
+                    self.nodes += self.search.nodes
+                    game.switch_player()
+                    game.unmake_move(move)
+            self.depth = depth
+            replies.sort(key=values.__getitem__)
@@ -2,8 +2,7 @@
 # Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
 # Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
 
-from direction import Direction
-from copy import deepcopy
+from bitboard import ROTATION_SOURCES
 
 
 class Quadrant:
@@ -50,7 +49,8 @@ class Quadrant:
     def rotate(self, direction):
         """
         Rotates quadrant to the left or to the right - it means that new array is created and specified positions
-        changed with each other. New array is assigned to the board attribute.
+        changed with each other. New array is assigned to the board attribute. Positions are taken from the
+        ROTATION_SOURCES table shared with the bitboard rotations.
 
         Parameters
         ----------
@@ -61,26 +61,8 @@ class Quadrant:
         -------
         None
         """
-        new_board = deepcopy(self.board)
-        if direction == Direction.CLOCKWISE:
-            new_board[2] = self.board[0]
-            new_board[5] = self.board[1]
-            new_board[8] = self.board[2]
-            new_board[1] = self.board[3]
-            new_board[7] = self.board[5]
-            new_board[0] = self.board[6]
-            new_board[3] = self.board[7]
-            new_board[6] = self.board[8]
-        else:
-            new_board[6] = self.board[0]
-            new_board[3] = self.board[1]
-            new_board[0] = self.board[2]
-            new_board[7] = self.board[3]
-            new_board[1] = self.board[5]
-            new_board[8] = self.board[6]
-            new_board[5] = self.board[7]
-            new_board[2] = self.board[8]
-        self.board = new_board
+        sources = ROTATION_SOURCES[direction]
+        self.board = [self.board[source] for source in sources]
 
     def place_player(self, player, position):
         """
@@ -0,0 +1,215 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import re
+from move import parse_move
+
+DRAW = 0
+# Result written at the end of the record for the winner - player 1, player 2, draw or unknown (e.g. unfinished game).
+RESULTS = {1: '1-0', 2: '0-1', DRAW: '1/2-1/2', None: '*'}
+WINNERS = {result: winner for winner, result in RESULTS.items()}
+# Compact move - position number, quadrant number and direction without spaces, e.g. '141r' for '14 1 r'.
+COMPACT_MOVE = re.compile(r"^(\d{1,2})(\d)([lr])$")
+COMMENT = '#'
+
+
+def format_compact_move(move):
+    """
+    Returns move in the compact format, e.g. '141r' - the human format without spaces. Quadrant number and
+    direction always take one character each, so the rest is the position number.
+
+    Parameters
+    ----------
+    move : Move
+
+    Returns
+    -------
+    move : str
+    """
+    return str(move).replace(" ", "")
+
+
+def parse_compact_move(text):
+    """
+    Converts move in the compact format, e.g. '141r', to the Move.
+
+    Parameters
+    ----------
+    text : str
+
+    Returns
+    -------
+    move : Move
+
+    Raises
+    ------
+    ValueError
+        when text is not a valid move
+    """
+    match = COMPACT_MOVE.match(text)
+    if match is None:
+        raise ValueError("Compact move should look like '141r', got: %r" % text)
+    return parse_move(" ".join(match.groups()))
+
+
+class GameRecord:
+    """
+    Class to represent recorded game - moves from the empty board and the result.
+
+    Record is one line of text: compact moves separated with spaces and the result at the end, e.g.
+    '141r 233l 52r 1-0'. Result is '1-0' or '0-1' when player 1 or 2 won, '1/2-1/2' for a draw and '*' when it is
+    unknown. Files hold one record per line, lines starting with '#' are comments.
+
+    Attributes
+    ----------
+    moves : 1D array[Move]
+    winner : int
+        1 or 2, 0 for a draw, None when the result is unknown
+
+    Methods
+    -------
+    from_line(line):
+        Creates the record from the line of text.
+    to_line():
+        Returns the record as the line of text.
+    replay(game_class):
+        Plays the moves one by one, yielding every position before the move.
+    """
+
+    def __init__(self, moves, winner=None):
+        """
+        Creates all attributes needed for the game record.
+
+        Parameters
+        ----------
+        moves : 1D array[Move]
+        winner : int
+        """
+        self.moves = list(moves)
+        self.winner = winner
+
+    @classmethod
+    def from_line(cls, line):
+        """
+        Creates the record from the line of text.
+
+        Parameters
+        ----------
+        line : str
+
+        Returns
+        -------
+        record : GameRecord
+
+        Raises
+        ------
+        ValueError
+            when a move or the result is not valid
+        """
+        tokens = line.split()
+        if not tokens or tokens[-1] not in WINNERS:
+            raise ValueError("Record should end with the result (%s)" % ", ".join(RESULTS.values()))
+        return cls([parse_compact_move(token) for token in tokens[:-1]], WINNERS[tokens[-1]])
+
+    def to_line(self):
+        """
+        Returns the record as the line of text, without the newline.
+
+        Returns
+        -------
+        line : str
+        """
+        return " ".join([format_compact_move(move) for move in self.moves] + [RESULTS[self.winner]])
+
+    def replay(self, game_class):
+        """
+        Plays the moves one by one from the empty board, yielding every position before the move.
+
+        Parameters
+        ----------
+        game_class : type
+            game class, e.g. Pentago
+
+        Returns
+        -------
+        positions : generator
+            game (with the position before the move) and the move, the game is changed after every step
+
+        Raises
+        ------
+        ValueError
+            when a move is not legal or is played after the game is over
+        """
+        game = game_class([None, None])
+        for number, move in enumerate(self.moves, 1):
+            if game.is_over():
+                raise ValueError("Move %d (%s) played after the game is over" % (number, move))
+            if move not in game.legal_moves():
+                raise ValueError("Move %d (%s) is not legal" % (number, move))
+            yield game, move
+            game.play_move(move)
+
+
+def record_lines(file):
+    """
+    Returns record lines of the file with their line numbers - empty and comment lines are skipped. Lines are read
+    one by one, so files of any size can be streamed.
+
+    Parameters
+    ----------
+    file : file object
+        opened text file
+
+    Returns
+    -------
+    lines : generator
+        line number (from 1) and the line
+    """
+    for number, line in enumerate(file, 1):
+        line = line.strip()
+        if line and not line.startswith(COMMENT):
+            yield number, line
+
+
+def read_records(path):
+    """
+    Reads all records of the file.
+
+    Parameters
+    ----------
+    path : str
+
+    Returns
+    -------
+    records : generator
+        GameRecord for every record line
+
+    Raises
+    ------
+    ValueError
+        when a record line is not valid
+    """
+    with open(path) as file:
+        for number, line in record_lines(file):
+            try:
+                yield GameRecord.from_line(line)
+            except ValueError as error:
+                raise ValueError("%s:%d: %s" % (path, number, error))
+
+
+def append_record(path, record):
+    """
+    Appends the record to the file.
+
+    Parameters
+    ----------
+    path : str
+    record : GameRecord
+
+    Returns
+    -------
+    None
+    """
+    with open(path, "a") as file:
+        file.write(record.to_line() + "\n")
@@ -0,0 +1,788 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import time
+from easyAI.AI.Negamax import LOWERBOUND, EXACT, UPPERBOUND
+from move import MOVES_COUNT
+
+WIN_SCORE = 100
+# Scores above this value (in absolute terms) mean a won or lost game, the difference is the number of plies to it.
+WIN_THRESHOLD = WIN_SCORE - 50
+INFINITY = float('infinity')
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time budget of the move is used up.
+    """
+    pass
+
+
+class IterativeDeepening:
+    """
+    Class to represent AI algorithm searching with iterative deepening under a time budget per move - depth 1, 2, 3...
+    are searched one after another until the time runs out, so the best move of the deepest finished search is played.
+
+    Can be used like easyAI algorithms: AI_Player(IterativeDeepening(time_limit=2)). Search is a negamax with
+    alpha-beta pruning, moves are ordered so the cutoffs come early:
+    - transposition table best move first,
+    - then killer moves - moves which caused a cutoff on the same ply in sibling positions,
+    - then the rest by the history heuristic - how often (and how deep) the move caused a cutoff anywhere.
+
+    Attributes
+    ----------
+    max_depth : int
+        maximum search depth
+    time_limit : float
+        seconds per move, None searches up to max_depth
+    tt : BoundedTT/TT
+        transposition table, might be None
+    threats : ThreatSolver
+        threat-space search checking the leaves for a winning move, might be None
+    leaves : LeafEvaluator
+        evaluates all children of the frontier nodes at once, might be None
+    nodes : int
+        number of positions visited during the last search
+    depth : int
+        depth of the last finished iteration
+    value : float
+        value of the best move found by the last search
+    killers : 2D array[Move]
+        two killer moves per ply
+    history : 1D array[int]
+        history heuristic score of every move
+
+    Methods
+    -------
+    __call__(game):
+        Returns the best move found within the time budget.
+    search(game):
+        Searches the game position with iterative deepening.
+    search_window(game, depth, alpha, beta, time_limit):
+        Searches the game position to the fixed depth within the window.
+    _search_iteration(game, depth, moves):
+        Searches one iteration of the iterative deepening.
+    _search_root(game, depth, alpha, beta, moves):
+        Searches all root moves to the given depth.
+    _negamax(game, depth, alpha, beta, ply):
+        Negamax with alpha-beta pruning and transposition table.
+    _evaluate(game, ply):
+        Scores position which is not searched any deeper.
+    _search_leaves(game, moves, alpha, beta, ply):
+        Searches the frontier node with all its leaves scored at once.
+    _order_moves(moves, tt_move, ply):
+        Orders moves - transposition table move, killers, then history heuristic.
+    _update_cutoff(move, depth, ply):
+        Remembers the move which caused beta cutoff as a killer and in the history.
+    _store_root(game, depth, alpha, beta, move, value):
+        Stores root search result in the transposition table.
+    _check_time():
+        Stops the search when the time budget is used up.
+    """
+
+    # Frontier node leaves scored one by one before the rest is scored at once - most cutoffs happen on the first
+    # moves, so nodes which cut off early do not pay for the whole batch.
+    SCALAR_LEAVES = 8
+
+    def __init__(self, max_depth=64, time_limit=1.0, tt=None, threats=None, leaves=None):
+        """
+        Creates all attributes needed for the iterative deepening AI.
+
+        Parameters
+        ----------
+        max_depth : int
+        time_limit : float
+            seconds per move, None searches up to max_depth
+        tt : BoundedTT/TT
+        threats : ThreatSolver
+            checks every leaf for a forced win of the player to move, None scores leaves only by the evaluation
+        leaves : LeafEvaluator
+            scores all leaves of a frontier node in one call, None makes and scores them one by one
+        """
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.tt = tt
+        self.threats = threats
+        self.leaves = leaves
+        self.nodes = 0
+        self.depth = 0
+        self.value = 0
+        self.killers = []
+        self.history = [0] * MOVES_COUNT
+        self.__deadline = None
+
+    def __call__(self, game):
+        """
+        Returns the best move found within the time budget.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        return self.search(game)
+
+    def search(self, game):
+        """
+        Searches the game position with iterative deepening. First iteration is always finished, later ones are
+        interrupted when the time runs out - moves finished in the interrupted iteration are still used, as the best
+        move of the previous iteration is searched first. Transposition table entries of earlier searches become
+        replaceable (see BoundedTT.new_search).
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        start = time.perf_counter()
+        self.nodes = 0
+        self.depth = 0
+        if hasattr(self.tt, 'new_search'):
+            self.tt.new_search()
+        self.killers = [[None, None] for _ in range(self.max_depth + 1)]
+        self.history = [value // 8 for value in self.history]
+        self.__deadline = None
+        moves = game.possible_moves()
+        best_move = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                move, value = self._search_iteration(game, depth, moves)
+            except SearchTimeout as timeout:
+                if timeout.args and timeout.args[0] is not None:
+                    best_move, self.value = timeout.args
+                break
+            best_move, self.value, self.depth = move, value, depth
+            moves = [move] + [m for m in moves if m != move]
+            if abs(value) >= WIN_THRESHOLD:
+                break
+            if self.time_limit is not None:
+                self.__deadline = start + self.time_limit
+                if time.perf_counter() >= self.__deadline:
+                    break
+        return best_move
+
+    def search_window(self, game, depth, alpha, beta, time_limit=None):
+        """
+        Searches the game position to the fixed depth within the window, without iterative deepening. The position is
+        searched as a child of the root (ply 1), so it is used to search a single root move - see parallel module.
+
+        Parameters
+        ----------
+        game : Pentago
+        depth : int
+        alpha : float
+        beta : float
+        time_limit : float
+            seconds for the search, None searches without the time limit
+
+        Returns
+        -------
+        value : float
+            position value for the player to move
+
+        Raises
+        ------
+        SearchTimeout
+        """
+        self.nodes = 0
+        if len(self.killers) < depth + 2:
+            self.killers = [[None, None] for _ in range(max(self.max_depth, depth) + 2)]
+        self.__deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        return self._negamax(game, depth, alpha, beta, 1)
+
+    def _search_iteration(self, game, depth, moves):
+        """
+        Searches one iteration of the iterative deepening - all root moves with the full window.
+
+        Parameters
+        ----------
+        game : Pentago
+        depth : int
+        moves : 1D array[Move]
+            root moves, best move of the previous iteration first
+
+        Returns
+        -------
+        result : tuple
+            best move and its value
+        """
+        return self._search_root(game, depth, -INFINITY, INFINITY, moves)
+
+    def _search_root(self, game, depth, alpha, beta, moves):
+        """
+        Searches all root moves to the given depth.
+
+        Parameters
+        ----------
+        game : Pentago
+        depth : int
+        alpha : float
+        beta : float
+        moves : 1D array[Move]
+            root moves, best move of the previous iteration first
+
+        Returns
+        -------
+        result : tuple
+            best move and its value
+
+        Raises
+        ------
+        SearchTimeout
+            with the best move and value found so far as arguments (None when no move was finished)
+        """
+        best_move, best_value = None, -INFINITY
+        for move in moves:
+            game.make_move(move)
+            game.switch_player()
+            try:
+                value = -self._negamax(game, depth - 1, -beta, -max(alpha, best_value), 1)
+            except SearchTimeout:
+                raise SearchTimeout(best_move, best_value) if best_move is not None else SearchTimeout()
+            finally:
+                game.switch_player()
+                game.unmake_move(move)
+            if value > best_value:
+                best_move, best_value = move, value
+        self._store_root(game, depth, alpha, beta, best_move, best_value)
+        return best_move, best_value
+
+    def _store_root(self, game, depth, alpha, beta, move, value):
+        """
+        Stores root search result in the transposition table.
+
+        Parameters
+        ----------
+        game : Pentago
+        depth : int
+        alpha : float
+            root window lower bound
+        beta : float
+            root window upper bound
+        move : Move
+        value : int
+
+        Returns
+        -------
+        None
+        """
+        if self.tt is not None:
+            flag = UPPERBOUND if value <= alpha else LOWERBOUND if value >= beta else EXACT
+            self.tt.store(game=game, depth=depth, value=value, move=move, flag=flag)
+
+    def _negamax(self, game, depth, alpha, beta, ply):
+        """
+        Negamax with alpha-beta pruning and transposition table.
+
+        Parameters
+        ----------
+        game : Pentago
+        depth : int
+            remaining depth
+        alpha : float
+        beta : float
+        ply : int
+            distance from the root
+
+        Returns
+        -------
+        value : float
+            position value for the player to move
+        """
+        self.nodes += 1
+        if self.nodes & 255 == 0:
+            self._check_time()
+        if depth == 0 or game.is_over():
+            return self._evaluate(game, ply)
+        alpha_orig = alpha
+        tt_move = None
+        if self.tt is not None:
+            entry = self.tt.lookup(game)
+            if entry is not None:
+                tt_move = entry['move']
+                if entry['depth'] >= depth:
+                    value = value_from_tt(entry['value'], ply)
+                    flag = entry['flag']
+                    if flag == EXACT:
+                        return value
+                    elif flag == LOWERBOUND:
+                        alpha = max(alpha, value)
+                    elif flag == UPPERBOUND:
+                        beta = min(beta, value)
+                    if alpha >= beta:
+                        return value
+        moves = self._order_moves(game.possible_moves(), tt_move, ply)
+        if depth == 1 and self.leaves is not None:
+            best_move, best_value = self._search_leaves(game, moves, alpha, beta, ply)
+        else:
+            best_move, best_value = moves[0], -INFINITY
+            for move in moves:
+                game.make_move(move)
+                game.switch_player()
+                try:
+                    value = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+                finally:
+                    game.switch_player()
+                    game.unmake_move(move)
+                if value > best_value:
+                    best_move, best_value = move, value
+                    if value > alpha:
+                        alpha = value
+                        if alpha >= beta:
+                            self._update_cutoff(move, depth, ply)
+                            break
+        if self.tt is not None:
+            if best_value <= alpha_orig:
+                flag = UPPERBOUND
+            elif best_value >= beta:
+                flag = LOWERBOUND
+            else:
+                flag = EXACT
+            self.tt.store(game=game, depth=depth, value=value_to_tt(best_value, ply), move=best_move, flag=flag)
+        return best_value
+
+    def _evaluate(self, game, ply):
+        """
+        Scores position which is not searched any deeper. Lost game is scored by the number of plies to it, so the AI
+        prefers quick wins and delays losses. With the threat-space search, winning move of the player to move found
+        at the leaf is scored the same way (see ThreatSolver.quiescence).
+
+        Parameters
+        ----------
+        game : Pentago
+        ply : int
+
+        Returns
+        -------
+        value : float
+        """
+        score = game.scoring()
+        if score <= -WIN_SCORE:
+            return ply - WIN_SCORE
+        if self.threats is not None:
+            plies = self.threats.quiescence(game)
+            if plies is not None:
+                return WIN_SCORE - ply - plies
+        return score
+
+    def _search_leaves(self, game, moves, alpha, beta, ply):
+        """
+        Searches the frontier node (depth 1) - the first SCALAR_LEAVES leaves one by one, then all the rest in one
+        call of the leaf evaluator. Values are the same as searching the leaves one by one, so cutoffs, killers and
+        history are updated the same way. Every scored leaf counts as a node.
+
+        Parameters
+        ----------
+        game : Pentago
+        moves : 1D array[Move]
+            ordered moves of the node
+        alpha : float
+        beta : float
+        ply : int
+            distance from the root
+
+        Returns
+        -------
+        result : tuple
+            best move and its value
+        """
+        best_move, best_value = moves[0], -INFINITY
+        for i, move in enumerate(moves):
+            if i < self.SCALAR_LEAVES:
+                game.make_move(move)
+                game.switch_player()
+                try:
+                    value = -self._negamax(game, 0, -beta, -alpha, ply + 1)
+                finally:
+                    game.switch_player()
+                    game.unmake_move(move)
+            else:
+                if i == self.SCALAR_LEAVES:
+                    nodes = self.nodes
+                    self.nodes += len(moves) - i
+                    if nodes >> 8 != self.nodes >> 8:
+                        self._check_time()
+                    values = self.leaves.evaluate(game, moves[i:], ply, self.threats)
+                value = values[i - self.SCALAR_LEAVES]
+            if value > best_value:
+                best_move, best_value = move, value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        self._update_cutoff(move, 1, ply)
+                        break
+        return best_move, best_value
+
+    def _order_moves(self, moves, tt_move, ply):
+        """
+        Orders moves - transposition table move, killers, then the rest by the history heuristic.
+
+        Parameters
+        ----------
+        moves : 1D array[Move]
+        tt_move : Move
+            might be None
+        ply : int
+
+        Returns
+        -------
+        moves : 1D array[Move]
+        """
+        moves.sort(key=self.history.__getitem__, reverse=True)
+        first = []
+        for move in (tt_move, *self.killers[ply]):
+            if move is not None and move not in first and move in moves:
+                first.append(move)
+        if first:
+            moves = first + [move for move in moves if move not in first]
+        return moves
+
+    def _update_cutoff(self, move, depth, ply):
+        """
+        Remembers the move which caused beta cutoff as a killer and in the history.
+
+        Parameters
+        ----------
+        move : Move
+        depth : int
+        ply : int
+
+        Returns
+        -------
+        None
+        """
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move] += depth * depth
+
+    def _check_time(self):
+        """
+        Stops the search when the time budget is used up.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        SearchTimeout
+        """
+        if self.__deadline is not None and time.perf_counter() >= self.__deadline:
+            raise SearchTimeout()
+
+
+class PVSearch(IterativeDeepening):
+    """
+    Class to represent dedicated Pentago AI - iterative deepening with principal variation search and aspiration
+    windows, replacing easyAI Negamax.
+
+    Principal variation search searches the first (best ordered) move with the full window and every other move with
+    the null window (alpha, alpha + 1) - it only proves the move is not better, which cuts off much more. When the
+    null window search fails high, the move is searched again with the full window. Scores have to be integers.
+    Aspiration windows start every iteration with a narrow window around the previous iteration value, widening it
+    only when the value falls outside.
+
+    Players are switched directly on the Pentago game (nplayer) instead of going through easyAI switch_player().
+
+    Attributes
+    ----------
+    aspiration_window : int
+        half width of the first root window, None searches every iteration with the full window
+    researches : int
+        number of null window and aspiration re-searches during the last search
+
+    Methods
+    -------
+    search(game):
+        Searches the game position with iterative deepening.
+    _search_iteration(game, depth, moves):
+        Searches one iteration with aspiration windows.
+    _search_root(game, depth, alpha, beta, moves):
+        Principal variation search of all root moves.
+    _negamax(game, depth, alpha, beta, ply):
+        Principal variation search with transposition table.
+    """
+
+    ASPIRATION_WINDOW = 8
+
+    def __init__(self, max_depth=64, time_limit=1.0, tt=None, aspiration_window=ASPIRATION_WINDOW, threats=None,
+                 leaves=None):
+        """
+        Creates all attributes needed for the principal variation search AI.
+
+        Parameters
+        ----------
+        max_depth : int
+        time_limit : float
+            seconds per move, None searches up to max_depth
+        tt : BoundedTT/TT
+        aspiration_window : int
+            half width of the first root window, None disables aspiration windows
+        threats : ThreatSolver
+            checks every leaf for a forced win of the player to move, None scores leaves only by the evaluation
+        leaves : LeafEvaluator
+            scores all leaves of a frontier node in one call, None makes and scores them one by one
+        """
+        super().__init__(max_depth, time_limit, tt, threats, leaves)
+        self.aspiration_window = aspiration_window
+        self.researches = 0
+
+    def search(self, game):
+        """
+        Searches the game position with iterative deepening.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        self.researches = 0
+        return super().search(game)
+
+    def _search_iteration(self, game, depth, moves):
+        """
+        Searches one iteration with aspiration windows - the window around the previous iteration value is widened
+        (4 times on the failed side) until the value falls inside. First iteration and won/lost values are searched
+        with the full window. When the time runs out the partial result is used only if it beats the window lower
+        bound.
+
+        Parameters
+        ----------
+        game : Pentago
+        depth : int
+        moves : 1D array[Move]
+            root moves, best move of the previous iteration first
+
+        Returns
+        -------
+        result : tuple
+            best move and its value
+        """
+        if self.aspiration_window is None or self.depth == 0 or abs(self.value) >= WIN_THRESHOLD:
+            return self._search_root(game, depth, -INFINITY, INFINITY, moves)
+        low = high = self.aspiration_window
+        while True:
+            alpha = self.value - low if low is not None else -INFINITY
+            beta = self.value + high if high is not None else INFINITY
+            try:
+                move, value = self._search_root(game, depth, alpha, beta, moves)
+            except SearchTimeout as timeout:
+                if timeout.args and timeout.args[1] > alpha:
+                    raise
+                raise SearchTimeout()
+            if value <= alpha:
+                low = low * 4 if low < WIN_SCORE else None
+            elif value >= beta:
+                high = high * 4 if high < WIN_SCORE else None
+            else:
+                return move, value
+            self.researches += 1
+            moves = [move] + [m for m in moves if m != move]
+
+    def _search_root(self, game, depth, alpha, beta, moves):
+        """
+        Principal variation search of all root moves.
+
+        Parameters
+        ----------
+        game : Pentago
+        depth : int
+        alpha : float
+        beta : float
+        moves : 1D array[Move]
+            root moves, best move of the previous iteration first
+
+        Returns
+        -------
+        result : tuple
+            best move and its value
+
+        Raises
+        ------
+        SearchTimeout
+            with the best move and value found so far as arguments (None when no move was finished)
+        """
+        alpha_orig = alpha
+        best_move, best_value = None, -INFINITY
+        for move in moves:
+            game.make_move(move)
+            game.nplayer = 3 - game.nplayer
+            try:
+                if best_move is None:
+                    value = -self._negamax(game, depth - 1, -beta, -alpha, 1)
+                else:
+                    value = -self._negamax(game, depth - 1, -alpha - 1, -alpha, 1)
+                    if alpha < value < beta:
+                        self.researches += 1
+                        value = -self._negamax(game, depth - 1, -beta, -alpha, 1)
+            except SearchTimeout:
+                raise SearchTimeout(best_move, best_value) if best_move is not None else SearchTimeout()
+            finally:
+                game.nplayer = 3 - game.nplayer
+                game.unmake_move(move)
+            if value > best_value:
+                best_move, best_value = move, value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        self._store_root(game, depth, alpha_orig, beta, best_move, best_value)
+        return best_move, best_value
+
+    def _negamax(self, game, depth, alpha, beta, ply):
+        """
+        Principal variation search with transposition table.
+
+        Parameters
+        ----------
+        game : Pentago
+        depth : int
+            remaining depth
+        alpha : float
+        beta : float
+        ply : int
+            distance from the root
+
+        Returns
+        -------
+        value : int
+            position value for the player to move
+        """
+        self.nodes += 1
+        if self.nodes & 255 == 0:
+            self._check_time()
+        if depth == 0 or game.is_over():
+            return self._evaluate(game, ply)
+        alpha_orig = alpha
+        tt_move = None
+        if self.tt is not None:
+            entry = self.tt.lookup(game)
+            if entry is not None:
+                tt_move = entry['move']
+                if entry['depth'] >= depth:
+                    value = value_from_tt(entry['value'], ply)
+                    flag = entry['flag']
+                    if flag == EXACT:
+                        return value
+                    elif flag == LOWERBOUND:
+                        alpha = max(alpha, value)
+                    elif flag == UPPERBOUND:
+                        beta = min(beta, value)
+                    if alpha >= beta:
+                        return value
+        moves = self._order_moves(game.possible_moves(), tt_move, ply)
+        if depth == 1 and self.leaves is not None:
+            best_move, best_value = self._search_leaves(game, moves, alpha, beta, ply)
+        else:
+            best_move, best_value = moves[0], -INFINITY
+            for move in moves:
+                game.make_move(move)
+                game.nplayer = 3 - game.nplayer
+                try:
+                    if best_value == -INFINITY:
+                        value = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+                    else:
+                        value = -self._negamax(game, depth - 1, -alpha - 1, -alpha, ply + 1)
+                        if alpha < value < beta:
+                            self.researches += 1
+                            value = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+                finally:
+                    game.nplayer = 3 - game.nplayer
+                    game.unmake_move(move)
+                if value > best_value:
+                    best_move, best_value = move, value
+                    if value > alpha:
+                        alpha = value
+                        if alpha >= beta:
+                            self._update_cutoff(move, depth, ply)
+                            break
+        if self.tt is not None:
+            if best_value <= alpha_orig:
+                flag = UPPERBOUND
+            elif best_value >= beta:
+                flag = LOWERBOUND
+            else:
+                flag = EXACT
+            self.tt.store(game=game, depth=depth, value=value_to_tt(best_value, ply), move=best_move, flag=flag)
+        return best_value
+
+
+def value_to_tt(value, ply):
+    """
+    Converts won/lost game value from the distance to the root to the distance to the stored position.
+
+    Parameters
+    ----------
+    value : float
+    ply : int
+
+    Returns
+    -------
+    value : float
+    """
+    if value >= WIN_THRESHOLD:
+        return value + ply
+    if value <= -WIN_THRESHOLD:
+        return value - ply
+    return value
+
+
+def value_from_tt(value, ply):
+    """
+    Converts won/lost game value from the distance to the stored position to the distance to the root.
+
+    Parameters
+    ----------
+    value : float
+    ply : int
+
+    Returns
+    -------
+    value : float
+    """
+    if value >= WIN_THRESHOLD:
+        return value - ply
+    if value <= -WIN_THRESHOLD:
+        return value + ply
+    return value
+
+
+def search_remaining(algo, game, elapsed):
+    """
+    Searches the move by the algorithm with the time limit reduced by the seconds already spent on the move (e.g. by
+    a solver tried first). The limit belongs to the algorithm or to the first algorithm it wraps (see
+    EndgameSearch.algo) which has one, and it is restored afterwards. Algorithms without the time limit search as usual.
+
+    Parameters
+    ----------
+    algo : PVSearch/RootParallelSearch/MCTS/EndgameSearch
+    game : Pentago
+    elapsed : float
+
+    Returns
+    -------
+    move : Move
+    """
+    limited = algo
+    while not hasattr(limited, 'time_limit') and getattr(limited, 'algo', None) is not None:
+        limited = limited.algo
+    time_limit = getattr(limited, 'time_limit', None)
+    if time_limit is None:
+        return algo(game)
+    limited.time_limit = max(time_limit - elapsed, 0)
+    try:
+        return algo(game)
+    finally:
+        limited.time_limit = time_limit
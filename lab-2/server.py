@@ -0,0 +1,356 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import argparse
+import asyncio
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pentago import Pentago
+from search import PVSearch
+from transposition import BoundedTT
+from move import MOVES
+
+DRAW = 0
+DEFAULT_PORT = 8765
+
+# Search of the worker process, created once by init_worker - keeps its transposition table between games.
+__worker_search = None
+
+
+def init_worker(max_depth, time_limit, megabytes):
+    """
+    Creates the search used by the worker process.
+
+    Parameters
+    ----------
+    max_depth : int
+    time_limit : float
+        seconds per AI move
+    megabytes : float
+        transposition table size of the worker
+
+    Returns
+    -------
+    None
+    """
+    global __worker_search
+    __worker_search = PVSearch(max_depth=max_depth, time_limit=time_limit,
+                               tt=BoundedTT(megabytes=megabytes, replacement='two-tier'))
+
+
+def search_move(game_class, state):
+    """
+    Searches the AI move in the worker process.
+
+    Parameters
+    ----------
+    game_class : type
+        game class providing from_state, e.g. Pentago
+    state : tuple(int)
+        compact game position, see Pentago.get_state
+
+    Returns
+    -------
+    move : int
+        move code, see move module
+    """
+    return int(__worker_search(game_class.from_state(state)))
+
+
+class PentagoServer:
+    """
+    Class to represent asyncio server hosting many Pentago games against the AI at once.
+
+    Protocol is one JSON object per line in both directions. Requests:
+    - {"command": "new", "ai_first": false} - starts the game, the AI moves first when ai_first is true,
+    - {"command": "move", "game": 1, "move": "14 1 r"} - plays the human move and answers with the AI move,
+    - {"command": "close", "game": 1} - ends the game.
+    Every response holds the game id, the compact state (see Pentago.get_state), the AI move (None when the AI did not
+    move), whether the game is over and the winner (0 for a draw, None when the game is not over). Invalid requests
+    are answered with {"error": "..."}.
+
+    Games are kept only as compact states, so a game costs three integers. AI moves are searched on a pool of worker
+    processes (each one with its own search and transposition table, see init_worker), so the event loop only parses
+    requests and makes moves - it never blocks on the search. Requests of one connection are answered in order, many
+    connections are served at once. Games of a connection are closed when it disconnects.
+
+    Attributes
+    ----------
+    host : str
+    port : int
+    game_class : type
+        game class providing get_state and from_state, e.g. Pentago
+    games : dict
+        compact state of every hosted game
+    executor : ProcessPoolExecutor
+        worker processes searching the AI moves
+
+    Methods
+    -------
+    serve():
+        Accepts connections until the server is cancelled.
+    handle_request(request, owned):
+        Executes one request.
+    close():
+        Stops the worker processes.
+    __handle_connection(reader, writer):
+        Answers requests of one connection.
+    __new_game(request):
+        Starts the game.
+    __play_move(request):
+        Plays the human move and the AI answer.
+    __ai_move(game):
+        Searches the AI move on the worker pool and plays it.
+    __response(game_id, game, ai_move):
+        Creates the response for the game position.
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, workers=None, max_depth=64, time_limit=0.2,
+                 megabytes=16, game_class=Pentago):
+        """
+        Creates all attributes needed for the server. Worker processes are started here.
+
+        Parameters
+        ----------
+        host : str
+        port : int
+        workers : int
+            number of worker processes, number of CPUs by default
+        max_depth : int
+        time_limit : float
+            seconds per AI move
+        megabytes : float
+            transposition table size of every worker
+        game_class : type
+        """
+        self.host = host
+        self.port = port
+        self.game_class = game_class
+        self.games = {}
+        self.executor = ProcessPoolExecutor(workers, initializer=init_worker,
+                                            initargs=(max_depth, time_limit, megabytes))
+        self.__ids = itertools.count(1)
+
+    async def serve(self):
+        """
+        Accepts connections until the server is cancelled.
+
+        Returns
+        -------
+        None
+        """
+        server = await asyncio.start_server(self.__handle_connection, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+    async def __handle_connection(self, reader, writer):
+        """
+        Answers requests of one connection, one line each, until it disconnects. Games started by the connection are
+        closed afterwards.
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+        writer : asyncio.StreamWriter
+
+        Returns
+        -------
+        None
+        """
+        owned = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self.handle_request(json.loads(line), owned)
+                except (ValueError, KeyError, TypeError) as error:
+                    response = {'error': str(error)}
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in owned:
+                self.games.pop(game_id, None)
+            writer.close()
+
+    async def handle_request(self, request, owned):
+        """
+        Executes one request.
+
+        Parameters
+        ----------
+        request : dict
+        owned : set
+            ids of the games started by the connection, only they can be played
+
+        Returns
+        -------
+        response : dict
+
+        Raises
+        ------
+        ValueError
+            when the request is invalid
+        """
+        if not isinstance(request, dict):
+            raise ValueError("Request should be a JSON object, got: %s" % json.dumps(request))
+        command = request.get('command')
+        if command == 'new':
+            if not isinstance(request.get('ai_first', False), bool):
+                raise ValueError("ai_first should be true or false")
+            response = await self.__new_game(request)
+            owned.add(response['game'])
+            return response
+        if command not in ('move', 'close'):
+            raise ValueError("Unknown command: %s" % command)
+        game_id = request.get('game')
+        if not isinstance(game_id, int) or isinstance(game_id, bool) or game_id not in owned or \
+                game_id not in self.games:
+            raise ValueError("Unknown game: %s" % game_id)
+        if command == 'move':
+            if not isinstance(request.get('move'), str):
+                raise ValueError("Move should be a string, e.g. \"14 1 r\"")
+            return await self.__play_move(request)
+        owned.discard(game_id)
+        self.games.pop(game_id)
+        return {'game': game_id, 'closed': True}
+
+    async def __new_game(self, request):
+        """
+        Starts the game - the AI moves first when requested.
+
+        Parameters
+        ----------
+        request : dict
+
+        Returns
+        -------
+        response : dict
+        """
+        game_id = next(self.__ids)
+        game = self.game_class([None, None])
+        self.games[game_id] = game.get_state()
+        ai_move = None
+        if request.get('ai_first'):
+            ai_move = await self.__ai_move(game)
+            self.games[game_id] = game.get_state()
+        return self.__response(game_id, game, ai_move)
+
+    async def __play_move(self, request):
+        """
+        Plays the human move and, when the game is not over, the AI answer.
+
+        Parameters
+        ----------
+        request : dict
+
+        Returns
+        -------
+        response : dict
+
+        Raises
+        ------
+        ValueError
+            when the move is not legal or the game is over
+        """
+        game_id = request['game']
+        game = self.game_class.from_state(self.games[game_id])
+        if game.is_over():
+            raise ValueError("Game %d is over" % game_id)
+        move = game.parse_move(request['move'])
+        if move not in game.legal_moves():
+            raise ValueError("Illegal move: %s" % request['move'])
+        game.play_move(move)
+        self.games[game_id] = game.get_state()
+        ai_move = None
+        if not game.is_over():
+            ai_move = await self.__ai_move(game)
+            self.games[game_id] = game.get_state()
+        return self.__response(game_id, game, ai_move)
+
+    async def __ai_move(self, game):
+        """
+        Searches the AI move on the worker pool and plays it.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        loop = asyncio.get_running_loop()
+        move = MOVES[await loop.run_in_executor(self.executor, search_move, self.game_class, game.get_state())]
+        game.play_move(move)
+        return move
+
+    @staticmethod
+    def __response(game_id, game, ai_move):
+        """
+        Creates the response for the game position.
+
+        Parameters
+        ----------
+        game_id : int
+        game : Pentago
+        ai_move : Move
+            None when the AI did not move
+
+        Returns
+        -------
+        response : dict
+        """
+        over = game.is_over()
+        winner = None
+        if over:
+            winner = game.nopponent if game.winners[game.nopponent - 1] else DRAW
+        return {'game': game_id, 'state': list(game.get_state()), 'ai_move': None if ai_move is None else str(ai_move),
+                'over': over, 'winner': winner}
+
+    def close(self):
+        """
+        Stops the worker processes.
+
+        Returns
+        -------
+        None
+        """
+        self.executor.shutdown()
+
+
+def main():
+    """
+    Runs the game server until it is interrupted.
+
+    Returns
+    -------
+    None
+    """
+    parser = argparse.ArgumentParser(description="Pentago game server - many games against the AI at once.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes searching AI moves, number of CPUs by default")
+    parser.add_argument("--time", type=float, default=0.2, help="seconds per AI move")
+    parser.add_argument("--depth", type=int, default=64, help="maximum search depth")
+    parser.add_argument("--megabytes", type=float, default=16, help="transposition table size of every worker")
+    args = parser.parse_args()
+
+    server = PentagoServer(args.host, args.port, args.workers, args.depth, args.time or None, args.megabytes)
+    print("Serving Pentago on %s:%d" % (args.host, args.port))
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+from bitboard import QUADRANTS_COUNT, QUADRANT_POSITIONS_COUNT, QUADRANT_PATTERNS_COUNT, QUADRANT_MASK, \
+    POSITIONS_COUNT
+from zobrist import QUADRANT_KEYS
+
+BOARD_SIZE = 6
+QUADRANT_SIZE = 3
+
+# 8 symmetries of the square board as (row, column) mappings - first 4 are rotations, last 4 are reflections.
+# Every one of them maps quadrants onto quadrants and win lines onto win lines, so symmetric positions have the
+# same game value.
+SYMMETRIES = [
+    lambda row, col: (row, col),
+    lambda row, col: (col, BOARD_SIZE - 1 - row),
+    lambda row, col: (BOARD_SIZE - 1 - row, BOARD_SIZE - 1 - col),
+    lambda row, col: (BOARD_SIZE - 1 - col, row),
+    lambda row, col: (row, BOARD_SIZE - 1 - col),
+    lambda row, col: (BOARD_SIZE - 1 - row, col),
+    lambda row, col: (col, row),
+    lambda row, col: (BOARD_SIZE - 1 - col, BOARD_SIZE - 1 - row),
+]
+SYMMETRIES_COUNT = len(SYMMETRIES)
+IDENTITY = 0
+
+
+def position_to_coordinates(position):
+    """
+    Converts position index to board coordinates.
+
+    Parameters
+    ----------
+    position : int
+        values from 0
+
+    Returns
+    -------
+    coordinates : tuple(int)
+        row and column, values from 0
+    """
+    quadrant, quadrant_position = divmod(position, QUADRANT_POSITIONS_COUNT)
+    row = quadrant // 2 * QUADRANT_SIZE + quadrant_position // QUADRANT_SIZE
+    col = quadrant % 2 * QUADRANT_SIZE + quadrant_position % QUADRANT_SIZE
+    return row, col
+
+
+def coordinates_to_position(row, col):
+    """
+    Converts board coordinates to position index.
+
+    Parameters
+    ----------
+    row : int
+    col : int
+
+    Returns
+    -------
+    position : int
+        values from 0
+    """
+    quadrant = row // QUADRANT_SIZE * 2 + col // QUADRANT_SIZE
+    return quadrant * QUADRANT_POSITIONS_COUNT + row % QUADRANT_SIZE * QUADRANT_SIZE + col % QUADRANT_SIZE
+
+
+# SYMMETRY_POSITIONS[s][i] - position index which position index i is mapped onto by symmetry s.
+SYMMETRY_POSITIONS = [[coordinates_to_position(*symmetry(*position_to_coordinates(position)))
+                       for position in range(POSITIONS_COUNT)]
+                      for symmetry in SYMMETRIES]
+# SYMMETRY_QUADRANTS[s][q] - quadrant which quadrant q is mapped onto by symmetry s.
+SYMMETRY_QUADRANTS = [[positions[quadrant * QUADRANT_POSITIONS_COUNT] // QUADRANT_POSITIONS_COUNT
+                       for quadrant in range(QUADRANTS_COUNT)]
+                      for positions in SYMMETRY_POSITIONS]
+# Reflections turn clockwise quadrant rotations into anticlockwise ones.
+SYMMETRY_REFLECTS = [s >= 4 for s in range(SYMMETRIES_COUNT)]
+# INVERSE_SYMMETRIES[s] - symmetry undoing symmetry s.
+INVERSE_SYMMETRIES = [next(t for t in range(SYMMETRIES_COUNT)
+                           if all(SYMMETRY_POSITIONS[t][SYMMETRY_POSITIONS[s][i]] == i for i in range(POSITIONS_COUNT)))
+                      for s in range(SYMMETRIES_COUNT)]
+
+
+def symmetry_pattern(positions, pattern):
+    """
+    Maps 9 bit quadrant pattern with the symmetry. Quadrant positions are moved the same way in every quadrant, so
+    the first quadrant positions are used.
+
+    Parameters
+    ----------
+    positions : 1D array[int]
+        one of the SYMMETRY_POSITIONS values
+    pattern : int
+
+    Returns
+    -------
+    pattern : int
+    """
+    mapped = 0
+    for i in range(QUADRANT_POSITIONS_COUNT):
+        if pattern >> i & 1:
+            mapped |= 1 << positions[i] % QUADRANT_POSITIONS_COUNT
+    return mapped
+
+
+# SYMMETRY_PATTERNS[s][pattern] - quadrant pattern after applying symmetry s.
+SYMMETRY_PATTERNS = [[symmetry_pattern(positions, pattern) for pattern in range(QUADRANT_PATTERNS_COUNT)]
+                     for positions in SYMMETRY_POSITIONS]
+
+
+def transform_bitboard(bitboard, symmetry):
+    """
+    Applies symmetry to the player bitboard.
+
+    Parameters
+    ----------
+    bitboard : int
+    symmetry : int
+        values from 0 to 7
+
+    Returns
+    -------
+    bitboard : int
+    """
+    patterns = SYMMETRY_PATTERNS[symmetry]
+    quadrants = SYMMETRY_QUADRANTS[symmetry]
+    transformed = 0
+    for quadrant in range(QUADRANTS_COUNT):
+        pattern = bitboard >> (quadrant * QUADRANT_POSITIONS_COUNT) & QUADRANT_MASK
+        transformed |= patterns[pattern] << (quadrants[quadrant] * QUADRANT_POSITIONS_COUNT)
+    return transformed
+
+
+def canonical_hash(bitboard1, bitboard2):
+    """
+    Maps the position onto one representative of its 8 symmetric copies - the copy with the smallest Zobrist hash.
+    Hashes of the copies are built from the quadrant pattern keys, so no transformed bitboard is needed.
+
+    Parameters
+    ----------
+    bitboard1 : int
+        player 1 bitboard
+    bitboard2 : int
+        player 2 bitboard
+
+    Returns
+    -------
+    canonical : tuple(int)
+        Zobrist hash of the representative and symmetry which maps the position onto it
+    """
+    patterns = [(bitboard >> (quadrant * QUADRANT_POSITIONS_COUNT) & QUADRANT_MASK, quadrant, player_keys)
+                for player_keys, bitboard in zip(QUADRANT_KEYS, (bitboard1, bitboard2))
+                for quadrant in range(QUADRANTS_COUNT)]
+    patterns = [item for item in patterns if item[0]]
+    best_key = best_symmetry = None
+    for symmetry in range(SYMMETRIES_COUNT):
+        symmetry_patterns = SYMMETRY_PATTERNS[symmetry]
+        quadrants = SYMMETRY_QUADRANTS[symmetry]
+        key = 0
+        for pattern, quadrant, player_keys in patterns:
+            key ^= player_keys[quadrants[quadrant]][symmetry_patterns[pattern]]
+        if best_key is None or key < best_key:
+            best_key = key
+            best_symmetry = symmetry
+    return best_key, best_symmetry
@@ -0,0 +1,435 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import time
+from bitboard import QUADRANT_MASKS, FULL_BOARD, WIN_MASKS, rotate_bitboard, bit_positions
+from board import MOVE_ROTATION_TABLES
+from move import MOVES, MOVES_PER_POSITION
+from search import SearchTimeout, search_remaining
+
+
+def rotation_preimages(quadrant, direction):
+    """
+    Returns stones which the rotation turns into every win line - lines not touching the quadrant stay the same.
+
+    Parameters
+    ----------
+    quadrant : int
+    direction : int
+        move direction bit
+
+    Returns
+    -------
+    masks : 1D array[int]
+    """
+    inverse = MOVE_ROTATION_TABLES[direction ^ 1]
+    return [rotate_bitboard(mask, quadrant, inverse) if mask & QUADRANT_MASKS[quadrant] else mask
+            for mask in WIN_MASKS]
+
+
+# ROTATION_PREIMAGES[offset] - stones becoming the win lines after the rotation with the move code offset
+# (quadrant * 2 + direction bit). Player who covers a preimage after placing a stone wins with that rotation.
+ROTATION_PREIMAGES = [rotation_preimages(offset >> 1, offset & 1) for offset in range(MOVES_PER_POSITION)]
+# Preimages of all the rotations together - a player covering 4 stones of any of them (and the 5th one empty) wins.
+WINNING_MASKS = list(dict.fromkeys(mask for masks in ROTATION_PREIMAGES for mask in masks))
+
+
+def four_lines(mover, opponent):
+    """
+    Returns win lines holding 4 mover stones and none of the opponent - placing on the empty position wins.
+
+    Parameters
+    ----------
+    mover : int
+        bitboard of the player whose fours are returned
+    opponent : int
+
+    Returns
+    -------
+    lines : 1D array[int]
+        win line masks
+    """
+    lines = []
+    for mask in WIN_MASKS:
+        missing = mask & ~mover
+        if missing and not missing & (missing - 1) and not mask & opponent:
+            lines.append(mask)
+    return lines
+
+
+def can_win(mover, opponent):
+    """
+    Checks whether the player to move can win with one move - by placing a stone so that it completes a win line
+    at once or after any rotation. Preimages of the win lines are used, so nothing is rotated.
+
+    Parameters
+    ----------
+    mover : int
+        bitboard of the player to move
+    opponent : int
+
+    Returns
+    -------
+    can_win : bool
+    """
+    not_mover = ~mover
+    for mask in WINNING_MASKS:
+        if not mask & opponent:
+            missing = mask & not_mover
+            if not missing & (missing - 1):
+                return True
+    return False
+
+
+def threat_moves(mover, opponent):
+    """
+    Returns moves after which the player has a four - placing on a line preimage holding 3 of his stones, or rotating
+    a preimage holding 4 of them into the line. Player must not have a winning move, so every generated move rotates.
+    Moves are computed on the bitboards without making them.
+
+    Parameters
+    ----------
+    mover : int
+        bitboard of the player to move
+    opponent : int
+
+    Returns
+    -------
+    moves : 1D array[Move]
+    """
+    empty = ~(mover | opponent) & FULL_BOARD
+    moves = []
+    for offset, masks in enumerate(ROTATION_PREIMAGES):
+        for mask in masks:
+            if mask & opponent:
+                continue
+            missing = mask & ~mover
+            rest = missing & (missing - 1)
+            if not rest:
+                positions = bit_positions(empty)
+            elif not rest & (rest - 1):
+                positions = bit_positions(missing)
+            else:
+                continue
+            moves.extend(MOVES[position * MOVES_PER_POSITION + offset] for position in positions)
+    return list(dict.fromkeys(moves))
+
+
+class ThreatSolver:
+    """
+    Class to represent threat-space search - looks for forced wins made only of threats (like VCF in gomoku).
+
+    Attacker (the player to move) only plays threats - moves after which he has a four: a win line holding 4 of his
+    stones and an empty position, so he wins by placing there in his next move. Defender has to answer every threat,
+    and every one of his moves is tried - the ones which do not remove all the fours (by placing on the empty position
+    or rotating the line apart) lose at once, so only a few defences are searched deeper. The attacker wins when every
+    defence loses, so a found win is a real forced win, while a missed one only means the win is not made of threats.
+    Because only forcing moves are searched, wins many moves deep are found in milliseconds.
+
+    Attributes
+    ----------
+    max_threats : int
+        maximum number of attacker threats in the winning sequence
+    max_nodes : int
+        node cap per solve, search gives up when it is reached
+    time_limit : float
+        seconds per solve, None for no limit
+    max_entries : int
+        transposition table is cleared when it holds that many positions
+    tt : dict
+        number of threats searched, plies to win (None when no win was found) and winning move of every position
+    nodes : int
+        number of positions visited during the last solve
+
+    Methods
+    -------
+    solve(game, max_threats):
+        Finds the forced win of the player to move and its first move.
+    plies_to_win(game, max_threats, max_nodes, time_limit):
+        Returns number of plies to the forced win of the player to move.
+    quiescence(game):
+        Checks the leaf of the main search for a winning move.
+    _attack(game, threats):
+        Searches attacker threats.
+    _defend(game, threats):
+        Searches all defender moves against the threat.
+    """
+
+    def __init__(self, max_threats=4, max_nodes=20000, max_entries=2 ** 20, time_limit=None):
+        """
+        Creates all attributes needed for the threat-space search.
+
+        Parameters
+        ----------
+        max_threats : int
+        max_nodes : int
+        max_entries : int
+        time_limit : float
+            seconds per solve, None for no limit
+        """
+        self.max_threats = max_threats
+        self.max_nodes = max_nodes
+        self.max_entries = max_entries
+        self.time_limit = time_limit
+        self.tt = {}
+        self.nodes = 0
+        self.__node_limit = max_nodes
+        self.__deadline = None
+
+    def solve(self, game, max_threats=None):
+        """
+        Finds the forced win of the player to move and its first move. Sequences with 1, 2, 3... threats are searched
+        one after another, so the shortest win is found first.
+
+        Parameters
+        ----------
+        game : Pentago
+        max_threats : int
+            max_threats attribute by default
+
+        Returns
+        -------
+        result : tuple
+            winning move and number of plies to the win, None when no win was found
+        """
+        plies = self.plies_to_win(game, max_threats, time_limit=self.time_limit)
+        if plies is None:
+            return None
+        if plies == 1:
+            player = game.nplayer
+            for move in game.possible_moves():
+                game.make_move(move)
+                won = game.winners[player - 1]
+                game.unmake_move(move)
+                if won:
+                    return move, plies
+        return self.tt[game.ttentry()][2], plies
+
+    def plies_to_win(self, game, max_threats=None, max_nodes=None, time_limit=None):
+        """
+        Returns number of plies to the forced win of the player to move, searched with increasing number of threats.
+
+        Parameters
+        ----------
+        game : Pentago
+        max_threats : int
+            max_threats attribute by default
+        max_nodes : int
+            max_nodes attribute by default
+        time_limit : float
+            seconds for the search, None searches without the time limit
+
+        Returns
+        -------
+        plies : int
+            None when no win was found within the threats, nodes and time
+        """
+        self.nodes = 0
+        self.__node_limit = self.max_nodes if max_nodes is None else max_nodes
+        self.__deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        if len(self.tt) >= self.max_entries:
+            self.tt.clear()
+        try:
+            for threats in range(self.max_threats + 1 if max_threats is None else max_threats + 1):
+                plies = self._attack(game, threats)
+                if plies is not None:
+                    return plies
+        except SearchTimeout:
+            pass
+        return None
+
+    def quiescence(self, game):
+        """
+        Checks the leaf of the main search for a winning move of the player to move, directly on the bitboards -
+        searching threats at every leaf costs more than it finds, so only solve looks for longer wins. Game over
+        position is never won - on the full board a winning combination of the player to move is only a draw.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        plies : int
+            None when no win was found
+        """
+        if game.is_over():
+            return None
+        if game.winners[game.nplayer - 1] or game.board.has_four(game.nplayer):
+            return 1
+        mover, opponent = game.board.get_bitboards()
+        if game.nplayer == 2:
+            mover, opponent = opponent, mover
+        return 1 if can_win(mover, opponent) else None
+
+    def _attack(self, game, threats):
+        """
+        Searches attacker threats - the attacker wins at once when he can win with one move (or already has a winning
+        combination), otherwise every move leaving him with a four is searched against all defences. Game over
+        position is not won by the attacker - he either lost or the board is full.
+
+        Parameters
+        ----------
+        game : Pentago
+            attacker to move
+        threats : int
+            number of threats the attacker can still make
+
+        Returns
+        -------
+        plies : int
+            number of plies to the win, None when no win was found
+
+        Raises
+        ------
+        SearchTimeout
+            when the node or time cap is reached
+        """
+        self.nodes += 1
+        if self.nodes >= self.__node_limit:
+            raise SearchTimeout()
+        if self.__deadline is not None and self.nodes & 255 == 0 and time.perf_counter() >= self.__deadline:
+            raise SearchTimeout()
+        attacker, defender = game.nplayer, game.nopponent
+        if game.is_over():
+            return None
+        if game.winners[attacker - 1] or game.board.has_four(attacker):
+            return 1
+        mover, opponent = game.board.get_bitboards()
+        if attacker == 2:
+            mover, opponent = opponent, mover
+        if can_win(mover, opponent):
+            return 1
+        if threats == 0 or game.winners[defender - 1] or game.board.has_four(defender):
+            return None
+        key = game.ttentry()
+        entry = self.tt.get(key)
+        if entry is not None and (entry[1] is not None or entry[0] >= threats):
+            return entry[1]
+        best_move, best_plies = None, None
+        for move in threat_moves(mover, opponent):
+            game.make_move(move)
+            game.nplayer = defender
+            try:
+                plies = self._defend(game, threats - 1) if game.board.has_four(attacker) else None
+            finally:
+                game.nplayer = attacker
+                game.unmake_move(move)
+            if plies is not None and (best_plies is None or plies + 1 < best_plies):
+                best_move, best_plies = move, plies + 1
+                if best_plies <= 3:
+                    break
+        self.tt[key] = (threats, best_plies, best_move)
+        return best_plies
+
+    def _defend(self, game, threats):
+        """
+        Searches defender moves against the threat - the threat fails when the defender can win first or any of his
+        moves leaves the attacker without a forced win. Only moves placing on the empty position of every attacker
+        four, or rotating a quadrant it goes through, are made - any other move leaves a four, so it loses at once.
+
+        Parameters
+        ----------
+        game : Pentago
+            defender to move, attacker has a four
+        threats : int
+            number of threats the attacker can still make
+
+        Returns
+        -------
+        plies : int
+            number of plies to the attacker win after the slowest defence, None when the threat fails
+
+        Raises
+        ------
+        SearchTimeout
+            when the node or time cap is reached
+        """
+        defender, attacker = game.nplayer, game.nopponent
+        if game.winners[defender - 1] or game.board.has_four(defender):
+            return None
+        mover, opponent = game.board.get_bitboards()
+        if defender == 2:
+            mover, opponent = opponent, mover
+        if can_win(mover, opponent):
+            return None
+        fours = four_lines(opponent, mover)
+        slowest = 2
+        for move in game.possible_moves():
+            position_bit = 1 << (move >> 3)
+            quadrant_mask = QUADRANT_MASKS[move >> 1 & 3]
+            if not all(line & position_bit or line & quadrant_mask for line in fours):
+                continue
+            game.make_move(move)
+            game.nplayer = attacker
+            try:
+                plies = self._attack(game, threats)
+            finally:
+                game.nplayer = defender
+                game.unmake_move(move)
+            if plies is None:
+                return None
+            slowest = max(slowest, plies + 1)
+        return slowest
+
+
+class ThreatSearch:
+    """
+    Class to represent AI algorithm checking for a forced win made of threats before searching.
+
+    Can be used like easyAI algorithms: AI_Player(ThreatSearch(PVSearch(time_limit=3))). When the threat-space search
+    finds a win, its move is played at once, otherwise the move is searched by the algorithm - time spent by the
+    threat-space search is taken from its time limit, so the move stays within the budget.
+
+    Attributes
+    ----------
+    algo : PVSearch/RootParallelSearch/MCTS/EndgameSearch
+        algorithm used when no forced win is found
+    solver : ThreatSolver
+    result : int
+        number of plies to the win found before the last move, None when no win was found
+    nodes : int
+        number of positions visited by the threat-space search before the last move
+
+    Methods
+    -------
+    __call__(game):
+        Returns the winning move or the move found by the algorithm.
+    """
+
+    def __init__(self, algo, solver=None):
+        """
+        Creates all attributes needed for the threat checking AI.
+
+        Parameters
+        ----------
+        algo : PVSearch/RootParallelSearch/MCTS/EndgameSearch
+        solver : ThreatSolver
+            solver with default limits when not provided
+        """
+        self.algo = algo
+        self.solver = solver if solver is not None else ThreatSolver()
+        self.result = None
+        self.nodes = 0
+
+    def __call__(self, game):
+        """
+        Returns the winning move or the move found by the algorithm.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        self.result = None
+        start = time.perf_counter()
+        found = self.solver.solve(game)
+        self.nodes = self.solver.nodes
+        if found is None:
+            return search_remaining(self.algo, game, time.perf_counter() - start)
+        move, self.result = found
+        return move
@@ -0,0 +1,370 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import argparse
+import json
+import random
+import time
+from multiprocessing import Pool
+import numpy as np
+from easyAI import AI_Player, Negamax, TT
+from pentago import Pentago
+from search import IterativeDeepening, PVSearch
+from transposition import BoundedTT
+from mcts import MCTS
+from endgame import EndgameSolver, EndgameSearch
+from threats import ThreatSolver, ThreatSearch
+from batch import LeafEvaluator
+from benchmark import count_nodes
+
+DRAW = 0
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+def create_negamax(depth=3):
+    """
+    Creates easyAI Negamax with transposition table.
+
+    Parameters
+    ----------
+    depth : int
+
+    Returns
+    -------
+    algo : Negamax
+    """
+    return Negamax(int(depth), tt=TT())
+
+
+def create_search(search_class, time=1.0, depth=64, megabytes=16, endgame=0, threats=0, batch=0):
+    """
+    Creates iterative deepening search with BoundedTT, optionally switching to the endgame solver and checking for
+    forced wins made of threats (before the search and at its leaves).
+
+    Parameters
+    ----------
+    search_class : type
+        IterativeDeepening or PVSearch
+    time : float
+        seconds per move, 0 searches up to depth
+    depth : int
+    megabytes : float
+    endgame : int
+        number of empty positions from which the endgame solver is used, 0 never uses it - the solver gets half of the
+        move time, or a second per move when there is no time limit
+    threats : int
+        maximum number of threats searched by the threat-space search, 0 never uses it
+    batch : int
+        1 scores leaves of the frontier nodes at once, see batch.LeafEvaluator
+
+    Returns
+    -------
+    algo : IterativeDeepening/PVSearch/EndgameSearch/ThreatSearch
+    """
+    solver = ThreatSolver(max_threats=int(threats), time_limit=float(time) / 4 or None) if int(threats) else None
+    algo = search_class(max_depth=int(depth), time_limit=float(time) or None,
+                        tt=BoundedTT(megabytes=float(megabytes), replacement='two-tier'), threats=solver,
+                        leaves=LeafEvaluator() if int(batch) else None)
+    if int(endgame):
+        algo = EndgameSearch(algo, int(endgame), EndgameSolver(
+            time_limit=float(time) * EndgameSearch.SOLVER_TIME_SHARE or EndgameSearch.SOLVER_TIME_LIMIT))
+    return ThreatSearch(algo, solver) if solver is not None else algo
+
+
+def create_mcts(time=1.0, playouts=0, batch=32):
+    """
+    Creates Monte Carlo Tree Search AI.
+
+    Parameters
+    ----------
+    time : float
+        seconds per move, 0 plays all the playouts
+    playouts : int
+        playouts per move, 0 plays until the time runs out
+    batch : int
+
+    Returns
+    -------
+    algo : MCTS
+    """
+    return MCTS(playouts=int(playouts) or None, time_limit=float(time) or None, batch_size=int(batch))
+
+
+# Engines available in the tournament, configured as 'name:key=value,key=value' e.g. 'pvs:time=0.5,endgame=8,threats=4'.
+ENGINES = {
+    'negamax': create_negamax,
+    'id': lambda **params: create_search(IterativeDeepening, **params),
+    'pvs': lambda **params: create_search(PVSearch, **params),
+    'mcts': create_mcts,
+}
+
+
+def create_engine(spec):
+    """
+    Creates AI algorithm from the engine specification.
+
+    Parameters
+    ----------
+    spec : str
+        engine name and parameters, e.g. 'pvs:time=0.5,endgame=8'
+
+    Returns
+    -------
+    algo : Negamax/IterativeDeepening/PVSearch/EndgameSearch/ThreatSearch/MCTS
+
+    Raises
+    ------
+    ValueError
+        when the engine is unknown
+    """
+    name, _, params = spec.partition(":")
+    if name not in ENGINES:
+        raise ValueError("Unknown engine: %s, available: %s" % (name, ", ".join(ENGINES)))
+    params = dict(param.split("=", 1) for param in params.split(",") if param)
+    return ENGINES[name](**params)
+
+
+def search_stats(algo):
+    """
+    Returns transposition table counters of the algorithm, also when it is wrapped by EndgameSearch/ThreatSearch.
+
+    Parameters
+    ----------
+    algo : Negamax/IterativeDeepening/PVSearch/EndgameSearch/ThreatSearch/MCTS
+
+    Returns
+    -------
+    stats : dict
+        probes and hits, None when the algorithm has no BoundedTT
+    """
+    while getattr(algo, 'algo', None) is not None:
+        algo = algo.algo
+    tt = getattr(algo, 'tt', None)
+    if not isinstance(tt, BoundedTT):
+        return None
+    return {'probes': tt.probes, 'hits': tt.hits}
+
+
+def node_counters(algo):
+    """
+    Returns parts of the algorithm counting their own visited positions - the search wrapped by
+    EndgameSearch/ThreatSearch, the endgame solver and the threat-space search before the move. Their nodes attribute
+    is reset by every search, and the search counts also the leaves scored together by the LeafEvaluator, which are
+    never made on the game.
+
+    Parameters
+    ----------
+    algo : Negamax/IterativeDeepening/PVSearch/EndgameSearch/ThreatSearch/MCTS
+
+    Returns
+    -------
+    counters : 1D array[IterativeDeepening/EndgameSolver/ThreatSearch]
+        empty when the algorithm does not count nodes (Negamax, MCTS)
+    """
+    counters = []
+    while algo is not None:
+        if isinstance(algo, EndgameSearch):
+            counters.append(algo.solver)
+        elif isinstance(algo, (IterativeDeepening, ThreatSearch)):
+            counters.append(algo)
+        algo = getattr(algo, 'algo', None)
+    return counters
+
+
+def play_game(specs, opening_plies, seed):
+    """
+    Plays one game between two engines without any output.
+
+    Parameters
+    ----------
+    specs : tuple(str)
+        engine specifications of player 1 and player 2
+    opening_plies : int
+        number of random moves played before the engines start, so games differ
+    seed : int
+
+    Returns
+    -------
+    record : dict
+        engines, winner, number of moves, latency and nodes of every engine move, transposition table counters -
+        nodes are taken from the node counters of the engine (see node_counters), engines without them count
+        make_move calls
+    """
+    generator = random.Random(seed)
+    algos = [create_engine(spec) for spec in specs]
+    game = Pentago([AI_Player(algo) for algo in algos])
+    counter = count_nodes(game)
+    counters = [node_counters(algo) for algo in algos]
+    for _ in range(opening_plies):
+        game.play_move(generator.choice(game.legal_moves()))
+        if game.is_over():
+            break
+    latencies = [[], []]
+    nodes = [[], []]
+    moves = opening_plies
+    while not game.is_over():
+        player = game.nplayer - 1
+        start_nodes = counter[0]
+        for algo in counters[player]:
+            algo.nodes = 0
+        start = time.perf_counter()
+        move = game.player.ask_move(game)
+        latencies[player].append(time.perf_counter() - start)
+        if counters[player]:
+            nodes[player].append(sum(algo.nodes for algo in counters[player]))
+        else:
+            nodes[player].append(counter[0] - start_nodes)
+        game.play_move(move)
+        moves += 1
+    winner = game.nopponent if game.winners[game.nopponent - 1] else DRAW
+    return {
+        'engines': list(specs),
+        'seed': seed,
+        'winner': winner,
+        'moves': moves,
+        'latencies': latencies,
+        'nodes': nodes,
+        'tt': [search_stats(algo) for algo in algos],
+    }
+
+
+def play_game_task(task):
+    """
+    Unpacks the pool task and plays the game.
+
+    Parameters
+    ----------
+    task : tuple
+        play_game arguments
+
+    Returns
+    -------
+    record : dict
+    """
+    return play_game(*task)
+
+
+def summarize(records):
+    """
+    Aggregates game records per engine - results, game length, move latency percentiles, nodes per second and
+    transposition table hit rate.
+
+    Parameters
+    ----------
+    records : 1D array[dict]
+        play_game results
+
+    Returns
+    -------
+    summary : dict
+        statistics of every engine specification
+    """
+    engines = {}
+    for record in records:
+        for player, spec in enumerate(record['engines']):
+            stats = engines.setdefault(spec, {'games': 0, 'wins': 0, 'losses': 0, 'draws': 0, 'moves': [],
+                                              'latencies': [], 'nodes': 0, 'probes': 0, 'hits': 0})
+            stats['games'] += 1
+            if record['winner'] == DRAW:
+                stats['draws'] += 1
+            elif record['winner'] == player + 1:
+                stats['wins'] += 1
+            else:
+                stats['losses'] += 1
+            stats['moves'].append(record['moves'])
+            stats['latencies'].extend(record['latencies'][player])
+            stats['nodes'] += sum(record['nodes'][player])
+            if record['tt'][player] is not None:
+                stats['probes'] += record['tt'][player]['probes']
+                stats['hits'] += record['tt'][player]['hits']
+    summary = {}
+    for spec, stats in engines.items():
+        latencies = np.array(stats['latencies']) if stats['latencies'] else np.zeros(1)
+        seconds = float(latencies.sum())
+        summary[spec] = {
+            'games': stats['games'],
+            'wins': stats['wins'],
+            'losses': stats['losses'],
+            'draws': stats['draws'],
+            'score': (stats['wins'] + 0.5 * stats['draws']) / stats['games'],
+            'average_game_length': float(np.mean(stats['moves'])),
+            'latency': dict({'p%d' % p: float(np.percentile(latencies, p)) for p in LATENCY_PERCENTILES},
+                            mean=float(latencies.mean()), max=float(latencies.max())),
+            'nodes_per_second': stats['nodes'] / seconds if seconds else 0.0,
+            'tt_hit_rate': stats['hits'] / stats['probes'] if stats['probes'] else None,
+        }
+    return summary
+
+
+def run_tournament(specs, games, workers, opening_plies, seed):
+    """
+    Plays the games on a pool of worker processes - every engine pair plays the same openings with both colors.
+
+    Parameters
+    ----------
+    specs : 1D array[str]
+        engine specifications, every pair plays
+    games : int
+        number of games per engine pair
+    workers : int
+    opening_plies : int
+    seed : int
+
+    Returns
+    -------
+    records : 1D array[dict]
+    """
+    tasks = []
+    for i, first in enumerate(specs):
+        for second in specs[i + 1:]:
+            for game in range(games):
+                pair = (first, second) if game % 2 == 0 else (second, first)
+                tasks.append((pair, opening_plies, seed + game // 2))
+    records = []
+    with Pool(workers) as pool:
+        for record in pool.imap_unordered(play_game_task, tasks):
+            records.append(record)
+            print("%d/%d %s vs %s: winner %d after %d moves"
+                  % (len(records), len(tasks), record['engines'][0], record['engines'][1], record['winner'],
+                     record['moves']))
+    return records
+
+
+def main():
+    """
+    Runs the tournament and saves game records and summary to JSON.
+
+    Returns
+    -------
+    None
+    """
+    parser = argparse.ArgumentParser(description="Headless Pentago AI tournament.")
+    parser.add_argument("engines", nargs="+",
+                        help="engine specifications, e.g. 'pvs:time=0.5' 'negamax:depth=2' 'mcts:time=0.5'")
+    parser.add_argument("--games", type=int, default=4, help="games per engine pair")
+    parser.add_argument("--workers", type=int, default=None, help="processes playing games, number of CPUs by default")
+    parser.add_argument("--opening-plies", type=int, default=2, help="random moves played at the start of every game")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="tournament.json")
+    args = parser.parse_args()
+
+    if len(args.engines) < 2:
+        parser.error("at least 2 engines are needed")
+    for spec in args.engines:
+        create_engine(spec)
+    start = time.perf_counter()
+    records = run_tournament(args.engines, args.games, args.workers, args.opening_plies, args.seed)
+    summary = summarize(records)
+    with open(args.output, "w") as file:
+        json.dump({'config': vars(args), 'seconds': time.perf_counter() - start, 'summary': summary,
+                   'games': records}, file, indent=2)
+    for spec, stats in summary.items():
+        print("%-30s score %.2f (+%d =%d -%d)  p50 %.3f s  p99 %.3f s  %8.0f nodes/s  tt hit rate %s"
+              % (spec, stats['score'], stats['wins'], stats['draws'], stats['losses'], stats['latency']['p50'],
+                 stats['latency']['p99'], stats['nodes_per_second'],
+                 "-" if stats['tt_hit_rate'] is None else "%.2f" % stats['tt_hit_rate']))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import numpy as np
+from easyAI import TT
+from symmetry import INVERSE_SYMMETRIES
+from move import MOVES
+
+
+class SymmetricTT(TT):
+    """
+    Transposition table storing and probing positions by their symmetry independent entry. Rotated and reflected
+    copies of a position share one entry, which cuts the number of stored positions by up to 8 times.
+
+    Extends TT class from the easyAI library, game has to provide canonical_ttentry(), transform_move(move, symmetry),
+    ttentry() and representative_move(move) methods. Best moves are stored as played on the representative position
+    and mapped back onto the probed one. Move mapped from a different symmetric copy is replaced with
+    game.representative_move(move), so it is one of the game.possible_moves() as easyAI Negamax expects.
+
+    Methods
+    -------
+    lookup(game):
+        Requests the entry in the table. Returns None if the entry has not been previously stored in the table.
+    store(**data):
+        Stores an entry into the table.
+    """
+
+    def lookup(self, game):
+        """
+        Requests the entry in the table. Returns None if the entry has not been previously stored in the table.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        entry : dict
+            contains depth, value, move and flag keys
+        """
+        entry, symmetry = game.canonical_ttentry()
+        data = self.d.get(entry, None)
+        if data is None:
+            return None
+        data = dict(data)
+        move = game.transform_move(data['move'], INVERSE_SYMMETRIES[symmetry])
+        if data['origin'] != game.ttentry():
+            move = game.representative_move(move)
+        data['move'] = move
+        return data
+
+    def store(self, **data):
+        """
+        Stores an entry into the table.
+
+        Parameters
+        ----------
+        data : dict
+            game, depth, value, move and flag values passed by the easyAI Negamax
+
+        Returns
+        -------
+        None
+        """
+        game = data.pop("game")
+        entry, symmetry = game.canonical_ttentry()
+        data['move'] = game.transform_move(data['move'], symmetry)
+        data['origin'] = game.ttentry()
+        self.d[entry] = data
+
+
+class BoundedTT:
+    """
+    Fixed size transposition table backed by preallocated NumPy arrays - memory use does not grow during the game,
+    no matter how long it takes or how deep the AI searches.
+
+    Can be used everywhere easyAI TT is used (lookup/store interface). Entries are addressed by the low bits of the
+    Zobrist hash and verified with the full hash. Two replacement schemes are available:
+    - 'depth' - one entry per slot, entry is replaced only by the same position or a search at least as deep
+    - 'two-tier' - two entries per slot, first one is depth-preferred, second one always keeps the newest position
+      (entry pushed out of the first one moves to the second one)
+    Every entry remembers the search generation which stored it. Searches start a new generation (see new_search), and
+    entries of older generations are replaced like empty ones - deep results of past moves do not fill the table
+    forever, while they are still found until something else takes their place. Pondering starts the generation of
+    the AI search which follows it, so the pondered entries stay current for that search.
+
+    Attributes
+    ----------
+    size : int
+        number of entries, power of 2
+    replacement : str
+        either 'depth' or 'two-tier'
+    symmetric : bool
+        whether positions are stored under their symmetry independent entry, see SymmetricTT
+    keys : 1D np.array[uint64]
+    values : 1D np.array[float64]
+    depths : 1D np.array[int16]
+        -1 marks an empty entry
+    flags : 1D np.array[int8]
+        easyAI EXACT, LOWERBOUND or UPPERBOUND value
+    generations : 1D np.array[uint8]
+        search generation which stored the entry
+    generation : int
+        current search generation
+    pondered : bool
+        whether the current generation was started by pondering - the next search keeps it
+    moves : 1D np.array[int16]
+        best move found for the position, encoded as integer
+    origins : 1D np.array[uint64]
+        Zobrist hash of the stored symmetric copy, only in the symmetric mode
+    probes : int
+        number of lookups
+    hits : int
+        number of lookups which found the position
+    collisions : int
+        number of lookups which found a different position in the entry
+    stores : int
+        number of stored entries
+    replacements : int
+        number of stores which overwrote a different position
+    rejections : int
+        number of stores skipped because the entry held a deeper search result
+
+    Methods
+    -------
+    entry_bytes(symmetric):
+        Returns memory used by a single entry.
+    lookup(game):
+        Requests the entry in the table. Returns None if the entry has not been previously stored in the table.
+    store(**data):
+        Stores an entry into the table.
+    new_search(ponder):
+        Starts the next search generation.
+    get_stats():
+        Returns table counters.
+    clear():
+        Removes all entries and resets counters.
+    """
+
+    REPLACEMENTS = ('depth', 'two-tier')
+    # Generations are stored in one byte and only compared for equality, so they wrap around.
+    GENERATIONS = 256
+
+    def __init__(self, entries=None, megabytes=None, replacement='depth', symmetric=False):
+        """
+        Creates all attributes needed for the bounded transposition table. Table size is rounded down to a power
+        of 2, so a slot is chosen with a single bitwise and.
+
+        Parameters
+        ----------
+        entries : int
+            maximum number of entries, 2^20 when neither entries nor megabytes is provided
+        megabytes : float
+            memory budget of the table, used when entries is not provided
+        replacement : str
+            either 'depth' or 'two-tier'
+        symmetric : bool
+            stores positions under their symmetry independent entry
+        """
+        if replacement not in self.REPLACEMENTS:
+            raise ValueError("Unknown replacement scheme: %s" % replacement)
+        if entries is None:
+            entries = int(megabytes * 2 ** 20 // self.entry_bytes(symmetric)) if megabytes is not None else 2 ** 20
+        if entries < 2:
+            raise ValueError("Transposition table needs at least 2 entries")
+        self.size = 1 << (entries.bit_length() - 1)
+        self.replacement = replacement
+        self.symmetric = symmetric
+        self.__slot_size = 2 if replacement == 'two-tier' else 1
+        self.__slot_mask = self.size // self.__slot_size - 1
+        self.keys = np.zeros(self.size, dtype=np.uint64)
+        self.values = np.zeros(self.size, dtype=np.float64)
+        self.depths = np.full(self.size, -1, dtype=np.int16)
+        self.flags = np.zeros(self.size, dtype=np.int8)
+        self.generations = np.zeros(self.size, dtype=np.uint8)
+        self.generation = 0
+        self.pondered = False
+        self.moves = np.zeros(self.size, dtype=np.int16)
+        self.origins = np.zeros(self.size, dtype=np.uint64) if symmetric else None
+        self.__reset_counters()
+
+    @staticmethod
+    def entry_bytes(symmetric=False):
+        """
+        Returns memory used by a single entry.
+
+        Parameters
+        ----------
+        symmetric : bool
+            whether the table is in the symmetric mode
+
+        Returns
+        -------
+        entry_bytes : int
+        """
+        dtypes = (np.uint64, np.float64, np.int16, np.int8, np.uint8, np.int16) + ((np.uint64,) if symmetric else ())
+        return sum(np.dtype(dtype).itemsize for dtype in dtypes)
+
+    def __reset_counters(self):
+        """
+        Resets table counters.
+
+        Returns
+        -------
+        None
+        """
+        self.probes = 0
+        self.hits = 0
+        self.collisions = 0
+        self.stores = 0
+        self.replacements = 0
+        self.rejections = 0
+
+    def __entry(self, game):
+        """
+        Returns table key of the game position and symmetry mapping the position onto the stored one.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        entry : tuple(int)
+        """
+        if self.symmetric:
+            return game.canonical_ttentry()
+        return game.ttentry(), None
+
+    def __find(self, key):
+        """
+        Looks for the index holding the key.
+
+        Parameters
+        ----------
+        key : int
+
+        Returns
+        -------
+        index : int
+            None if the key is not stored
+        """
+        first = (key & self.__slot_mask) * self.__slot_size
+        for index in range(first, first + self.__slot_size):
+            if self.depths[index] >= 0 and int(self.keys[index]) == key:
+                return index
+        return None
+
+    def lookup(self, game):
+        """
+        Requests the entry in the table. Returns None if the entry has not been previously stored in the table.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        entry : dict
+            contains depth, value, move and flag keys
+        """
+        key, symmetry = self.__entry(game)
+        self.probes += 1
+        index = self.__find(key)
+        if index is None:
+            first = (key & self.__slot_mask) * self.__slot_size
+            if self.depths[first] >= 0:
+                self.collisions += 1
+            return None
+        self.hits += 1
+        move = MOVES[self.moves[index]]
+        if symmetry is not None:
+            move = game.transform_move(move, INVERSE_SYMMETRIES[symmetry])
+            if int(self.origins[index]) != game.ttentry():
+                move = game.representative_move(move)
+        return {'depth': int(self.depths[index]), 'value': float(self.values[index]), 'move': move,
+                'flag': int(self.flags[index])}
+
+    def __call__(self, game):
+        """
+        Enables the table to be used like an AI algorithm - returns stored best move, None if position is unknown.
+
+        Parameters
+        ----------
+        game : Pentago
+
+        Returns
+        -------
+        move : Move
+        """
+        entry = self.lookup(game)
+        return None if entry is None else entry['move']
+
+    def store(self, **data):
+        """
+        Stores an entry into the table, according to the replacement scheme - entries of older search generations
+        are always replaced.
+
+        Parameters
+        ----------
+        data : dict
+            game, depth, value, move and flag values passed by the easyAI Negamax
+
+        Returns
+        -------
+        None
+        """
+        key, symmetry = self.__entry(data['game'])
+        move = data['move']
+        if symmetry is not None:
+            move = data['game'].transform_move(move, symmetry)
+        depth = data['depth']
+        index = self.__find(key)
+        if index is None:
+            first = (key & self.__slot_mask) * self.__slot_size
+            if self.depths[first] < 0:
+                index = first
+            elif depth >= self.depths[first] or self.generations[first] != self.generation:
+                if self.__slot_size == 2:
+                    self.__copy(first, first + 1)
+                else:
+                    self.replacements += 1
+                index = first
+            elif self.__slot_size == 2:
+                index = first + 1
+                if self.depths[index] >= 0:
+                    self.replacements += 1
+            else:
+                self.rejections += 1
+                return
+        elif depth < self.depths[index] and index % self.__slot_size == 0 and \
+                self.generations[index] == self.generation:
+            self.rejections += 1
+            return
+        self.stores += 1
+        self.keys[index] = key
+        self.values[index] = data['value']
+        self.depths[index] = depth
+        self.flags[index] = data['flag']
+        self.generations[index] = self.generation
+        self.moves[index] = move
+        if symmetry is not None:
+            self.origins[index] = data['game'].ttentry()
+
+    def __copy(self, source, target):
+        """
+        Copies entry between indexes.
+
+        Parameters
+        ----------
+        source : int
+        target : int
+
+        Returns
+        -------
+        None
+        """
+        if self.depths[target] >= 0:
+            self.replacements += 1
+        self.keys[target] = self.keys[source]
+        self.values[target] = self.values[source]
+        self.depths[target] = self.depths[source]
+        self.flags[target] = self.flags[source]
+        self.generations[target] = self.generations[source]
+        self.moves[target] = self.moves[source]
+        if self.origins is not None:
+            self.origins[target] = self.origins[source]
+
+    def new_search(self, ponder=False):
+        """
+        Starts the next search generation - entries stored so far can be replaced by any entry of the new one. Search
+        following pondering continues its generation instead, as it searches one of the pondered positions.
+
+        Parameters
+        ----------
+        ponder : bool
+            whether the generation is started by pondering
+
+        Returns
+        -------
+        None
+        """
+        if self.pondered and not ponder:
+            self.pondered = False
+            return
+        self.generation = (self.generation + 1) % self.GENERATIONS
+        self.pondered = ponder
+
+    def get_stats(self):
+        """
+        Returns table counters.
+
+        Returns
+        -------
+        stats : dict
+        """
+        return {
+            'size': self.size,
+            'used': int(np.count_nonzero(self.depths >= 0)),
+            'megabytes': self.size * self.entry_bytes(self.symmetric) / 2 ** 20,
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.probes if self.probes else 0.0,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'replacements': self.replacements,
+            'rejections': self.rejections,
+        }
+
+    def clear(self):
+        """
+        Removes all entries and resets counters.
+
+        Returns
+        -------
+        None
+        """
+        self.depths.fill(-1)
+        self.__reset_counters()
@@ -0,0 +1,68 @@
+# Rules: https://en.wikipedia.org/wiki/Pentago
+# Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
+# Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-2/README.md
+
+import random
+from bitboard import QUADRANTS_COUNT, QUADRANT_POSITIONS_COUNT, QUADRANT_PATTERNS_COUNT, QUADRANT_MASK, \
+    POSITIONS_COUNT
+
+# Fixed seed - the same position gets the same key in every process (saved tables, worker processes).
+ZOBRIST_SEED = 16583
+
+__random = random.Random(ZOBRIST_SEED)
+
+# ZOBRIST_KEYS[player - 1][i] - random 64 bit key of the player stone on position index i.
+ZOBRIST_KEYS = [[__random.getrandbits(64) for _ in range(POSITIONS_COUNT)] for _ in range(2)]
+
+
+def quadrant_pattern_key(keys, quadrant, pattern):
+    """
+    Calculates xor of the keys of all positions set in the 9 bit quadrant pattern.
+
+    Parameters
+    ----------
+    keys : 1D array[int]
+        one of the ZOBRIST_KEYS values
+    quadrant : int
+        values from 0
+    pattern : int
+
+    Returns
+    -------
+    key : int
+    """
+    key = 0
+    for i in range(QUADRANT_POSITIONS_COUNT):
+        if pattern >> i & 1:
+            key ^= keys[quadrant * QUADRANT_POSITIONS_COUNT + i]
+    return key
+
+
+# QUADRANT_KEYS[player - 1][quadrant][pattern] - combined key of the quadrant pattern, so a rotation updates the hash
+# with two lookups per player instead of xoring every rotated position separately.
+QUADRANT_KEYS = [[[quadrant_pattern_key(keys, quadrant, pattern) for pattern in range(QUADRANT_PATTERNS_COUNT)]
+                  for quadrant in range(QUADRANTS_COUNT)]
+                 for keys in ZOBRIST_KEYS]
+
+
+def zobrist_hash(bitboard1, bitboard2):
+    """
+    Calculates Zobrist hash of the position from scratch.
+
+    Parameters
+    ----------
+    bitboard1 : int
+        player 1 bitboard
+    bitboard2 : int
+        player 2 bitboard
+
+    Returns
+    -------
+    key : int
+        64 bit key
+    """
+    key = 0
+    for player_keys, bitboard in zip(QUADRANT_KEYS, (bitboard1, bitboard2)):
+        for quadrant in range(QUADRANTS_COUNT):
+            key ^= player_keys[quadrant][bitboard >> (quadrant * QUADRANT_POSITIONS_COUNT) & QUADRANT_MASK]
+    return key
@@ -2,9 +2,15 @@
 # Authors: Damian Rutkowski (s16583), Piotr Krajewski (s17410)
 # Environment setup: https://github.com/WuTolas/pjwstk-nai/tree/main/lab-3/README.md
 
+import hashlib
+import os
 import numpy as np
 import skfuzzy as fuzz
 from skfuzzy import control as ctrl
+from skfuzzy.control.term import TermAggregate
+
+# Directory of the precomputed control surfaces, one file per hash of the membership functions and rules.
+SURFACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "surface_cache")
 
 class FuzzyBabushka:
     """
@@ -20,6 +26,9 @@ class FuzzyBabushka:
         holds data related to the amount of eaten meals
     money : Consequent
         hold data related to the amount of money to be given
+    surface : 3D np.array[double]
+        amount of money for every combination of the input universe values (high marks, day, meals), None until
+        load_surface is called
 
     Methods
     -------
@@ -35,7 +44,25 @@ class FuzzyBabushka:
         Calculates how much money Babushka should give to grandson/granddaughter based on the provided parameters.
     get_output_value():
         Returns how much money Babushka should give to grandson/granddaughter.
+    simulate_many(high_marks, days_of_the_month, meals):
+        Calculates how much money Babushka should give for many sets of parameters at once.
+    surface_key():
+        Returns hash of the membership functions and rules.
+    load_surface(directory):
+        Loads the control surface from the cache, precomputing and saving it when it is not there.
+    lookup(high_marks, day_of_the_month, meals):
+        Returns how much money Babushka should give, read from the control surface.
+    __fuzzify_many(variable, values):
+        Calculates memberships of the values in all terms of the variable.
+    __firing_strengths(antecedent, memberships, rule):
+        Calculates how much the rule antecedent is fulfilled for all sets of parameters.
+    __defuzzify_many(cuts):
+        Calculates centroids of the aggregated output membership functions.
     """
+
+    # Number of parameter sets defuzzified at once by simulate_many - limits memory used by the intermediate arrays.
+    CHUNK_SIZE = 4096
+
     def __init__(self):
         """
         Creates all attributes needed for the fuzzy babushka object.
@@ -44,6 +71,7 @@ class FuzzyBabushka:
         self.__prepare_membership_functions()
         self.__prepare_rules()
         self.__create_control_system_simulator()
+        self.surface = None
 
     def __prepare_universe_objects(self):
         """
@@ -183,3 +211,224 @@ class FuzzyBabushka:
         money : double
         """
         return self.__simulator.output['Babushka Foundation']
+
+    def simulate_many(self, high_marks, days_of_the_month, meals):
+        """
+        Calculates how much money Babushka should give for many sets of parameters at once - the same values as
+        simulate followed by get_output_value, but every step is computed with NumPy for all sets together, instead of
+        walking the rules for every set: memberships of the inputs, rule firing strengths (minimum for AND, maximum
+        for OR), output terms clipped at the firing strengths and aggregated with maximum, and centroid
+        defuzzification. Inputs outside the universes are clipped to them, like in the simulation.
+
+        Parameters
+        ----------
+        high_marks : array[float]
+            numbers of the high marks received since last visit
+        days_of_the_month : array[float]
+            numbers of the days e.g. 16
+        meals : array[float]
+            numbers of meals eaten
+
+        Returns
+        -------
+        money : array[double]
+            amount of money for every set of parameters (arrays are broadcast together), NaN when no rule fires
+        """
+        arrays = np.broadcast_arrays(np.asarray(high_marks, dtype=np.float64),
+                                     np.asarray(days_of_the_month, dtype=np.float64),
+                                     np.asarray(meals, dtype=np.float64))
+        memberships = {}
+        for variable, values in zip((self.high_marks, self.day_of_the_month, self.meals), arrays):
+            memberships.update(self.__fuzzify_many(variable, values.ravel()))
+        cuts = {}
+        for rule in self.rules:
+            firing = self.__firing_strengths(rule.antecedent, memberships, rule)
+            for consequent in rule.consequent:
+                activation = firing * consequent.weight
+                label = consequent.term.label
+                cuts[label] = activation if label not in cuts \
+                    else consequent.term.parent.accumulation_method(activation, cuts[label])
+        return self.__defuzzify_many(cuts).reshape(arrays[0].shape)
+
+    @staticmethod
+    def __fuzzify_many(variable, values):
+        """
+        Calculates memberships of the values in all terms of the variable.
+
+        Parameters
+        ----------
+        variable : Antecedent
+        values : 1D array[float]
+
+        Returns
+        -------
+        memberships : dict
+            1D array[float] of memberships for every variable and term labels pair
+        """
+        universe = variable.universe
+        values = np.clip(values, universe.min(), universe.max())
+        return {(variable.label, label): np.interp(values, universe, term.mf) for label, term in variable.terms.items()}
+
+    def __firing_strengths(self, antecedent, memberships, rule):
+        """
+        Calculates how much the rule antecedent is fulfilled for all sets of parameters.
+
+        Parameters
+        ----------
+        antecedent : Term/TermAggregate
+            rule antecedent or its part
+        memberships : dict
+            see __fuzzify_many
+        rule : Rule
+            provides AND and OR functions
+
+        Returns
+        -------
+        firing : 1D array[float]
+        """
+        if not isinstance(antecedent, TermAggregate):
+            return memberships[(antecedent.parent.label, antecedent.label)]
+        first = self.__firing_strengths(antecedent.term1, memberships, rule)
+        if antecedent.kind == 'not':
+            return 1. - first
+        second = self.__firing_strengths(antecedent.term2, memberships, rule)
+        return rule.and_func(first, second) if antecedent.kind == 'and' else rule.or_func(first, second)
+
+    def __defuzzify_many(self, cuts):
+        """
+        Calculates centroids of the aggregated output membership functions. Like in the simulation, the output
+        universe is extended with the points where every term reaches its cut, so the aggregated function is linear
+        between the points and its centroid is calculated exactly.
+
+        Parameters
+        ----------
+        cuts : dict
+            1D array[float] of activations for every output term label
+
+        Returns
+        -------
+        money : 1D array[double]
+        """
+        universe = self.money.universe.astype(np.float64)
+        widths = np.diff(universe)
+        count = len(next(iter(cuts.values())))
+        money = np.empty(count)
+        for start in range(0, count, self.CHUNK_SIZE):
+            end = min(start + self.CHUNK_SIZE, count)
+            chunk = {label: cut[start:end, None] for label, cut in cuts.items()}
+            points = [np.broadcast_to(universe, (end - start, len(universe)))]
+            for label, cut in chunk.items():
+                mf = self.money[label].mf
+                steps = np.diff(mf)
+                crossing = np.diff(mf >= cut, axis=1)
+                points.append(np.where(crossing, universe[:-1] + (cut - mf[:-1]) * widths / np.where(steps, steps, 1),
+                                       universe[:-1]))
+            points = np.sort(np.concatenate(points, axis=1), axis=1)
+            output = np.zeros_like(points)
+            for label, cut in chunk.items():
+                np.maximum(output, np.minimum(cut, np.interp(points, universe, self.money[label].mf)), output)
+            x1, x2, y1, y2 = points[:, :-1], points[:, 1:], output[:, :-1], output[:, 1:]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                money[start:end] = \
+                    ((x2 - x1) * (x1 * (2 * y1 + y2) + x2 * (y1 + 2 * y2)) / 6).sum(axis=1) \
+                    / ((x2 - x1) * (y1 + y2) / 2).sum(axis=1)
+        return money
+
+    def surface_key(self):
+        """
+        Returns hash of the membership functions and rules - universes and membership functions of all variables,
+        rules with their AND/OR functions and weights, and the defuzzification method. Control surface computed for
+        other membership functions or rules gets a different key.
+
+        Returns
+        -------
+        key : str
+            hexadecimal SHA-256 digest
+        """
+        digest = hashlib.sha256()
+        for variable in (self.high_marks, self.day_of_the_month, self.meals, self.money):
+            digest.update(variable.label.encode())
+            digest.update(np.ascontiguousarray(variable.universe, dtype=np.float64).tobytes())
+            for label, term in variable.terms.items():
+                digest.update(label.encode())
+                digest.update(np.ascontiguousarray(term.mf, dtype=np.float64).tobytes())
+        for rule in self.rules:
+            digest.update(str(rule).encode())
+            digest.update(repr([consequent.weight for consequent in rule.consequent]).encode())
+        digest.update(self.money.defuzzify_method.encode())
+        return digest.hexdigest()
+
+    def load_surface(self, directory=SURFACE_DIR):
+        """
+        Loads the control surface from the cache - when there is no file for the current membership functions and
+        rules, the surface is precomputed with simulate_many for every combination of the input universe values
+        (11 * 31 * 3) and saved.
+
+        Parameters
+        ----------
+        directory : str
+            cache directory, created when it does not exist
+
+        Returns
+        -------
+        None
+        """
+        path = os.path.join(directory, "control_surface_%s.npy" % self.surface_key())
+        if os.path.exists(path):
+            self.surface = np.load(path)
+            return
+        grid = np.meshgrid(self.high_marks.universe, self.day_of_the_month.universe, self.meals.universe,
+                           indexing='ij')
+        self.surface = self.simulate_many(*grid)
+        os.makedirs(directory, exist_ok=True)
+        temporary = "%s.%d.tmp" % (path, os.getpid())
+        with open(temporary, "wb") as file:
+            np.save(file, self.surface)
+        os.replace(temporary, path)
+
+    def lookup(self, high_marks, day_of_the_month, meals):
+        """
+        Returns how much money Babushka should give, read from the control surface (see load_surface). Integer
+        inputs are a single array lookup; other inputs are interpolated multilinearly between the surrounding
+        integer combinations. Inputs outside the universes are clipped to them, like in the simulation.
+
+        Parameters
+        ----------
+        high_marks : float/array[float]
+            number of the high marks received since last visit
+        day_of_the_month : float/array[float]
+            number of the day e.g. 16
+        meals : float/array[float]
+            number of meals eaten
+
+        Returns
+        -------
+        money : double/array[double]
+
+        Raises
+        ------
+        ValueError
+            when the control surface is not loaded
+        """
+        if self.surface is None:
+            raise ValueError("Control surface is not loaded, call load_surface first")
+        variables = (self.high_marks, self.day_of_the_month, self.meals)
+        values = (high_marks, day_of_the_month, meals)
+        if all(isinstance(value, (int, np.integer)) for value in values):
+            index = tuple(value - variable.universe[0] for variable, value in zip(variables, values))
+            if all(0 <= i < size for i, size in zip(index, self.surface.shape)):
+                return self.surface[index]
+        lower, fractions = [], []
+        for variable, value in zip(variables, values):
+            universe = variable.universe
+            value = np.clip(np.asarray(value, dtype=np.float64), universe[0], universe[-1])
+            i = np.clip(np.searchsorted(universe, value, side='right') - 1, 0, len(universe) - 2)
+            lower.append(i)
+            fractions.append((value - universe[i]) / (universe[i + 1] - universe[i]))
+        money = 0.
+        for corner in np.ndindex(2, 2, 2):
+            weight = 1.
+            for offset, fraction in zip(corner, fractions):
+                weight = weight * (fraction if offset else 1. - fraction)
+            money = money + weight * self.surface[tuple(i + offset for i, offset in zip(lower, corner))]
+        return money